@@ -0,0 +1,184 @@
+"""
+Adoption System - application factory
+create_app() lives here, apart from the module-level app in app.py, so
+importing it (as co-located mode does) builds no app as a side effect.
+"""
+import sys
+import os
+from urllib.parse import urlencode
+# Add parent directory to path to import config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask_login import login_required, current_user
+from config import AdoptionSystemConfig
+
+from adoption_system.extensions import db, login_manager, mail, cors
+from adoption_system.models import User, AdoptionApplication, AdoptedPet, Notification, create_missing_indexes
+from adoption_system.routes import auth, adoption, pets, profile, chatbot
+from adoption_system.utils.user_cache import user_cache
+from adoption_system.utils.notifications import notification_hub, unread_counts, stream_token
+from common.health import init_health
+from common.rate_limit import init_rate_limit
+from common.sql_profiler import init_sql_profiler
+from common.tracing import init_tracing
+
+
+def create_app(config_class=AdoptionSystemConfig):
+    """Build the adoption app with its extensions, blueprints and routes"""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    
+    # Initialize extensions
+    db.init_app(app)
+    cors.init_app(app)
+    mail.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    login_manager.login_message = 'Please log in to access this page.'
+    
+    # Register blueprints
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(adoption.bp)
+    app.register_blueprint(pets.bp)
+    app.register_blueprint(profile.bp)
+    app.register_blueprint(chatbot.bp)
+    
+    # Request IDs, latency histograms, /metrics, rate limits, the opt-in SQL profiler and health probes
+    init_tracing(app, 'adoption')
+    init_rate_limit(app)
+    init_sql_profiler(app, db)
+    init_health(app, db,
+                required=[('shelter', config_class.SHELTER_SYSTEM_URL)],
+                optional=[('veterinary', config_class.VETERINARY_SYSTEM_URL)])
+    
+    # Pushes new notifications to open pages; the poller starts with the first stream
+    notification_hub.start(app)
+    
+    @app.context_processor
+    def inject_notifications():
+        """Unread count for the navbar badge, and where the page streams updates from"""
+        if not current_user.is_authenticated:
+            return {}
+        try:
+            unread = unread_counts.get(current_user.id)
+        except Exception as e:
+            # Error pages still render when the database is down
+            print(f"Error counting unread notifications: {e}")
+            unread = None
+        stream_url = app.config['NOTIFICATION_STREAM_URL']
+        if stream_url:
+            token = stream_token(app.config['SECRET_KEY'], current_user.id)
+            stream_url = f"{stream_url.rstrip('/')}/notifications/stream?{urlencode({'token': token})}"
+        else:
+            stream_url = url_for('profile.notification_stream')
+        return {'unread_notifications': unread, 'notification_stream_url': stream_url}
+    
+    # User loader for Flask-Login, served from the per-process user cache
+    @login_manager.user_loader
+    def load_user(user_id):
+        return user_cache.load(int(user_id))
+
+    # Main routes
+    @app.route('/')
+    def index():
+        """Home page"""
+        return render_template('index.html')
+
+    @app.route('/about')
+    def about():
+        """About page"""
+        return render_template('about.html')
+
+    @app.route('/contact')
+    def contact():
+        """Contact page"""
+        return render_template('contact.html')
+
+    @app.route('/dashboard')
+    @login_required
+    def dashboard():
+        """User dashboard"""
+        if current_user.role == 'adopter':
+            # Show adoption history and applications
+            applications = AdoptionApplication.query.filter_by(user_id=current_user.id).order_by(AdoptionApplication.date_submitted.desc()).all()
+            adopted_pets = AdoptedPet.query.filter_by(adopter_id=current_user.id).all()
+            return render_template('dashboard/adopter.html', applications=applications, adopted_pets=adopted_pets)
+    
+        elif current_user.role == 'shelter':
+            # Show shelter management dashboard
+            applications = AdoptionApplication.query.order_by(AdoptionApplication.date_submitted.desc()).limit(10).all()
+            return render_template('dashboard/shelter.html', applications=applications)
+    
+        elif current_user.role == 'vet':
+            # Show veterinary dashboard
+            return render_template('dashboard/vet.html')
+    
+        return render_template('dashboard/default.html')
+
+    # API endpoints
+    @app.route('/api/health/<int:pet_id>')
+    def get_health_records(pet_id):
+        """Get health records for a pet from veterinary system"""
+        from adoption_system.utils.api_client import get_pet_health_from_vet
+        health_data = get_pet_health_from_vet(pet_id)
+        if health_data:
+            return jsonify(health_data)
+        return jsonify({'error': 'No health records found'}), 404
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return render_template('errors/404.html'), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        db.session.rollback()
+        return render_template('errors/500.html'), 500
+
+    # CLI commands
+    @app.cli.command()
+    def init_db():
+        """Initialize the database"""
+        db.create_all()
+        create_missing_indexes()
+        print("Database initialized!")
+
+    @app.cli.command()
+    def seed_db():
+        """Seed the database with sample data"""
+        from adoption_system.utils.passwords import hash_password
+    
+        # Create sample users
+        users = [
+            User(name='John Adopter', email='adopter@example.com', 
+                 password=hash_password('password123'), role='adopter'),
+            User(name='Shelter Manager', email='shelter@example.com', 
+                 password=hash_password('password123'), role='shelter'),
+            User(name='Dr. Veterinarian', email='vet@example.com', 
+                 password=hash_password('password123'), role='vet'),
+        ]
+    
+        for user in users:
+            db.session.add(user)
+    
+        db.session.commit()
+        print("Database seeded with sample data!")
+
+    @app.cli.command()
+    def refresh_breeds():
+        """Refresh the dog and cat breed catalogs from the external APIs"""
+        from adoption_system.utils.api_client import dog_breed_catalog, cat_breed_catalog
+        for catalog in (dog_breed_catalog, cat_breed_catalog):
+            if catalog.refresh():
+                print(f"{catalog.name}: {len(catalog.get())} breeds saved to {catalog.path}")
+            else:
+                print(f"{catalog.name}: refresh failed, keeping {len(catalog.get())} cached breeds")
+
+    @app.cli.command()
+    def prefetch_breed_media():
+        """Warm the breed image/info caches for every breed in the shelter inventory"""
+        from adoption_system.utils.api_client import prefetch_breed_media as prefetch
+        print(f"Prefetched media for {prefetch()} breeds")
+    
+    return app
@@ -3,7 +3,6 @@ Database models for Adoption System
 """
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from adoption_system.extensions import db
 
 class User(UserMixin, db.Model):
@@ -32,11 +31,13 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password = generate_password_hash(password)
+        from adoption_system.utils.passwords import hash_password
+        self.password = hash_password(password)
     
     def check_password(self, password):
         """Check if password matches"""
-        return check_password_hash(self.password, password)
+        from adoption_system.utils.passwords import verify_password
+        return verify_password(self.password, password)
     
     def __repr__(self):
         return f'<User {self.email} - {self.role}>'
@@ -45,6 +46,11 @@ class User(UserMixin, db.Model):
 class AdoptionApplication(db.Model):
     """Adoption application submitted by users"""
     __tablename__ = 'adoption_applications'
+    __table_args__ = (
+        # The review queue filters by status and pages by age
+        db.Index('ix_adoption_applications_status_submitted', 'status', 'date_submitted'),
+        db.Index('ix_adoption_applications_submitted', 'date_submitted'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -86,6 +92,11 @@ class AdoptedPet(db.Model):
 class Notification(db.Model):
     """Email/notification log"""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # History pages go newest first by id; unread counts filter on read_at
+        db.Index('ix_notifications_user_id', 'user_id', 'id'),
+        db.Index('ix_notifications_user_read', 'user_id', 'read_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -98,3 +109,10 @@ class Notification(db.Model):
     
     def __repr__(self):
         return f'<Notification {self.id} - {self.notification_type}>'
+
+
+def create_missing_indexes():
+    """Create indexes added after the tables were first created (create_all skips existing tables)"""
+    for model in (AdoptionApplication, Notification):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -12,9 +12,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 bp = Blueprint('adoption', __name__, url_prefix='/adoption')
 
 from adoption_system.extensions import db
-from adoption_system.models import AdoptionApplication, AdoptedPet
+from adoption_system.models import AdoptionApplication, AdoptedPet, Notification
 from adoption_system.utils.email_service import send_email
-from adoption_system.utils.api_client import get_pet_details_from_shelter
+from adoption_system.utils.api_client import get_pet_details_from_shelter, get_pets_by_ids_from_shelter
+from config import AdoptionSystemConfig
+
+# Largest review queue page the API serves
+MAX_QUEUE_PAGE = 100
 
 @bp.route('/apply/<int:pet_id>', methods=['GET', 'POST'])
 @login_required
@@ -104,6 +108,54 @@ def my_applications():
     return render_template('adoption/my_applications.html', applications=applications)
 
 
+def status_counts():
+    """{status: number of applications} plus 'all', in one grouped query"""
+    rows = db.session.query(
+        AdoptionApplication.status, db.func.count(AdoptionApplication.id)
+    ).group_by(AdoptionApplication.status).all()
+    counts = {}
+    for status, count in rows:
+        # Rows without a status are pending; add them to the 'pending' group rather than replace it
+        counts[status or 'pending'] = counts.get(status or 'pending', 0) + count
+    counts['all'] = sum(counts.values())
+    return counts
+
+
+def review_queue(status='all', sort='oldest', page=1, per_page=20):
+    """
+    A page of applications for review with their applicants loaded
+
+    sort='oldest' puts the longest-waiting applications first.
+    """
+    query = AdoptionApplication.query.options(db.joinedload(AdoptionApplication.user))
+    if status == 'pending':
+        # Rows without a status are counted as pending by status_counts, so list them too
+        query = query.filter(db.or_(AdoptionApplication.status == 'pending', AdoptionApplication.status.is_(None)))
+    elif status != 'all':
+        query = query.filter(AdoptionApplication.status == status)
+    if sort == 'newest':
+        order = (AdoptionApplication.date_submitted.desc(), AdoptionApplication.id.desc())
+    else:
+        order = (AdoptionApplication.date_submitted.asc(), AdoptionApplication.id.asc())
+    return query.order_by(*order).paginate(page=page, per_page=per_page, error_out=False)
+
+
+def pet_summary(pet):
+    """The fields of a shelter pet a reviewer triages on"""
+    images = pet.get('images') or []
+    primary = next((image for image in images if image.get('is_primary')), images[0] if images else None)
+    return {
+        'id': pet['id'],
+        'name': pet.get('name'),
+        'species': pet.get('species'),
+        'breed': pet.get('breed'),
+        'age': pet.get('age'),
+        'status': pet.get('status'),
+        'adoption_fee': pet.get('adoption_fee'),
+        'image_url': primary['image_url'] if primary else None
+    }
+
+
 @bp.route('/applications')
 @login_required
 def all_applications():
@@ -113,16 +165,79 @@ def all_applications():
         return redirect(url_for('dashboard'))
     
     status_filter = request.args.get('status', 'all')
+    sort = request.args.get('sort', 'newest')
+    page = request.args.get('page', 1, type=int)
     
-    query = AdoptionApplication.query
-    if status_filter != 'all':
-        query = query.filter_by(status=status_filter)
+    pagination = review_queue(status_filter, sort, page, AdoptionSystemConfig.RECORDS_PER_PAGE)
     
-    applications = query.order_by(AdoptionApplication.date_submitted.desc()).all()
+    # Pet details for the whole page in one shelter request
+    pets = get_pets_by_ids_from_shelter(application.pet_id for application in pagination.items) or {}
     
     return render_template('adoption/all_applications.html', 
-                          applications=applications,
-                          status_filter=status_filter)
+                          applications=pagination.items,
+                          pagination=pagination,
+                          pets=pets,
+                          counts=status_counts(),
+                          status_filter=status_filter,
+                          sort=sort)
+
+
+@bp.route('/api/applications')
+@login_required
+def review_queue_api():
+    """
+    Paginated review queue (shelter staff only)
+    
+    Query parameters: status (default pending, or all), sort (oldest or
+    newest), page and per_page. Each application carries its applicant and a
+    pet summary; pet summaries for the page come from one shelter request.
+    """
+    if current_user.role != 'shelter':
+        return jsonify({'error': 'Access denied'}), 403
+    
+    status = request.args.get('status', 'pending')
+    sort = request.args.get('sort', 'oldest')
+    if sort not in ('oldest', 'newest'):
+        return jsonify({'error': 'sort must be oldest or newest'}), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', AdoptionSystemConfig.RECORDS_PER_PAGE, type=int), 1),
+                   MAX_QUEUE_PAGE)
+    
+    pagination = review_queue(status, sort, page, per_page)
+    pets = get_pets_by_ids_from_shelter(application.pet_id for application in pagination.items)
+    
+    now = datetime.utcnow()
+    applications = []
+    for application in pagination.items:
+        pet = (pets or {}).get(application.pet_id)
+        submitted = application.date_submitted
+        applications.append({
+            'id': application.id,
+            'status': application.status,
+            'date_submitted': submitted.isoformat() if submitted else None,
+            'age_days': (now - submitted).days if submitted else None,
+            'date_reviewed': application.date_reviewed.isoformat() if application.date_reviewed else None,
+            'living_situation': application.living_situation,
+            'has_yard': application.has_yard,
+            'applicant': {
+                'id': application.user.id,
+                'name': application.user.name,
+                'email': application.user.email
+            },
+            'pet': pet_summary(pet) if pet else {'id': application.pet_id, 'name': application.pet_name},
+            'url': url_for('adoption.view_application', app_id=application.id)
+        })
+    
+    return jsonify({
+        'applications': applications,
+        'counts': status_counts(),
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page,
+        'per_page': per_page,
+        # Pet summaries fall back to the stored name when the shelter is down
+        'pets_unavailable': pets is None
+    })
 
 
 @bp.route('/application/<int:app_id>')
@@ -163,6 +278,14 @@ def review_application(app_id):
     application.reviewed_by = current_user.id
     application.notes = notes
     
+    # In-app notice for the adopter, pushed to their open pages
+    db.session.add(Notification(
+        user_id=application.user_id,
+        notification_type='in-app',
+        subject=f'Adoption Application {application.status.title()}',
+        message=f'Your application for {application.pet_name} was {application.status}.',
+        status='sent'
+    ))
     db.session.commit()
     
     # If approved, create adopted pet record
@@ -178,7 +301,7 @@ def review_application(app_id):
         db.session.commit()
         
         # Update pet status in shelter system
-        from utils.api_client import update_pet_status_in_shelter
+        from adoption_system.utils.api_client import update_pet_status_in_shelter
         update_pet_status_in_shelter(application.pet_id, 'adopted')
     
     # Send notification email
@@ -214,7 +337,7 @@ def my_pets():
     # Get health records for each pet
     pets_with_health = []
     for pet in adopted_pets:
-        from utils.api_client import get_pet_health_from_vet
+        from adoption_system.utils.api_client import get_pet_health_from_vet
         health_info = get_pet_health_from_vet(pet.pet_id)
         pets_with_health.append({
             'pet': pet,
@@ -3,7 +3,6 @@ Authentication routes for Adoption System
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, session
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import sys
 import os
@@ -17,6 +16,7 @@ bp = Blueprint('auth', __name__, url_prefix='/auth')
 from adoption_system.extensions import db
 from adoption_system.models import User
 from adoption_system.utils.email_service import send_email
+from adoption_system.utils.passwords import hash_password, verify_password, needs_rehash
 
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -58,7 +58,7 @@ def register():
         user = User(
             name=name,
             email=email,
-            password=generate_password_hash(password),
+            password=hash_password(password),
             role=role,
             gender=gender,
             job=job,
@@ -104,8 +104,11 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
             login_user(user, remember=remember)
+            # Upgrade hashes made with older settings while the password is at hand
+            if needs_rehash(user.password):
+                user.password = hash_password(password)
             user.updated_at = datetime.utcnow()
             db.session.commit()
             
@@ -160,7 +163,7 @@ def change_password():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
         
-        if not check_password_hash(current_user.password, current_password):
+        if not verify_password(current_user.password, current_password):
             flash('Current password is incorrect.', 'danger')
             return render_template('auth/change_password.html')
         
@@ -172,7 +175,7 @@ def change_password():
             flash('Password must be at least 6 characters long.', 'danger')
             return render_template('auth/change_password.html')
         
-        current_user.password = generate_password_hash(new_password)
+        current_user.password = hash_password(new_password)
         current_user.updated_at = datetime.utcnow()
         db.session.commit()
         
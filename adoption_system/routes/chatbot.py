@@ -5,14 +5,47 @@ Provides AI-like responses based on adoption data and integrates with other syst
 from flask import Blueprint, render_template, request, jsonify
 import sys
 import os
-import requests
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 bp = Blueprint('chatbot', __name__, url_prefix='/chatbot')
 
-SHELTER_API = "http://localhost:5001/api"
-VET_API = "http://localhost:5002/api"
+from common.tracing import http
+from common.intent_router import IntentRouter, SPECIES_TERMS, YOUNG_TERMS
+from common.snapshot import SnapshotCache
+from config import AdoptionSystemConfig
+
+SHELTER_API = f"{AdoptionSystemConfig.SHELTER_SYSTEM_URL}/api"
+VET_API = f"{AdoptionSystemConfig.VETERINARY_SYSTEM_URL}/api"
+
+# Intents are checked in registration order, first match wins
+router = IntentRouter(number_slot='pet_id')
+router.add_slot('species', SPECIES_TERMS)
+router.add_slot('young', YOUNG_TERMS)
+router.add_intent('greeting', ['hello', 'hi', 'hey', 'greetings'])
+router.add_intent('help', ['help', 'what can you do'])
+router.add_intent('process', ['adopt*'], ['how', 'process', 'steps', 'work*'])
+router.add_intent('available', ['available', 'adoption', 'find pet'])
+router.add_intent('stats', ['how many', 'statistics', 'stats'])
+router.add_intent('health', ['health'])
+router.add_intent('kids', ['kid*', 'children', 'family'])
+router.add_intent('search', ['find', 'search', 'show me'])
+
+
+def fetch_pets(**params):
+    """Query the shelter pet listing with filters applied server-side"""
+    return http.get(f"{SHELTER_API}/pets/", params=params, timeout=5)
+
+
+def build_snapshot():
+    """Fetch the shelter statistics the chatbot answers from"""
+    response = http.get(f"{SHELTER_API}/stats", timeout=5)
+    response.raise_for_status()
+    return {'stats': response.json()}
+
+
+# Shelter data changes outside this service, so the snapshot only expires by age
+snapshot = SnapshotCache(build_snapshot, ttl=AdoptionSystemConfig.CHATBOT_SNAPSHOT_TTL)
 
 @bp.route('/')
 def chatbot_page():
@@ -35,25 +68,28 @@ def chat():
 
 def process_query(message):
     """Process user query and return appropriate response"""
-    
-    # Greetings
-    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
-        return "Hello! 👋 I'm the Adoption Assistant. I can help you find pets available for adoption, check their health status, and guide you through the adoption process. Try asking 'Show me available pets' or 'How does adoption work?'."
-    
-    # Help
-    if 'help' in message or 'what can you do' in message:
-        return "I can help you with:\n\n" + \
-               "🐾 Available Pets: \"Show me available pets\" or \"Dogs for adoption\"\n" + \
-               "🔍 Search: \"Find [pet name]\" or \"Show me puppies\"\n" + \
-               "🏥 Health Info: \"Check health status for pet [id]\"\n" + \
-               "❤️ Adoption Process: \"How to adopt?\" or \"Adoption steps\"\n" + \
-               "📊 Statistics: \"How many pets available?\"\n" + \
-               "👶 Family-Friendly: \"Pets good with kids\"\n\n" + \
-               "I can also integrate information from our Shelter and Veterinary systems!"
-    
-    # Adoption process
-    if 'adopt' in message and ('how' in message or 'process' in message or 'steps' in message or 'work' in message):
-        return """❤️ **Adoption Process:**
+    match = router.route(message)
+    handler = HANDLERS.get(match.intent, answer_default)
+    return handler(message, match)
+
+
+def answer_greeting(message, match):
+    return "Hello! 👋 I'm the Adoption Assistant. I can help you find pets available for adoption, check their health status, and guide you through the adoption process. Try asking 'Show me available pets' or 'How does adoption work?'."
+
+
+def answer_help(message, match):
+    return "I can help you with:\n\n" + \
+           "🐾 Available Pets: \"Show me available pets\" or \"Dogs for adoption\"\n" + \
+           "🔍 Search: \"Find [pet name]\" or \"Show me puppies\"\n" + \
+           "🏥 Health Info: \"Check health status for pet [id]\"\n" + \
+           "❤️ Adoption Process: \"How to adopt?\" or \"Adoption steps\"\n" + \
+           "📊 Statistics: \"How many pets available?\"\n" + \
+           "👶 Family-Friendly: \"Pets good with kids\"\n\n" + \
+           "I can also integrate information from our Shelter and Veterinary systems!"
+
+
+def answer_process(message, match):
+    return """❤️ **Adoption Process:**
 
 **Step 1: Browse Pets** 🔍
 Visit our shelter system to see all available pets
@@ -77,63 +113,67 @@ Complete paperwork and take your new friend home!
 Schedule first vet appointment within 2 weeks
 
 Would you like to see available pets?"""
-    
-    # Available pets from Shelter System
-    if 'available' in message or 'adoption' in message or 'find pet' in message:
-        try:
-            response = requests.get(f"{SHELTER_API}/pets/", timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                available_pets = [p for p in data.get('pets', []) if p['status'] == 'available']
-                
-                if 'dog' in message:
-                    available_pets = [p for p in available_pets if p['species'] == 'dog']
-                    species_name = "dogs"
-                elif 'cat' in message:
-                    available_pets = [p for p in available_pets if p['species'] == 'cat']
-                    species_name = "cats"
-                elif 'puppy' in message or 'puppies' in message:
-                    available_pets = [p for p in available_pets if p['species'] == 'dog' and p['age'] <= 1]
-                    species_name = "puppies"
-                elif 'kitten' in message:
-                    available_pets = [p for p in available_pets if p['species'] == 'cat' and p['age'] <= 1]
-                    species_name = "kittens"
-                else:
-                    species_name = "pets"
-                
-                if not available_pets:
-                    return f"Sorry, we don't have any {species_name} available right now. Check back soon!"
-                
-                result = f"🐾 **Available {species_name.title()} ({len(available_pets)}):**\n\n"
-                
-                for pet in available_pets[:5]:
-                    result += f"• **{pet['name']}** (ID: {pet['id']})\n"
-                    result += f"  {pet['breed'] or pet['species'].title()}, {pet['age']} years, {pet['gender']}\n"
-                    if pet.get('good_with_kids'):
-                        result += f"  👶 Great with kids!\n"
-                    result += "\n"
-                
-                if len(available_pets) > 5:
-                    result += f"...and {len(available_pets) - 5} more!\n\n"
-                
-                result += "Ask me about specific pets or their health status!"
-                return result
-            else:
-                return "I'm having trouble connecting to the Shelter System. Please try again later."
+
+
+def answer_available(message, match):
+    """Available pets from Shelter System"""
+    try:
+        young = match.get('young')
+        species = match.get('species')
+        
+        if young == 'puppy':
+            filters = {'species': 'dog', 'age_max': 1}
+            species_name = "puppies"
+        elif young == 'kitten':
+            filters = {'species': 'cat', 'age_max': 1}
+            species_name = "kittens"
+        elif species == 'dog':
+            filters = {'species': 'dog'}
+            species_name = "dogs"
+        elif species == 'cat':
+            filters = {'species': 'cat'}
+            species_name = "cats"
+        else:
+            filters = {}
+            species_name = "pets"
+        
+        response = fetch_pets(status='available', per_page=5, **filters)
         
-        except Exception as e:
-            return "Unable to fetch pets from Shelter System right now. Please try again."
+        if response.status_code != 200:
+            return "I'm having trouble connecting to the Shelter System. Please try again later."
+        
+        data = response.json()
+        available_pets = data.get('pets', [])
+        total = data.get('total', len(available_pets))
+        
+        if not available_pets:
+            return f"Sorry, we don't have any {species_name} available right now. Check back soon!"
+        
+        result = f"🐾 **Available {species_name.title()} ({total}):**\n\n"
+        
+        for pet in available_pets:
+            result += f"• **{pet['name']}** (ID: {pet['id']})\n"
+            result += f"  {pet['breed'] or pet['species'].title()}, {pet['age']} years, {pet['gender']}\n"
+            if pet.get('good_with_kids'):
+                result += f"  👶 Great with kids!\n"
+            result += "\n"
+        
+        if total > len(available_pets):
+            result += f"...and {total - len(available_pets)} more!\n\n"
+        
+        result += "Ask me about specific pets or their health status!"
+        return result
     
-    # Statistics
-    if 'how many' in message or 'statistics' in message or 'stats' in message:
-        try:
-            response = requests.get(f"{SHELTER_API}/pets/statistics", timeout=5)
-            
-            if response.status_code == 200:
-                stats = response.json()
-                
-                return f"""📊 **Adoption Statistics:**
+    except Exception as e:
+        return "Unable to fetch pets from Shelter System right now. Please try again."
+
+
+def answer_stats(message, match):
+    """Statistics"""
+    try:
+        stats = snapshot.get()['stats']
+        
+        return f"""📊 **Adoption Statistics:**
                 
 🐾 Total Pets: **{stats['total_pets']}**
 ✅ Available for Adoption: **{stats['available']}**
@@ -144,31 +184,31 @@ Would you like to see available pets?"""
 🐱 Cats: **{stats['cats']}**
 
 Ready to find your perfect match? Ask me to show available pets!"""
-            else:
-                return "Unable to fetch statistics right now."
-        
-        except Exception as e:
-            return "Statistics temporarily unavailable. Please try again."
     
-    # Health check integration
-    if 'health' in message:
-        import re
-        pet_id_match = re.search(r'\d+', message)
+    except Exception as e:
+        return "Statistics temporarily unavailable. Please try again."
+
+
+def answer_health(message, match):
+    """Health check integration"""
+    pet_id = match.get('pet_id')
+    
+    if pet_id is None:
+        return "Please specify a pet ID. Example: 'Check health status for pet 1'"
+    
+    try:
+        # Get pet info from shelter
+        shelter_response = http.get(f"{SHELTER_API}/pets/{pet_id}", timeout=5)
+        # Get health info from vet
+        vet_response = http.get(f"{VET_API}/health/{pet_id}", timeout=5)
         
-        if pet_id_match:
-            pet_id = int(pet_id_match.group())
-            
-            try:
-                # Get pet info from shelter
-                shelter_response = requests.get(f"{SHELTER_API}/pets/{pet_id}", timeout=5)
-                # Get health info from vet
-                vet_response = requests.get(f"{VET_API}/health/{pet_id}", timeout=5)
-                
-                if shelter_response.status_code == 200 and vet_response.status_code == 200:
-                    pet = shelter_response.json()
-                    health = vet_response.json()
-                    
-                    return f"""🏥 **Health Status for {pet['name']}:**
+        if shelter_response.status_code != 200 or vet_response.status_code != 200:
+            return f"Unable to find complete information for Pet ID {pet_id}."
+        
+        pet = shelter_response.json()
+        health = vet_response.json()
+        
+        return f"""🏥 **Health Status for {pet['name']}:**
                     
 📋 **Basic Info:**
 • Species: {pet['species'].title()}
@@ -187,67 +227,78 @@ Ready to find your perfect match? Ask me to show available pets!"""
 • Weight: {health.get('weight', 'N/A')} kg
 
 {pet['name']} is ready for adoption! Would you like to know more?"""
-                else:
-                    return f"Unable to find complete information for Pet ID {pet_id}."
-            
-            except Exception as e:
-                return "Unable to fetch health information right now. Please try again."
-        else:
-            return "Please specify a pet ID. Example: 'Check health status for pet 1'"
     
-    # Kid-friendly pets
-    if 'kid' in message or 'children' in message or 'family' in message:
-        try:
-            response = requests.get(f"{SHELTER_API}/pets/", timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                kid_friendly = [p for p in data.get('pets', []) 
-                               if p['status'] == 'available' and p.get('good_with_kids')]
-                
-                if not kid_friendly:
-                    return "We're updating our pet profiles. Please check back soon!"
-                
-                result = f"👶 **Family-Friendly Pets ({len(kid_friendly)}):**\n\n"
-                
-                for pet in kid_friendly[:5]:
-                    result += f"• **{pet['name']}** - {pet['breed'] or pet['species'].title()} ({pet['age']} years)\n"
-                    result += f"  Perfect for families with children!\n\n"
-                
-                if len(kid_friendly) > 5:
-                    result += f"...and {len(kid_friendly) - 5} more!\n\n"
-                
-                return result + "These pets are great with kids!"
-            else:
-                return "Unable to fetch pet information right now."
+    except Exception as e:
+        return "Unable to fetch health information right now. Please try again."
+
+
+def answer_kids(message, match):
+    """Kid-friendly pets"""
+    try:
+        response = fetch_pets(status='available', good_with_kids='true', per_page=5)
+        
+        if response.status_code != 200:
+            return "Unable to fetch pet information right now."
         
-        except Exception as e:
-            return "Unable to search for family-friendly pets. Please try again."
+        data = response.json()
+        kid_friendly = data.get('pets', [])
+        total = data.get('total', len(kid_friendly))
+        
+        if not kid_friendly:
+            return "We're updating our pet profiles. Please check back soon!"
+        
+        result = f"👶 **Family-Friendly Pets ({total}):**\n\n"
+        
+        for pet in kid_friendly:
+            result += f"• **{pet['name']}** - {pet['breed'] or pet['species'].title()} ({pet['age']} years)\n"
+            result += f"  Perfect for families with children!\n\n"
+        
+        if total > len(kid_friendly):
+            result += f"...and {total - len(kid_friendly)} more!\n\n"
+        
+        return result + "These pets are great with kids!"
+    
+    except Exception as e:
+        return "Unable to search for family-friendly pets. Please try again."
+
+
+def answer_search(message, match):
+    """Search by name"""
+    words = message.split()
+    search_term = None
+    
+    for i, word in enumerate(words):
+        if word in ['find', 'search', 'show', 'me']:
+            if i + 1 < len(words) and words[i + 1] not in ['pet', 'pets', 'dog', 'cat']:
+                search_term = words[i + 1].title()
+                break
+    
+    if not search_term:
+        return answer_default(message, match)
     
-    # Search by name
-    if 'find' in message or 'search' in message or 'show me' in message:
-        words = message.split()
-        search_term = None
+    try:
+        response = fetch_pets(search=search_term, per_page=5)
         
-        for i, word in enumerate(words):
-            if word in ['find', 'search', 'show', 'me']:
-                if i + 1 < len(words) and words[i + 1] not in ['pet', 'pets', 'dog', 'cat']:
-                    search_term = words[i + 1].title()
-                    break
+        if response.status_code != 200:
+            return answer_default(message, match)
         
-        if search_term:
-            try:
-                response = requests.get(f"{SHELTER_API}/pets/", timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    found = [p for p in data.get('pets', []) 
-                            if search_term.lower() in p['name'].lower() or 
-                               (p.get('breed') and search_term.lower() in p['breed'].lower())]
-                    
-                    if found:
-                        pet = found[0]
-                        return f"""🔍 **Found: {pet['name']}!**
+        # The shelter search also matches descriptions; only name/breed hits are a "Found"
+        candidates = response.json().get('pets', [])
+        found = [p for p in candidates 
+                if search_term.lower() in p['name'].lower() or 
+                   (p.get('breed') and search_term.lower() in p['breed'].lower())]
+        
+        if not found and candidates:
+            result = f"No pet's name or breed matches '{search_term}', but these mention it in their description:\n\n"
+            for pet in candidates:
+                result += f"• **{pet['name']}** - {pet['species'].title()} (ID: {pet['id']})\n"
+            return result + "\nAsk me to find one of them by name for details!"
+        
+        if not found:
+            return f"Sorry, I couldn't find any pets matching '{search_term}'. Try asking 'Show me available dogs' or 'Available cats'."
+        
+        pet = found[0]
+        return f"""🔍 **Found: {pet['name']}!**
                         
 📋 **Details:**
 • ID: {pet['id']}
@@ -262,13 +313,12 @@ Ready to find your perfect match? Ask me to show available pets!"""
 • Other Pets: {'✅ Yes' if pet.get('good_with_pets') else '❌ No'}
 
 Want to know more? Ask me to check {pet['name']}'s health status!"""
-                    else:
-                        return f"Sorry, I couldn't find any pets matching '{search_term}'. Try asking 'Show me available dogs' or 'Available cats'."
-            
-            except Exception as e:
-                return "Unable to search right now. Please try again."
     
-    # Default response
+    except Exception as e:
+        return "Unable to search right now. Please try again."
+
+
+def answer_default(message, match):
     return """I'm not sure how to answer that. Here are some things you can ask me:
 
 💬 "Show me available pets"
@@ -279,3 +329,15 @@ Want to know more? Ask me to check {pet['name']}'s health status!"""
 💬 "Find Max"
 
 Or just type 'help' to see all my features!"""
+
+
+HANDLERS = {
+    'greeting': answer_greeting,
+    'help': answer_help,
+    'process': answer_process,
+    'available': answer_available,
+    'stats': answer_stats,
+    'health': answer_health,
+    'kids': answer_kids,
+    'search': answer_search,
+}
@@ -12,14 +12,52 @@ bp = Blueprint('pets', __name__, url_prefix='/pets')
 
 from adoption_system.utils.api_client import (
     get_all_pets_from_shelter,
+    get_pet_facets_from_shelter,
+    match_pets_in_shelter,
     get_pet_details_from_shelter,
+    get_similar_pets_from_shelter,
     get_dog_breeds,
     get_cat_breeds,
     get_random_dog_image,
     get_cat_breed_info
 )
+from adoption_system.models import AdoptionApplication
+from adoption_system.utils.fanout import FanOut
 from config import AdoptionSystemConfig
 
+# Range and trait filters passed straight through to the shelter API
+TRAIT_FILTERS = [
+    'age_min', 'age_max', 'fee_max', 'size', 'energy_level',
+    'good_with_kids', 'good_with_dogs', 'good_with_cats', 'vaccinated'
+]
+
+# Filters the shelter's trait bitmap index answers; combinations that include
+# any other filter go through the SQL listing
+INDEXED_FILTERS = {
+    'species', 'gender', 'size', 'energy_level',
+    'good_with_kids', 'good_with_dogs', 'good_with_cats', 'vaccinated'
+}
+
+
+def trait_query(filters):
+    """The trait index query for the browse filters, or None when the SQL listing should serve them"""
+    where = {key: value for key, value in filters.items() if value not in (None, '', 'all')}
+    if not where.keys() <= INDEXED_FILTERS:
+        return None
+    # Species or gender alone is a plain indexed listing already
+    if not where.keys() - {'species', 'gender'}:
+        return None
+    return where
+
+
+def match_listing(where, page):
+    """A page of pets from the trait index, shaped like the shelter listing"""
+    result = match_pets_in_shelter(where, page=page, per_page=AdoptionSystemConfig.PETS_PER_PAGE)
+    if result is None:
+        return {'pets': [], 'total': 0, 'pages': 0}
+    result.setdefault('pets', [])
+    return result
+
 @bp.route('/browse')
 def browse():
     """Browse available pets"""
@@ -29,65 +67,141 @@ def browse():
     age = request.args.get('age', '')
     gender = request.args.get('gender', '')
     page = request.args.get('page', 1, type=int)
+    traits = {key: request.args.get(key, '') for key in TRAIT_FILTERS}
     
-    # Get pets from shelter system
-    pets = get_all_pets_from_shelter(
-        species=species,
-        breed=breed,
-        age=age,
-        gender=gender,
-        page=page
-    )
+    filters = {
+        'species': species,
+        'breed': breed,
+        'age': age,
+        'gender': gender,
+        **traits
+    }
     
-    # Get breed lists for filters
-    dog_breeds = get_dog_breeds()
-    cat_breeds = get_cat_breeds()
+    # Pets, their facet counts and the breed lists are fetched side by side
+    fan = FanOut()
+    where = trait_query(filters)
+    if where:
+        fan.add('pets', match_listing, where, page,
+                timeout=2.5, default={'pets': [], 'total': 0, 'pages': 0})
+    else:
+        fan.add('pets', get_all_pets_from_shelter, page=page, **filters,
+                timeout=2.5, default={'pets': [], 'total': 0, 'pages': 0})
+    fan.add('facets', get_pet_facets_from_shelter, **filters, timeout=1.5)
+    fan.add('dog_breeds', get_dog_breeds, timeout=1.0, default=[])
+    fan.add('cat_breeds', get_cat_breeds, timeout=1.0, default=[])
+    results = fan.run()
+    facets = results['facets']
     
     return render_template('pets/browse.html',
-                          pets=pets,
-                          dog_breeds=dog_breeds,
-                          cat_breeds=cat_breeds,
-                          filters={
-                              'species': species,
-                              'breed': breed,
-                              'age': age,
-                              'gender': gender
-                          })
+                          pets=results['pets'],
+                          facets=facets.get('facets', {}) if facets else {},
+                          dog_breeds=results['dog_breeds'],
+                          cat_breeds=results['cat_breeds'],
+                          filters=filters,
+                          unavailable=fan.unavailable)
 
 
 @bp.route('/<int:pet_id>')
 def detail(pet_id):
     """View pet details"""
-    pet = get_pet_details_from_shelter(pet_id)
+    user_id = None
+    if current_user.is_authenticated and getattr(current_user, 'role', None) == 'adopter':
+        user_id = current_user.id
+    
+    # Pet details, similar pets and the application check do not depend on each other
+    fan = FanOut()
+    fan.add('pet', get_pet_details_from_shelter, pet_id, timeout=2.5)
+    fan.add('similar_pets', get_similar_pets_from_shelter, pet_id, limit=4, timeout=1.5, default=[])
+    if user_id:
+        fan.add('has_applied', has_pending_application, user_id, pet_id, timeout=1.0, default=False)
+    results = fan.run()
     
+    pet = results['pet']
     if not pet:
+        if 'pet' in fan.unavailable:
+            return render_template('errors/500.html'), 503
         return render_template('errors/404.html'), 404
     
-    # Get additional breed information from external APIs
+    # Additional breed information, within what is left of the deadline
+    if pet['species'] == 'dog':
+        fan.add('dog_image', get_random_dog_image, pet.get('breed', ''), timeout=1.5, default='')
+    elif pet['species'] == 'cat':
+        fan.add('breed_info', get_cat_breed_info, pet.get('breed', ''), timeout=1.5)
+    fan.run()
+    
     breed_info = None
     if pet['species'] == 'dog':
-        breed_info = {'image': get_random_dog_image(pet.get('breed', ''))}
+        breed_info = {'image': fan.results['dog_image']}
     elif pet['species'] == 'cat':
-        breed_info = get_cat_breed_info(pet.get('breed', ''))
-    
-    # Check if user has already applied
-    has_applied = False
-    try:
-        if current_user.is_authenticated and hasattr(current_user, 'role') and current_user.role == 'adopter':
-            from models import AdoptionApplication
-            has_applied = AdoptionApplication.query.filter_by(
-                user_id=current_user.id,
-                pet_id=pet_id,
-                status='pending'
-            ).first() is not None
-    except:
-        # User authentication not configured
-        has_applied = False
+        breed_info = fan.results['breed_info']
     
     return render_template('pets/detail.html',
                           pet=pet,
                           breed_info=breed_info,
-                          has_applied=has_applied)
+                          similar_pets=results['similar_pets'],
+                          has_applied=results.get('has_applied', False),
+                          unavailable=fan.unavailable)
+
+
+def has_pending_application(user_id, pet_id):
+    """Whether the user already has a pending application for the pet"""
+    return AdoptionApplication.query.filter_by(
+        user_id=user_id,
+        pet_id=pet_id,
+        status='pending'
+    ).first() is not None
+
+
+@bp.route('/recommended')
+def recommended():
+    """Available pets ranked against the adopter's home and experience"""
+    # Matching pulls in NumPy; import it here so it stays off the cold-start path
+    from adoption_system.utils.matching import build_profile, profile_from_application, engine_cache
+
+    species = request.args.get('species', 'all')
+    profile = None
+    
+    # Answers given on the page win over the latest application
+    if request.args.get('living_situation'):
+        profile = build_profile(
+            living_situation=request.args.get('living_situation'),
+            has_yard=request.args.get('has_yard') == 'yes',
+            other_pets=request.args.get('other_pets', ''),
+            experience=request.args.get('experience', ''),
+            has_kids=request.args.get('has_kids') == 'yes'
+        )
+    elif current_user.is_authenticated:
+        application = AdoptionApplication.query.filter_by(
+            user_id=current_user.id
+        ).order_by(AdoptionApplication.date_submitted.desc()).first()
+        if application:
+            profile = profile_from_application(application)
+    
+    matches = []
+    if profile:
+        try:
+            matches = engine_cache.get().rank(profile, limit=AdoptionSystemConfig.PETS_PER_PAGE, species=species)
+        except Exception as e:
+            print(f"Error ranking pets: {e}")
+    
+    # One shelter call for the details of every recommended pet
+    pets = []
+    if matches:
+        found = get_all_pets_from_shelter(
+            ids=','.join(str(pet_id) for pet_id, _, _ in matches),
+            per_page=len(matches)
+        )
+        by_id = {pet['id']: pet for pet in found.get('pets', [])}
+        pets = [
+            {**by_id[pet_id], 'match_score': score, 'match_reasons': reasons}
+            for pet_id, score, reasons in matches if pet_id in by_id
+        ]
+    
+    return render_template('pets/recommended.html',
+                          pets=pets,
+                          profile=profile,
+                          form=request.args,
+                          species=species)
 
 
 @bp.route('/search')
@@ -1,8 +1,9 @@
 """
 User profile routes
 """
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
+from datetime import datetime
 import sys
 import os
 
@@ -10,7 +11,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 bp = Blueprint('profile', __name__, url_prefix='/profile')
 
+from adoption_system.extensions import db
 from adoption_system.models import AdoptionApplication, AdoptedPet, Notification
+from adoption_system.utils.notifications import (
+    notification_dict,
+    unread_counts,
+    notification_hub,
+    stream_response
+)
+from config import AdoptionSystemConfig
+
+# Largest history page the API serves
+MAX_NOTIFICATION_PAGE = 100
 
 @bp.route('/')
 @login_required
@@ -23,11 +35,86 @@ def index():
 @login_required
 def notifications():
     """View user notifications"""
-    notifications = Notification.query.filter_by(
+    page = request.args.get('page', 1, type=int)
+    pagination = Notification.query.filter_by(
         user_id=current_user.id
-    ).order_by(Notification.sent_at.desc()).all()
+    ).order_by(Notification.id.desc()).paginate(
+        page=page,
+        per_page=AdoptionSystemConfig.RECORDS_PER_PAGE,
+        error_out=False
+    )
+    
+    return render_template('profile/notifications.html',
+                          notifications=pagination.items,
+                          pagination=pagination)
+
+
+@bp.route('/api/notifications')
+@login_required
+def notification_history():
+    """
+    Notification history, newest first
+    
+    Pass the returned next_before as before to get the following page.
+    """
+    limit = min(max(request.args.get('limit', AdoptionSystemConfig.RECORDS_PER_PAGE, type=int), 1),
+                MAX_NOTIFICATION_PAGE)
+    before = request.args.get('before', type=int)
+    
+    query = Notification.query.filter(Notification.user_id == current_user.id)
+    if before:
+        query = query.filter(Notification.id < before)
+    items = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+    
+    return jsonify({
+        'notifications': [notification_dict(notification) for notification in items[:limit]],
+        'next_before': items[limit - 1].id if len(items) > limit else None,
+        'unread': unread_counts.get(current_user.id)
+    })
+
+
+@bp.route('/api/notifications/unread-count')
+@login_required
+def unread_count():
+    """Number of unread notifications, from the per-process cache"""
+    return jsonify({'unread': unread_counts.get(current_user.id)})
+
+
+@bp.route('/api/notifications/read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    """Mark the given notification ids (or all of them) as read"""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    
+    query = db.update(Notification).where(
+        Notification.user_id == current_user.id,
+        Notification.read_at.is_(None)
+    )
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({'error': 'ids must be a list of integers'}), 400
+        query = query.where(Notification.id.in_(ids))
+    result = db.session.execute(query.values(read_at=datetime.utcnow()))
+    db.session.commit()
+    # Bulk updates skip the session, so the cached count is dropped here
+    unread_counts.invalidate(current_user.id)
+    
+    return jsonify({'marked': result.rowcount, 'unread': unread_counts.get(current_user.id)})
+
+
+@bp.route('/notifications/stream')
+@login_required
+def notification_stream():
+    """
+    Server-Sent Events stream of new notifications from this web worker
     
-    return render_template('profile/notifications.html', notifications=notifications)
+    Used when NOTIFICATION_STREAM_URL is not set. Sends 'unread' with the
+    count on connect and 'notification' for each new one. On reconnect,
+    notifications after Last-Event-ID are sent first.
+    """
+    after = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', type=int)
+    return stream_response(notification_hub, current_user.id, after)
 
 
 @bp.route('/settings')
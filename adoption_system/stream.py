@@ -0,0 +1,63 @@
+"""
+Adoption System - notification stream server
+Serves only the Server-Sent Events stream of new notifications, from a
+gevent worker where each open stream is a parked greenlet instead of a
+thread of the web workers. Pages connect to it at NOTIFICATION_STREAM_URL
+with the signed token they were rendered with; no session cookie is needed,
+so it can run on its own host or port.
+
+Run with:
+    gunicorn adoption_system.stream:app --bind 0.0.0.0:$NOTIFICATION_PORT --workers 1 --worker-class gevent --worker-connections ${NOTIFICATION_STREAM_CONNECTIONS:-1000}
+"""
+import sys
+import os
+# Add parent directory to path to import config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, request, jsonify
+from config import AdoptionSystemConfig
+
+from adoption_system.extensions import db
+from adoption_system.utils.notifications import notification_hub, stream_user, stream_response
+from common.health import init_health
+
+
+def create_stream_app(config_class=AdoptionSystemConfig):
+    """Build the app serving /notifications/stream"""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    db.init_app(app)
+    init_health(app, db)
+
+    # Greenlets are cheap, so the cap is the worker's connection limit rather than a share of its threads
+    notification_hub.max_streams = config_class.NOTIFICATION_STREAM_CONNECTIONS
+    notification_hub.start(app)
+
+    @app.route('/notifications/stream', methods=['GET', 'OPTIONS'])
+    def notification_stream():
+        """Stream for the user named by the token query parameter"""
+        if request.method == 'OPTIONS':
+            return '', 204
+        user_id = stream_user(app.config['SECRET_KEY'], request.args.get('token', ''),
+                              app.config['NOTIFICATION_TOKEN_MAX_AGE'])
+        if user_id is None:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        after = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', type=int)
+        return stream_response(notification_hub, user_id, after)
+
+    @app.after_request
+    def allow_pages(response):
+        # The token authorizes the request, so any page origin may open it
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        response.headers['Access-Control-Allow-Headers'] = 'Last-Event-ID'
+        return response
+
+    return app
+
+
+# Module-level app for gunicorn
+app = create_stream_app()
+
+if __name__ == '__main__':
+    port = int(os.environ.get('NOTIFICATION_PORT', 5003))
+    app.run(host='0.0.0.0', port=port, threaded=True)
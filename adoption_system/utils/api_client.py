@@ -1,16 +1,25 @@
 """
 API client for inter-system communication and external APIs
 """
-import requests
 from config import Config
+from common.tracing import http
+from adoption_system.utils.breed_catalog import BreedCatalog
+from adoption_system.utils.breed_media import BreedMediaCache
+from concurrent.futures import ThreadPoolExecutor
 import random
 
 class APIClient:
     """Client for making API requests to other systems and external services"""
     
     @staticmethod
-    def get_all_pets_from_shelter(species='all', breed='', age='', gender='', page=1, search=''):
-        """Get pets from Shelter Inventory System"""
+    def get_all_pets_from_shelter(species='all', breed='', age='', gender='', page=1, search='', **filters):
+        """
+        Get pets from Shelter Inventory System
+        
+        Extra keyword filters (age_min, age_max, fee_max, size, energy_level,
+        good_with_kids, vaccinated, per_page, ...) are passed through to the
+        shelter API; empty values are left out.
+        """
         try:
             params = {
                 'species': species,
@@ -20,7 +29,11 @@ class APIClient:
                 'page': page,
                 'search': search
             }
-            response = requests.get(
+            for key, value in filters.items():
+                if value is None or value == '':
+                    continue
+                params[key] = str(value).lower() if isinstance(value, bool) else value
+            response = http.get(
                 f"{Config.SHELTER_SYSTEM_URL}/api/pets/",
                 params=params,
                 timeout=5
@@ -32,11 +45,63 @@ class APIClient:
             print(f"Error fetching pets from shelter: {e}")
             return {'pets': [], 'total': 0, 'pages': 0}
     
+    @staticmethod
+    def get_pet_facets_from_shelter(**filters):
+        """Get per-facet pet counts for a filter combination from Shelter System"""
+        try:
+            # 'all' means no filter, except for status where the shelter defaults to available
+            params = {
+                key: value for key, value in filters.items()
+                if value not in (None, '') and (value != 'all' or key == 'status')
+            }
+            response = http.get(
+                f"{Config.SHELTER_SYSTEM_URL}/api/pets/facets",
+                params=params,
+                timeout=5
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            print(f"Error fetching pet facets: {e}")
+            return None
+    
+    @staticmethod
+    def match_pets_in_shelter(where, page=1, per_page=12, include_pets=True):
+        """Find available pets by trait combination using the Shelter System bitmap index"""
+        try:
+            response = http.post(
+                f"{Config.SHELTER_SYSTEM_URL}/api/pets/match",
+                json={'where': where, 'page': page, 'per_page': per_page, 'include_pets': include_pets},
+                timeout=5
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            print(f"Error matching pets: {e}")
+            return None
+    
+    @staticmethod
+    def get_pet_features_from_shelter():
+        """Get matching features of all available pets from Shelter System as column lists"""
+        try:
+            response = http.get(
+                f"{Config.SHELTER_SYSTEM_URL}/api/pets/features",
+                timeout=10
+            )
+            if response.status_code == 200:
+                return response.json().get('columns')
+            return None
+        except Exception as e:
+            print(f"Error fetching pet features: {e}")
+            return None
+    
     @staticmethod
     def get_pet_details_from_shelter(pet_id):
         """Get specific pet details from Shelter System"""
         try:
-            response = requests.get(
+            response = http.get(
                 f"{Config.SHELTER_SYSTEM_URL}/api/pets/{pet_id}",
                 timeout=5
             )
@@ -47,11 +112,51 @@ class APIClient:
             print(f"Error fetching pet details: {e}")
             return None
     
+    @staticmethod
+    def get_pets_by_ids_from_shelter(pet_ids):
+        """
+        Get many pets in one request from Shelter System, any status
+        
+        Returns {pet_id: pet}; pets the shelter no longer has are missing.
+        Returns None when the shelter cannot be reached.
+        """
+        pet_ids = sorted(set(pet_ids))
+        if not pet_ids:
+            return {}
+        try:
+            response = http.get(
+                f"{Config.SHELTER_SYSTEM_URL}/api/pets/",
+                params={'ids': ','.join(map(str, pet_ids)), 'status': 'all', 'per_page': len(pet_ids)},
+                timeout=5
+            )
+            if response.status_code == 200:
+                return {pet['id']: pet for pet in response.json().get('pets', [])}
+            return None
+        except Exception as e:
+            print(f"Error fetching pets by id: {e}")
+            return None
+    
+    @staticmethod
+    def get_similar_pets_from_shelter(pet_id, limit=6):
+        """Get the available pets most similar to a pet from Shelter System"""
+        try:
+            response = http.get(
+                f"{Config.SHELTER_SYSTEM_URL}/api/pets/{pet_id}/similar",
+                params={'limit': limit},
+                timeout=5
+            )
+            if response.status_code == 200:
+                return response.json().get('similar', [])
+            return []
+        except Exception as e:
+            print(f"Error fetching similar pets: {e}")
+            return []
+    
     @staticmethod
     def update_pet_status_in_shelter(pet_id, status):
         """Update pet status in Shelter System"""
         try:
-            response = requests.put(
+            response = http.put(
                 f"{Config.SHELTER_SYSTEM_URL}/api/update-status/",
                 json={'pet_id': pet_id, 'status': status},
                 timeout=5
@@ -65,7 +170,7 @@ class APIClient:
     def get_pet_health_from_vet(pet_id):
         """Get pet health records from Veterinary System"""
         try:
-            response = requests.get(
+            response = http.get(
                 f"{Config.VETERINARY_SYSTEM_URL}/api/health/{pet_id}",
                 timeout=5
             )
@@ -80,7 +185,7 @@ class APIClient:
     def schedule_vet_appointment(pet_id, vet_id, date, reason):
         """Schedule appointment in Veterinary System"""
         try:
-            response = requests.post(
+            response = http.post(
                 f"{Config.VETERINARY_SYSTEM_URL}/api/schedule-appointment/",
                 json={
                     'pet_id': pet_id,
@@ -97,9 +202,14 @@ class APIClient:
     
     @staticmethod
     def get_dog_breeds():
-        """Get list of dog breeds from Dog API"""
+        """Get list of dog breeds from the local catalog (refreshed from Dog API in the background)"""
+        return dog_breed_catalog.get()
+    
+    @staticmethod
+    def fetch_dog_breeds():
+        """Fetch list of dog breeds from Dog API"""
         try:
-            response = requests.get('https://dog.ceo/api/breeds/list/all', timeout=5)
+            response = http.get('https://dog.ceo/api/breeds/list/all', timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 breeds = list(data.get('message', {}).keys())
@@ -111,31 +221,58 @@ class APIClient:
     
     @staticmethod
     def get_random_dog_image(breed=''):
-        """Get random dog image from Dog API"""
-        try:
-            if breed:
-                url = f'https://dog.ceo/api/breed/{breed.lower()}/images/random'
-            else:
-                url = 'https://dog.ceo/api/breeds/image/random'
-            
-            response = requests.get(url, timeout=5)
+        """Get a dog image for a breed (any breed when empty) from the breed media cache"""
+        images = dog_image_cache.get(breed)
+        return random.choice(images) if images else ''
+    
+    @staticmethod
+    def dog_breed_paths(breed):
+        """Candidate Dog API paths for a shelter breed name, e.g. 'Golden Retriever' -> 'retriever/golden'"""
+        words = breed.lower().replace('-', ' ').split()
+        if not words:
+            return []
+        candidates = [''.join(words)]
+        if len(words) > 1:
+            candidates += [f"{words[-1]}/{''.join(words[:-1])}", words[-1], words[0]]
+        return list(dict.fromkeys(candidates))
+    
+    @staticmethod
+    def fetch_dog_images(breed, count=5):
+        """
+        Fetch a few random images for a breed from Dog API
+        
+        Returns None when Dog API does not know the breed; network errors raise.
+        """
+        if not breed:
+            urls = [f'https://dog.ceo/api/breeds/image/random/{count}']
+        else:
+            urls = [f'https://dog.ceo/api/breed/{path}/images/random/{count}'
+                    for path in APIClient.dog_breed_paths(breed)]
+        
+        for url in urls:
+            response = http.get(url, timeout=5)
             if response.status_code == 200:
-                data = response.json()
-                return data.get('message', '')
-            return ''
-        except Exception as e:
-            print(f"Error fetching dog image: {e}")
-            return ''
+                images = response.json().get('message') or []
+                if images:
+                    return images
+            elif response.status_code >= 500:
+                response.raise_for_status()
+        return None
     
     @staticmethod
     def get_cat_breeds():
-        """Get list of cat breeds from Cat API"""
+        """Get list of cat breeds from the local catalog (refreshed from Cat API in the background)"""
+        return cat_breed_catalog.get()
+    
+    @staticmethod
+    def fetch_cat_breeds():
+        """Fetch list of cat breeds from Cat API"""
         try:
             headers = {}
             if Config.CAT_API_KEY:
                 headers['x-api-key'] = Config.CAT_API_KEY
             
-            response = requests.get(
+            response = http.get(
                 'https://api.thecatapi.com/v1/breeds',
                 headers=headers,
                 timeout=5
@@ -150,31 +287,76 @@ class APIClient:
     
     @staticmethod
     def get_cat_breed_info(breed_name):
-        """Get detailed cat breed information"""
-        try:
-            headers = {}
-            if Config.CAT_API_KEY:
-                headers['x-api-key'] = Config.CAT_API_KEY
-            
-            response = requests.get(
-                'https://api.thecatapi.com/v1/breeds/search',
-                params={'q': breed_name},
-                headers=headers,
-                timeout=5
-            )
-            if response.status_code == 200:
-                breeds = response.json()
-                if breeds:
-                    return breeds[0]
-            return None
-        except Exception as e:
-            print(f"Error fetching cat breed info: {e}")
+        """Get detailed cat breed information from the breed media cache"""
+        if not breed_name:
             return None
+        return cat_info_cache.get(breed_name)
+    
+    @staticmethod
+    def fetch_cat_breed_info(breed_name):
+        """
+        Fetch detailed cat breed information from Cat API
+        
+        Returns None when Cat API does not know the breed; network errors raise.
+        """
+        headers = {}
+        if Config.CAT_API_KEY:
+            headers['x-api-key'] = Config.CAT_API_KEY
+        
+        response = http.get(
+            'https://api.thecatapi.com/v1/breeds/search',
+            params={'q': breed_name},
+            headers=headers,
+            timeout=5
+        )
+        response.raise_for_status()
+        breeds = response.json()
+        return breeds[0] if breeds else None
+    
+    @staticmethod
+    def prefetch_breed_media(max_workers=8):
+        """
+        Warm the breed media caches for every breed in the shelter inventory
+        
+        Meant to run from `flask prefetch-breed-media` (e.g. nightly); breeds
+        already cached and unexpired are skipped. Returns the number fetched.
+        """
+        jobs = []
+        for species, cache in (('dog', dog_image_cache), ('cat', cat_info_cache)):
+            facets = APIClient.get_pet_facets_from_shelter(species=species, status='all') or {}
+            for breed in facets.get('facets', {}).get('breed', {}):
+                if breed != 'unknown' and not cache.contains(breed):
+                    jobs.append((cache, breed))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda job: job[0].fetch(job[1], persist=False), jobs))
+        
+        for cache in (dog_image_cache, cat_info_cache):
+            cache.save()
+        return len(jobs)
+
+# Breed lists served from disk instead of calling the APIs per page view
+dog_breed_catalog = BreedCatalog('dog_breeds', APIClient.fetch_dog_breeds,
+                                 cache_dir=Config.CACHE_DIR, ttl=Config.BREED_CATALOG_TTL)
+cat_breed_catalog = BreedCatalog('cat_breeds', APIClient.fetch_cat_breeds,
+                                 cache_dir=Config.CACHE_DIR, ttl=Config.BREED_CATALOG_TTL)
 
+# Per-breed dog images and cat breed details, misses included
+dog_image_cache = BreedMediaCache('dog_images', APIClient.fetch_dog_images, cache_dir=Config.CACHE_DIR,
+                                  ttl=Config.BREED_MEDIA_TTL, negative_ttl=Config.BREED_MEDIA_NEGATIVE_TTL,
+                                  maxsize=Config.BREED_MEDIA_CACHE_SIZE)
+cat_info_cache = BreedMediaCache('cat_breed_info', APIClient.fetch_cat_breed_info, cache_dir=Config.CACHE_DIR,
+                                 ttl=Config.BREED_MEDIA_TTL, negative_ttl=Config.BREED_MEDIA_NEGATIVE_TTL,
+                                 maxsize=Config.BREED_MEDIA_CACHE_SIZE)
 
 # Export functions for easier importing
 get_all_pets_from_shelter = APIClient.get_all_pets_from_shelter
+get_pet_facets_from_shelter = APIClient.get_pet_facets_from_shelter
+match_pets_in_shelter = APIClient.match_pets_in_shelter
+get_pet_features_from_shelter = APIClient.get_pet_features_from_shelter
 get_pet_details_from_shelter = APIClient.get_pet_details_from_shelter
+get_pets_by_ids_from_shelter = APIClient.get_pets_by_ids_from_shelter
+get_similar_pets_from_shelter = APIClient.get_similar_pets_from_shelter
 update_pet_status_in_shelter = APIClient.update_pet_status_in_shelter
 get_pet_health_from_vet = APIClient.get_pet_health_from_vet
 schedule_vet_appointment = APIClient.schedule_vet_appointment
@@ -182,3 +364,4 @@ get_dog_breeds = APIClient.get_dog_breeds
 get_random_dog_image = APIClient.get_random_dog_image
 get_cat_breeds = APIClient.get_cat_breeds
 get_cat_breed_info = APIClient.get_cat_breed_info
+prefetch_breed_media = APIClient.prefetch_breed_media
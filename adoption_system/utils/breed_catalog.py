@@ -0,0 +1,126 @@
+"""
+Persistent breed catalogs
+Breed lists from dog.ceo and TheCatAPI are kept on disk and served from
+memory. Stale lists are refreshed in a background thread, so page views never
+wait on the external APIs; a bundled seed snapshot covers the first run and
+offline deployments.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'breed_catalog_seed.json')
+
+# Wait this long before retrying after a failed refresh
+RETRY_AFTER = 300
+
+
+def write_json_atomic(path, data):
+    """Write JSON so concurrent readers only ever see a complete file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class BreedCatalog:
+    """
+    One breed list backed by a JSON file in cache_dir
+
+    get() never blocks on the network. It returns the list in memory,
+    reloading it when another process has written a newer file, and starts
+    a background refresh through fetcher() once the list is older than ttl
+    seconds. An empty or failed fetch keeps the current list.
+    """
+
+    def __init__(self, name, fetcher, cache_dir, ttl=604800, seed_path=SEED_PATH):
+        self.name = name
+        self.fetcher = fetcher
+        self.path = os.path.join(cache_dir, f'{name}.json')
+        self.ttl = ttl
+        self.seed_path = seed_path
+        self._breeds = None
+        self._fetched_at = 0.0
+        self._file_mtime = None
+        self._retry_at = 0.0
+        self._refreshing = threading.Lock()
+
+    def get(self):
+        """Current breed list, refreshed in the background when stale"""
+        if self._breeds is None or self.is_stale():
+            self._load()
+        if self.is_stale() and time.time() >= self._retry_at:
+            self.refresh_async()
+        return self._breeds
+
+    def is_stale(self):
+        return time.time() - self._fetched_at >= self.ttl
+
+    def _load(self):
+        """Read the cache file if it changed, falling back to the bundled seed"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+
+        if mtime is not None and mtime != self._file_mtime:
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self._breeds = data['breeds']
+                self._fetched_at = data['fetched_at']
+                self._file_mtime = mtime
+                return
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error reading breed catalog {self.path}: {e}")
+
+        if self._breeds is None:
+            try:
+                with open(self.seed_path) as f:
+                    self._breeds = json.load(f).get(self.name, [])
+            except (OSError, ValueError) as e:
+                print(f"Error reading breed seed {self.seed_path}: {e}")
+                self._breeds = []
+            self._fetched_at = 0.0  # seed data is always due for a refresh
+
+    def refresh(self):
+        """Fetch the list now and persist it; returns True on success"""
+        breeds = self.fetcher()
+        if not breeds:
+            self._retry_at = time.time() + RETRY_AFTER
+            return False
+
+        fetched_at = time.time()
+        try:
+            write_json_atomic(self.path, {'fetched_at': fetched_at, 'breeds': breeds})
+            self._file_mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            # Read-only filesystem: keep serving the fresh list from memory
+            print(f"Error writing breed catalog {self.path}: {e}")
+        self._breeds = breeds
+        self._fetched_at = fetched_at
+        return True
+
+    def refresh_async(self):
+        """Start a background refresh unless one is already running"""
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing breed catalog {self.name}: {e}")
+                self._retry_at = time.time() + RETRY_AFTER
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name=f'refresh-{self.name}', daemon=True).start()
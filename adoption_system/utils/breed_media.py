@@ -0,0 +1,135 @@
+"""
+Per-breed cache for external breed media and info
+Dog images and cat breed details are looked up once per breed and kept in a
+bounded, disk-backed LRU. Breeds the APIs do not know are cached as misses
+too, so unknown breeds stop costing a request on every pet page.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from adoption_system.utils.breed_catalog import write_json_atomic
+
+# Keep transient failures (timeouts, offline) for this long before retrying
+RETRY_AFTER = 300
+
+
+class BreedMediaCache:
+    """
+    Bounded per-breed lookup cache persisted as one JSON file
+
+    fetcher(breed) returns the value to cache, None when the breed is
+    unknown (cached for negative_ttl) and raises on transient errors (cached
+    as a miss for RETRY_AFTER seconds). Expired hits are still returned
+    while a background thread refreshes them.
+    """
+
+    def __init__(self, name, fetcher, cache_dir, ttl=604800, negative_ttl=86400, maxsize=1000):
+        self.name = name
+        self.fetcher = fetcher
+        self.path = os.path.join(cache_dir, f'{name}.json')
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # breed -> [expires_at, value]
+        self._loaded = False
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(breed):
+        return ' '.join((breed or '').lower().split())
+
+    def get(self, breed):
+        """Cached value for a breed, fetched on first use"""
+        key = self.key(breed)
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            return self.fetch(key)
+        if time.time() >= entry[0]:
+            self.refresh_async(key)
+        return entry[1]
+
+    def fetch(self, breed, persist=True):
+        """Look a breed up now and cache the result, including misses"""
+        key = self.key(breed)
+        try:
+            value = self.fetcher(key)
+            ttl = self.ttl if value is not None else self.negative_ttl
+        except Exception as e:
+            print(f"Error fetching {self.name} for '{key}': {e}")
+            value, ttl = None, RETRY_AFTER
+
+        with self._lock:
+            self._entries[key] = [time.time() + ttl, value]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        if persist:
+            self.save()
+        return value
+
+    def refresh_async(self, breed):
+        """Refetch an expired breed in the background, once at a time"""
+        key = self.key(breed)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.fetch(key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f'refresh-{self.name}', daemon=True).start()
+
+    def contains(self, breed):
+        """Whether a breed has an unexpired entry"""
+        entry = self._entries.get(self.key(breed))
+        return entry is not None and time.time() < entry[0]
+
+    def _read_file(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading {self.path}: {e}")
+            return {}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        entries = self._read_file()
+        with self._lock:
+            if not self._loaded:
+                for key, entry in sorted(entries.items(), key=lambda item: item[1][0]):
+                    self._entries.setdefault(key, entry)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                self._loaded = True
+
+    def save(self):
+        """Persist entries, keeping the newer entry for breeds other workers also wrote"""
+        merged = self._read_file()
+        with self._lock:
+            for key, entry in self._entries.items():
+                if key not in merged or merged[key][0] < entry[0]:
+                    merged[key] = entry
+        if len(merged) > self.maxsize:
+            merged = dict(sorted(merged.items(), key=lambda item: item[1][0])[-self.maxsize:])
+        try:
+            write_json_atomic(self.path, merged)
+        except OSError as e:
+            print(f"Error writing {self.path}: {e}")
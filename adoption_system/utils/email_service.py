@@ -41,7 +41,7 @@ def send_email(to, subject, template=None, **kwargs):
         mail.send(msg)
         
         # Log notification in database
-        from models import Notification, db
+        from adoption_system.models import Notification, db
         if 'user_id' in kwargs:
             notification = Notification(
                 user_id=kwargs['user_id'],
@@ -59,7 +59,7 @@ def send_email(to, subject, template=None, **kwargs):
         
         # Log failed notification
         try:
-            from models import Notification, db
+            from adoption_system.models import Notification, db
             if 'user_id' in kwargs:
                 notification = Notification(
                     user_id=kwargs['user_id'],
@@ -0,0 +1,103 @@
+"""
+Concurrent fan-out for page rendering
+Independent lookups a page needs (shelter API, external breed data, database)
+run side by side on a shared thread pool, each with its own timeout and all
+under one overall deadline. Calls that miss their deadline or fail fall back
+to a default so the page can still render with what arrived; their outgoing
+HTTP requests are limited to the same deadline, so a call the page gave up
+on does not keep its pool thread.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app, has_app_context
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from common.tracing import deadline_var
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide worker pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=Config.FANOUT_WORKERS, thread_name_prefix='fanout')
+    return _pool
+
+
+class FanOut:
+    """
+    One batch of concurrent calls for the current request
+
+    Usage:
+        fan = FanOut()
+        fan.add('pets', get_all_pets_from_shelter, species='dog', timeout=2.5, default={})
+        fan.add('dog_breeds', get_dog_breeds, timeout=1.0, default=[])
+        results = fan.run()
+
+    Each call runs inside its own app context (and so its own database
+    session) with the caller's context variables. Names of calls that timed
+    out or raised are listed in `unavailable`. Calls added after a run()
+    can be run as a second stage; they share the remaining overall deadline.
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = Config.FANOUT_DEADLINE if deadline is None else deadline
+        self.results = {}
+        self.unavailable = []
+        self._calls = []
+        self._started = None
+
+    def add(self, name, func, *args, timeout=None, default=None, **kwargs):
+        """Queue a call; its result is stored under name"""
+        self._calls.append((name, func, args, kwargs, timeout, default))
+        return self
+
+    def run(self):
+        """Run all queued calls and wait for them up to their deadlines"""
+        app = current_app._get_current_object() if has_app_context() else None
+        pool = get_pool()
+        if self._started is None:
+            self._started = time.monotonic()
+        started = time.monotonic()
+        overall = self._started + self.deadline
+
+        pending = []
+        for name, func, args, kwargs, timeout, default in self._calls:
+            limit = overall if timeout is None else min(overall, started + timeout)
+            context = contextvars.copy_context()
+            context.run(deadline_var.set, limit)
+            future = pool.submit(context.run, self._call, app, func, args, kwargs)
+            pending.append((name, default, limit, future))
+        self._calls = []
+
+        for name, default, limit, future in pending:
+            try:
+                self.results[name] = future.result(timeout=max(limit - time.monotonic(), 0))
+            except FutureTimeout:
+                future.cancel()
+                print(f"Fan-out call '{name}' timed out")
+                self.results[name] = default
+                self.unavailable.append(name)
+            except Exception as e:
+                print(f"Fan-out call '{name}' failed: {e}")
+                self.results[name] = default
+                self.unavailable.append(name)
+
+        return self.results
+
+    @staticmethod
+    def _call(app, func, args, kwargs):
+        if app is None:
+            return func(*args, **kwargs)
+        with app.app_context():
+            return func(*args, **kwargs)
@@ -0,0 +1,192 @@
+"""
+Adopter-to-pet matching
+Available pets are encoded once as a NumPy feature matrix; an adopter profile
+is turned into weights and scored against every pet in one vectorized pass
+"""
+import re
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adoption_system.utils.api_client import get_pet_features_from_shelter
+from common.snapshot import SnapshotCache
+from config import AdoptionSystemConfig
+
+# Graded traits mapped onto 0..1; unknown values sit in the middle
+ENERGY = {'low': 0.0, 'medium': 0.5, 'high': 1.0, 'very high': 1.0}
+SIZE = {'small': 0.0, 'medium': 0.5, 'large': 1.0}
+SHEDDING = {'none': 0.0, 'low': 0.25, 'medium': 0.5, 'heavy': 0.75, 'very heavy': 1.0}
+TRAINABILITY = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
+
+GRADED_FEATURES = [
+    ('energy_level', ENERGY), ('size', SIZE), ('shedding', SHEDDING), ('trainability', TRAINABILITY)
+]
+
+# 0/1 flags, each one a possible conflict with the adopter's household
+CONFLICT_FEATURES = ['good_with_kids', 'good_with_dogs', 'good_with_cats', 'good_with_pets', 'special_needs']
+
+SMALL_HOMES = ('apartment', 'flat', 'condo', 'studio', 'unit', 'dorm')
+NO_PETS = ('', 'none', 'no', 'n/a', 'na', '0', '-', 'nope')
+KID_WORDS = ('kid', 'child', 'children', 'baby', 'toddler', 'son', 'daughter')
+NOVICE_WORDS = ('first', 'none', 'no experience', 'never', 'new to')
+EXPERIENCED_WORDS = ('experienced', 'years', 'trained', 'trainer', 'volunteer', 'foster', 'vet', 'raised', 'grew up')
+
+
+def words_in(text, words):
+    text = (text or '').lower()
+    return any(re.search(rf'\b{re.escape(word)}', text) for word in words)
+
+
+def build_profile(living_situation='', has_yard=False, other_pets='', experience='', has_kids=False):
+    """Normalise adopter answers into the flags and levels the scorer uses"""
+    other = (other_pets or '').strip().lower()
+    if words_in(experience, NOVICE_WORDS):
+        level = 0.0
+    elif words_in(experience, EXPERIENCED_WORDS):
+        level = 1.0
+    else:
+        level = 0.5
+
+    return {
+        'small_home': words_in(living_situation, SMALL_HOMES),
+        'has_yard': bool(has_yard),
+        'has_kids': bool(has_kids),
+        'has_dogs': words_in(other, ('dog', 'pupp')),
+        'has_cats': words_in(other, ('cat', 'kitten')),
+        'has_pets': other not in NO_PETS,
+        'experience': level,
+    }
+
+
+def profile_from_application(application):
+    """Build a profile from an AdoptionApplication"""
+    free_text = ' '.join(filter(None, [application.reason, application.living_situation, application.other_pets]))
+    return build_profile(
+        living_situation=application.living_situation,
+        has_yard=application.has_yard,
+        other_pets=application.other_pets,
+        experience=application.experience,
+        has_kids=words_in(free_text, KID_WORDS)
+    )
+
+
+def profile_weights(profile):
+    """
+    Turn a profile into scoring weights
+
+    Returns the ideal value and weight of each graded feature, and the
+    penalty for each conflict flag.
+    """
+    cramped = profile['small_home'] and not profile['has_yard']
+    novice = 1.0 - profile['experience']
+
+    ideal = np.array([
+        0.2 if cramped else (0.8 if profile['has_yard'] else 0.5),  # energy
+        0.1 if cramped else (0.6 if profile['has_yard'] else 0.4),  # size
+        0.0,                                                        # shedding
+        1.0,                                                        # trainability
+    ], dtype=np.float32)
+    fit = np.array([
+        2.0 if cramped else 1.0,
+        2.0 if cramped else 0.5,
+        1.0 if profile['small_home'] else 0.3,
+        0.25 + 1.5 * novice,
+    ], dtype=np.float32)
+    conflicts = np.array([
+        4.0 if profile['has_kids'] else 0.0,
+        4.0 if profile['has_dogs'] else 0.0,
+        4.0 if profile['has_cats'] else 0.0,
+        2.0 if profile['has_pets'] else 0.0,
+        2.0 * novice,
+    ], dtype=np.float32)
+    return ideal, fit, conflicts
+
+
+class MatchingEngine:
+    """Feature matrix of available pets, ranked against adopter profiles"""
+
+    def __init__(self, ids, species, matrix):
+        self.ids = ids
+        self.species = species
+        self.matrix = matrix
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Encode the column lists returned by the shelter features endpoint"""
+        count = len(columns.get('id', []))
+        matrix = np.empty((count, len(GRADED_FEATURES) + len(CONFLICT_FEATURES)), dtype=np.float32)
+
+        for col, (field, scale) in enumerate(GRADED_FEATURES):
+            matrix[:, col] = [scale.get((value or '').strip().lower(), 0.5) for value in columns[field]]
+
+        offset = len(GRADED_FEATURES)
+        for col, field in enumerate(CONFLICT_FEATURES, start=offset):
+            if field == 'special_needs':
+                matrix[:, col] = [1.0 if value else 0.0 for value in columns[field]]
+            else:
+                # A "good with" flag conflicts when it is false; unknown is half a conflict
+                matrix[:, col] = [0.5 if value is None else (0.0 if value else 1.0) for value in columns[field]]
+
+        ids = np.asarray(columns.get('id', []), dtype=np.int64)
+        species = np.array([(value or '').lower() for value in columns.get('species', [])], dtype='U8')
+        return cls(ids, species, matrix)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def score(self, profile):
+        """Score every pet 0-100 against a profile"""
+        ideal, fit, conflicts = profile_weights(profile)
+        graded = len(GRADED_FEATURES)
+        penalty = np.abs(self.matrix[:, :graded] - ideal) @ fit + self.matrix[:, graded:] @ conflicts
+        worst = float(fit.sum() + conflicts.sum()) or 1.0
+        return 100.0 * (1.0 - penalty / worst)
+
+    def rank(self, profile, limit=12, species=None):
+        """Top pets for a profile as (pet_id, score, reasons), best first"""
+        if not len(self):
+            return []
+        scores = self.score(profile)
+        if species and species != 'all':
+            scores = np.where(self.species == species.lower(), scores, -np.inf)
+
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            (int(self.ids[i]), round(float(scores[i])), self.reasons(i, profile))
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    def reasons(self, index, profile):
+        """Short explanations for one pet's score"""
+        energy, size, shedding, trainability = self.matrix[index, :len(GRADED_FEATURES)]
+        kids, dogs, cats, pets, special = self.matrix[index, len(GRADED_FEATURES):]
+        reasons = []
+        if profile['small_home'] and not profile['has_yard'] and energy <= 0.5 and size <= 0.5:
+            reasons.append('Suits a smaller home')
+        if profile['has_yard'] and energy >= 0.5:
+            reasons.append('Will enjoy your yard')
+        if profile['has_kids'] and kids == 0:
+            reasons.append('Good with kids')
+        if profile['has_dogs'] and dogs == 0:
+            reasons.append('Gets along with dogs')
+        if profile['has_cats'] and cats == 0:
+            reasons.append('Gets along with cats')
+        if profile['experience'] < 1 and trainability >= 1:
+            reasons.append('Easy to train')
+        if profile['small_home'] and shedding <= 0.25:
+            reasons.append('Low shedding')
+        return reasons
+
+
+def load_engine():
+    columns = get_pet_features_from_shelter()
+    if columns is None:
+        raise RuntimeError('Shelter features unavailable')
+    return MatchingEngine.from_columns(columns)
+
+
+engine_cache = SnapshotCache(load_engine, ttl=AdoptionSystemConfig.RECOMMENDATION_SNAPSHOT_TTL)
@@ -0,0 +1,343 @@
+"""
+In-app notification delivery
+Unread counts are cached per process and dropped when a commit adds or
+changes a user's notifications; pages render the count server-side. New
+notifications reach open pages over Server-Sent Events: one poller thread
+per process looks for new rows and hands them to the streams of their
+users, so an idle stream costs a heartbeat, not a query.
+
+Streams are long-lived, so in production they are served by their own
+gevent process (adoption_system/stream.py, the Procfile's notifications
+entry), where an open stream is a parked greenlet rather than one of the
+web workers' gthread threads. Pages reach it at NOTIFICATION_STREAM_URL with
+a signed token naming the user. Without that URL pages use the stream
+route of the web app itself, capped at NOTIFICATION_MAX_STREAMS per worker.
+A commit in this process wakes the poller at once; rows written by other
+processes are seen within NOTIFICATION_POLL_INTERVAL seconds.
+"""
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+
+from flask import Response, jsonify
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from adoption_system.models import Notification, db
+from config import AdoptionSystemConfig
+
+POLL_BATCH = 500
+RECONNECT_MS = 5000  # how long EventSource waits before reconnecting
+MAX_MISSED = 50  # most missed notifications replayed on reconnect
+TOKEN_SALT = 'notification-stream'
+
+
+def notification_dict(notification):
+    """JSON form of a Notification (or a row with its columns)"""
+    return {
+        'id': notification.id,
+        'type': notification.notification_type,
+        'subject': notification.subject,
+        'message': notification.message,
+        'status': notification.status,
+        'sent_at': notification.sent_at.isoformat() if notification.sent_at else None,
+        'read_at': notification.read_at.isoformat() if notification.read_at else None
+    }
+
+
+class UnreadCounts:
+    """Bounded user id -> unread notification count cache"""
+
+    def __init__(self, ttl=30, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # user id -> (counted_at, count)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and now - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+            generation = self._generation
+
+        count = db.session.scalar(
+            select(db.func.count(Notification.id)).where(
+                Notification.user_id == user_id, Notification.read_at.is_(None)
+            )
+        )
+        with self._lock:
+            # Skip storing if a commit changed notifications while this one counted
+            if generation == self._generation and self.ttl > 0:
+                self._entries[user_id] = (now, count)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return count
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def watch(self):
+        """Drop counts when a commit adds, changes or deletes a user's notifications"""
+        key = (type(self).__name__, id(self))
+
+        def after_flush(session, flush_context):
+            changed = session.info.setdefault(key, set())
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+                if isinstance(obj, Notification):
+                    changed.add(obj.user_id)
+
+        def after_commit(session):
+            changed = session.info.pop(key, None)
+            if changed:
+                self.invalidate(*changed)
+
+        def after_rollback(session, previous_transaction):
+            session.info.pop(key, None)
+
+        event.listen(Session, 'after_flush', after_flush)
+        event.listen(Session, 'after_commit', after_commit)
+        event.listen(Session, 'after_soft_rollback', after_rollback)
+        return self
+
+
+class Subscription:
+    """One open stream: events for a user, waiting to be written out"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.last_id = 0  # highest notification id sent on this stream
+        self._events = deque()
+        self._ready = threading.Event()
+
+    def push(self, event):
+        self._events.append(event)
+        self._ready.set()
+
+    def get(self, timeout):
+        """Events pushed since the last call; empty after timeout seconds without any"""
+        self._ready.wait(timeout)
+        self._ready.clear()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+
+class NotificationHub:
+    """Hands new notifications to the open streams in this process"""
+
+    def __init__(self, counts, poll_interval=2.0, max_streams=8):
+        self.counts = counts
+        self.poll_interval = poll_interval
+        self.max_streams = max_streams
+        self._subscriptions = {}  # user id -> set of Subscription
+        self._open = 0
+        self._last_id = None  # newest notification seen; None while nobody listens
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._app = None
+
+    def start(self, app):
+        """Remember the app; the poller thread starts with the first stream"""
+        self._app = app
+        return self
+
+    def subscribe(self, user_id):
+        """A Subscription for user_id, or None when this process has max_streams open"""
+        with self._lock:
+            if self._open >= self.max_streams:
+                return None
+            if self._last_id is None:
+                # Runs in the caller's request, so rows committed from here on are not missed
+                self._last_id = db.session.scalar(select(db.func.max(Notification.id))) or 0
+            subscription = Subscription(user_id)
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+            self._open += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-hub', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if not subscriptions or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+            self._open -= 1
+            if not self._open:
+                self._last_id = None
+
+    def open_streams(self):
+        return self._open
+
+    def wake(self):
+        """Poll now instead of at the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            # Sleep until a stream opens when there is nobody to deliver to
+            self._wake.wait(self.poll_interval if self._open else None)
+            self._wake.clear()
+            with self._lock:
+                last_id = self._last_id
+            if last_id is None:
+                continue
+            try:
+                with self._app.app_context():
+                    rows = db.session.execute(
+                        select(Notification.id, Notification.user_id, Notification.notification_type,
+                               Notification.subject, Notification.message, Notification.status,
+                               Notification.sent_at, Notification.read_at)
+                        .where(Notification.id > last_id)
+                        .order_by(Notification.id)
+                        .limit(POLL_BATCH)
+                    ).all()
+            except Exception as e:
+                print(f"Error polling notifications: {e}")
+                continue
+            if not rows:
+                continue
+            # Also catches notifications committed by other processes
+            self.counts.invalidate(*{row.user_id for row in rows})
+            with self._lock:
+                for row in rows:
+                    for subscription in self._subscriptions.get(row.user_id, ()):
+                        subscription.push(notification_dict(row))
+                if self._last_id is not None:
+                    self._last_id = max(self._last_id, rows[-1].id)
+            if len(rows) == POLL_BATCH:
+                self._wake.set()
+
+    def watch(self):
+        """Poll as soon as a commit in this process adds notifications"""
+        key = (type(self).__name__, id(self))
+
+        def after_flush(session, flush_context):
+            if any(isinstance(obj, Notification) for obj in session.new):
+                session.info[key] = True
+
+        def after_commit(session):
+            if session.info.pop(key, None) and self._open:
+                self.wake()
+
+        def after_rollback(session, previous_transaction):
+            session.info.pop(key, None)
+
+        event.listen(Session, 'after_flush', after_flush)
+        event.listen(Session, 'after_commit', after_commit)
+        event.listen(Session, 'after_soft_rollback', after_rollback)
+        return self
+
+
+def format_event(name, data, event_id=None):
+    """One Server-Sent Events message"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {name}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def event_stream(hub, subscription, missed, unread, heartbeat=20, lifetime=60):
+    """
+    Body of a notification stream
+
+    Sends the unread count, then notifications missed since the client's
+    Last-Event-ID, then new ones as they arrive, with a comment line every
+    heartbeat seconds so proxies keep the connection open and a dropped
+    client is noticed. The stream ends after lifetime seconds and the
+    browser reconnects, so no connection holds a server thread forever.
+    Nothing here touches the database.
+    """
+    try:
+        yield f'retry: {RECONNECT_MS}\n\n'
+        yield format_event('unread', {'unread': unread})
+        deadline = time.monotonic() + lifetime
+        pending = list(missed)
+        while True:
+            for notification in pending:
+                # A row can come both from the catch-up query and from the hub
+                if notification['id'] > subscription.last_id:
+                    subscription.last_id = notification['id']
+                    yield format_event('notification', notification, notification['id'])
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            pending = subscription.get(min(heartbeat, remaining))
+            if not pending:
+                yield ': keep-alive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def stream_token(secret_key, user_id):
+    """Signed token naming the user a stream is for; it carries no other rights"""
+    return URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT).dumps(user_id)
+
+
+def stream_user(secret_key, token, max_age):
+    """User id from a stream token, or None if it is forged or older than max_age seconds"""
+    try:
+        return URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT).loads(token, max_age=max_age)
+    except BadSignature:
+        return None
+
+
+def stream_response(hub, user_id, after=None):
+    """
+    Response streaming user_id's notifications from hub; needs an app context
+
+    Notifications after the id after (the client's Last-Event-ID) are
+    replayed first. Returns 503 when the hub has no room for another stream.
+    """
+    subscription = hub.subscribe(user_id)
+    if subscription is None:
+        # Pages keep the count they were rendered with
+        return jsonify({'error': 'Too many open streams'}), 503, {'Retry-After': '30'}
+    
+    try:
+        missed = []
+        if after:
+            subscription.last_id = after
+            missed = [
+                notification_dict(notification) for notification in
+                Notification.query.filter(Notification.user_id == user_id, Notification.id > after)
+                .order_by(Notification.id).limit(MAX_MISSED).all()
+            ]
+        unread = hub.counts.get(user_id)
+    except Exception:
+        hub.unsubscribe(subscription)
+        raise
+    
+    # The database session is released when the view returns; the stream only waits on the hub
+    response = Response(
+        event_stream(hub, subscription, missed, unread,
+                     heartbeat=AdoptionSystemConfig.NOTIFICATION_HEARTBEAT,
+                     lifetime=AdoptionSystemConfig.NOTIFICATION_STREAM_LIFETIME),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx would otherwise buffer the stream
+    return response
+
+
+unread_counts = UnreadCounts(ttl=AdoptionSystemConfig.UNREAD_COUNT_TTL).watch()
+notification_hub = NotificationHub(
+    unread_counts,
+    poll_interval=AdoptionSystemConfig.NOTIFICATION_POLL_INTERVAL,
+    max_streams=AdoptionSystemConfig.NOTIFICATION_MAX_STREAMS
+).watch()
@@ -0,0 +1,74 @@
+"""
+Password hashing with configurable parameters, off the request thread
+New hashes use PASSWORD_HASH_METHOD (any Werkzeug method string, e.g.
+'scrypt:32768:8:1' or 'pbkdf2:sha256:600000') and PASSWORD_SALT_LENGTH.
+Hashing and checks run in a small per-process pool of PASSWORD_HASH_WORKERS
+threads (or processes with PASSWORD_HASH_POOL=process), so a login storm
+queues for a few hashing slots instead of every request thread burning CPU
+at once. hashlib releases the GIL while hashing, so pool threads hash in
+parallel. PASSWORD_HASH_WORKERS=0 hashes inline.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import Config
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_method = None
+
+
+def _executor():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A forked server worker builds its own pool
+        if _pool is None or _pool_pid != os.getpid():
+            executor = ProcessPoolExecutor if Config.PASSWORD_HASH_POOL == 'process' else ThreadPoolExecutor
+            _pool = executor(max_workers=Config.PASSWORD_HASH_WORKERS)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(func, *args):
+    if Config.PASSWORD_HASH_WORKERS <= 0:
+        return func(*args)
+    return _executor().submit(func, *args).result()
+
+
+def shutdown():
+    """Stop the pool; the next hash starts a new one with the current settings"""
+    global _pool, _method
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=True)
+        _pool = None
+        _method = None
+
+
+def hash_password(password):
+    """Hash a password with the configured method"""
+    return _run(generate_password_hash, password, Config.PASSWORD_HASH_METHOD, Config.PASSWORD_SALT_LENGTH)
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash of any supported method"""
+    return _run(check_password_hash, password_hash, password)
+
+
+def current_method():
+    """The full method string new hashes get, e.g. 'scrypt:32768:8:1'"""
+    global _method
+    if _method is None:
+        # Werkzeug fills in default parameters, so ask it rather than parse
+        _method = generate_password_hash('', Config.PASSWORD_HASH_METHOD, 1).split('$', 1)[0]
+    return _method
+
+
+def needs_rehash(password_hash):
+    """Whether a stored hash was made with other parameters than the configured ones"""
+    parts = password_hash.split('$')
+    return len(parts) != 3 or parts[0] != current_method() or len(parts[1]) != Config.PASSWORD_SALT_LENGTH
@@ -0,0 +1,118 @@
+"""
+Per-process cache of users for Flask-Login
+The column values of recently seen users are kept in a bounded LRU, so the
+user loader can rebuild current_user without querying the users table. The
+rebuilt User is attached to the session as if it had just been loaded, so
+routes can still change and commit it and lazy-load its relationships.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from adoption_system.models import User, db
+from config import AdoptionSystemConfig
+
+
+class UserCache:
+    """
+    Bounded id -> column values cache for User
+
+    An entry is dropped when a commit adds, changes or deletes that user
+    (profile edits, password and role changes, logins). Other processes
+    only see such a change once their entry is ttl seconds old.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+        self._entries = OrderedDict()  # user id -> (loaded_at, values)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, user_id):
+        """The User for user_id, from the cache when possible"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and now - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                values = entry[1]
+            else:
+                values = None
+                self.misses += 1
+            generation = self._generation
+
+        if values is not None:
+            return self._attach(user_id, values)
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        values = {column: getattr(user, column) for column in self._columns}
+        with self._lock:
+            # Skip storing if a commit invalidated users while this one was read
+            if generation == self._generation and self.ttl > 0:
+                self._entries[user_id] = (now, values)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return user
+
+    def _attach(self, user_id, values):
+        """A persistent User built from cached values, without a query"""
+        session = db.session
+        existing = session.identity_map.get(identity_key(User, user_id))
+        if existing is not None:
+            return existing
+        user = User(**values)
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def watch(self):
+        """Drop users from the cache when a commit adds, changes or deletes them"""
+        key = (type(self).__name__, id(self))
+
+        def after_flush(session, flush_context):
+            changed = session.info.setdefault(key, set())
+            for obj in list(session.dirty) + list(session.deleted):
+                if isinstance(obj, User) and obj.id is not None:
+                    changed.add(obj.id)
+
+        def after_commit(session):
+            changed = session.info.pop(key, None)
+            if changed:
+                self.invalidate(*changed)
+
+        def after_rollback(session, previous_transaction):
+            session.info.pop(key, None)
+
+        event.listen(Session, 'after_flush', after_flush)
+        event.listen(Session, 'after_commit', after_commit)
+        event.listen(Session, 'after_soft_rollback', after_rollback)
+        return self
+
+
+user_cache = UserCache(
+    maxsize=AdoptionSystemConfig.USER_CACHE_SIZE,
+    ttl=AdoptionSystemConfig.USER_CACHE_TTL
+).watch()
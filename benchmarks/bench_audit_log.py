@@ -0,0 +1,144 @@
+"""
+Benchmark sync vs buffered activity-log writes under bulk status updates
+Runs the same stream of PUT /api/update-status/ calls against a throwaway
+SQLite shelter database in each AUDIT_LOG_MODE and reports request latency
+and write amplification: statements and commits per update, and log INSERT
+statements per log entry.
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ['available', 'pending', 'available', 'adopted']
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def make_config(mode, data_dir, batch_size, interval):
+    from config import ShelterSystemConfig
+    return type(f'{mode.title()}Config', (ShelterSystemConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{data_dir}/shelter_{mode}.db',
+        'AUDIT_LOG_MODE': mode,
+        'AUDIT_LOG_BATCH_SIZE': batch_size,
+        'AUDIT_LOG_FLUSH_INTERVAL': interval,
+        'AUDIT_LOG_SPOOL': os.path.join(data_dir, f'spool_{mode}.jsonl'),
+    })
+
+
+def seed(db, Pet, count):
+    db.create_all()
+    db.session.execute(Pet.__table__.insert(), [
+        {'name': f'Pet {i}', 'species': random.choice(['dog', 'cat']), 'status': 'available'}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def count_writes(engine):
+    """Counter of write statements (and rows) and commits on engine"""
+    from sqlalchemy import event
+    counts = Counter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(' ', 1)[0].upper()
+        if verb in ('INSERT', 'UPDATE', 'DELETE'):
+            table = 'shelter_logs' if 'shelter_logs' in statement else 'other'
+            counts[f'{verb} {table}'] += 1
+            counts[f'rows {table}'] += len(parameters) if executemany else 1
+
+    def commit(conn):
+        counts['commits'] += 1
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'commit', commit)
+    return counts
+
+
+def run(mode, args, data_dir):
+    from shelter_system.factory import create_app
+    from shelter_system.models import Pet, ShelterLog, db
+    from shelter_system.utils.audit_log import audit_log
+
+    app = create_app(make_config(mode, data_dir, args.batch_size, args.interval))
+    with app.app_context():
+        seed(db, Pet, args.pets)
+        counts = count_writes(db.engine)
+
+    rng = random.Random(3)
+    plan = [(rng.randint(1, args.pets), STATUSES[i % len(STATUSES)]) for i in range(args.updates)]
+    timings = []
+    timings_lock = threading.Lock()
+
+    def worker(chunk):
+        client = app.test_client()
+        local = []
+        for pet_id, status in chunk:
+            start = time.perf_counter()
+            response = client.put('/api/update-status/', json={'pet_id': pet_id, 'status': status})
+            local.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+        with timings_lock:
+            timings.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(plan[i::args.threads],)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    audit_log.flush()  # what is still buffered is written at shutdown
+
+    with app.app_context():
+        logged = ShelterLog.query.count()
+    timings.sort()
+    return {
+        'mode': mode,
+        'rps': len(timings) / elapsed,
+        'p50': statistics.median(timings),
+        'p95': percentile(timings, 0.95),
+        'p99': percentile(timings, 0.99),
+        'logged': logged,
+        'statements': sum(value for key, value in counts.items() if key.split(' ')[0] in ('INSERT', 'UPDATE', 'DELETE')) / args.updates,
+        'commits': counts['commits'] / args.updates,
+        'log_inserts': counts['INSERT shelter_logs'] / max(counts['rows shelter_logs'], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pets', type=int, default=500)
+    parser.add_argument('--updates', type=int, default=3000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=2.0, help='buffered flush interval (seconds)')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='pet_audit_')
+    # Keep the app's other writable paths out of the working tree
+    os.environ.setdefault('UPLOAD_FOLDER', os.path.join(data_dir, 'uploads'))
+    os.environ.setdefault('CACHE_DIR', os.path.join(data_dir, 'cache'))
+
+    results = [run(mode, args, data_dir) for mode in ('sync', 'buffered')]
+
+    print(f"{args.updates} status updates on {args.pets} pets, {args.threads} thread(s), "
+          f"batch {args.batch_size}, flush every {args.interval}s\n")
+    print(f"{'mode':<10}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'writes/upd':>12}{'commits/upd':>13}{'log INSERTs/entry':>19}{'logged':>8}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['rps']:>8.0f}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}"
+              f"{r['statements']:>12.2f}{r['commits']:>13.2f}{r['log_inserts']:>19.3f}{r['logged']:>8}")
+
+
+if __name__ == '__main__':
+    main()
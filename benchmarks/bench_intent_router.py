@@ -0,0 +1,234 @@
+"""
+Benchmark the compiled chatbot intent routers
+Compares the compiled routers against the hand-written if-chains the
+chatbots used before them (classification and slot extraction only) over a
+corpus of sample chatbot queries
+"""
+import sys
+import os
+import re
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shelter_system.routes import chatbot as shelter_chatbot
+from veterinary_system.routes import chatbot as vet_chatbot
+from adoption_system.routes import chatbot as adoption_chatbot
+
+SAMPLE_QUERIES = [
+    "hello",
+    "hi there, what can you do?",
+    "help",
+    "how many pets do we have?",
+    "how many dogs are in the shelter",
+    "total cats please",
+    "shelter statistics",
+    "show me available dogs",
+    "which cats are ready for adoption",
+    "any available puppies?",
+    "kittens for adoption",
+    "pending pets",
+    "adopted pets this month",
+    "which pets found home recently",
+    "find max",
+    "show me golden retrievers",
+    "looking for a siberian husky",
+    "how many pets are vaccinated",
+    "are the pets microchipped",
+    "spayed or neutered pets",
+    "recent activity",
+    "latest shelter activity log",
+    "pets good with kids",
+    "family friendly pets for children",
+    "how many health records?",
+    "show recent records",
+    "find record for pet 12",
+    "today's appointments",
+    "upcoming appointments",
+    "past appointments",
+    "show vets",
+    "list available vets",
+    "tell me about pet 7",
+    "how does adoption work?",
+    "adoption steps",
+    "check health status for pet 3",
+    "dogs for adoption",
+    "can you tell me something about this shelter which i visited yesterday",
+    "i would like to understand the costs involved in bringing home a new companion animal",
+    "xyz",
+]
+
+
+# The classification half of each bot's process_query before the router:
+# the same if-chains, in the same order, with the same slot extraction, and
+# the database and HTTP calls left out
+
+def legacy_shelter(message):
+    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
+        return 'greeting', {}
+    if 'help' in message or 'what can you do' in message:
+        return 'help', {}
+    if 'how many' in message or 'total' in message or 'statistics' in message or 'stats' in message:
+        if 'dog' in message:
+            return 'stats', {'species': 'dog'}
+        elif 'cat' in message:
+            return 'stats', {'species': 'cat'}
+        return 'stats', {}
+    if 'available' in message or 'ready for adoption' in message:
+        if 'dog' in message:
+            return 'available', {'species': 'dog'}
+        elif 'cat' in message:
+            return 'available', {'species': 'cat'}
+        return 'available', {}
+    if 'pending' in message:
+        return 'pending', {}
+    if 'adopted' in message or 'found home' in message:
+        return 'adopted', {}
+    if 'find' in message or 'search' in message or 'show me' in message or 'looking for' in message:
+        words = message.split()
+        search_term = None
+        for i, word in enumerate(words):
+            if word in ['find', 'search', 'show', 'looking', 'for', 'me']:
+                if i + 1 < len(words):
+                    search_term = words[i + 1].title()
+                    break
+        return 'search', {'term': search_term} if search_term else {}
+    if 'vaccinated' in message or 'vaccination' in message:
+        return 'vaccinated', {}
+    if 'microchip' in message:
+        return 'microchipped', {}
+    if 'spay' in message or 'neuter' in message:
+        return 'spayed_neutered', {}
+    if 'recent' in message or 'latest' in message or 'activity' in message:
+        return 'activity', {}
+    if 'kid' in message or 'children' in message:
+        return 'kids', {}
+    return None, {}
+
+
+def legacy_veterinary(message):
+    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
+        return 'greeting', {}
+    if 'help' in message or 'what can you do' in message:
+        return 'help', {}
+    if 'how many' in message or 'total' in message or 'statistics' in message or 'stats' in message:
+        if 'record' in message:
+            return 'stats', {'topic': 'record'}
+        elif 'appointment' in message:
+            return 'stats', {'topic': 'appointment'}
+        elif 'vet' in message:
+            return 'stats', {'topic': 'vet'}
+        return 'stats', {}
+    if 'health' in message or 'record' in message:
+        if 'recent' in message or 'latest' in message:
+            return 'records', {'when': 'recent'}
+        return 'records', {}
+    if 'appointment' in message:
+        if 'today' in message:
+            return 'appointments', {'when': 'today'}
+        elif 'upcoming' in message or 'future' in message or 'scheduled' in message:
+            return 'appointments', {'when': 'upcoming'}
+        elif 'past' in message or 'completed' in message:
+            return 'appointments', {'when': 'past'}
+        return 'appointments', {}
+    if 'vet' in message and 'veterinarian' not in message.lower():
+        if 'available' in message or 'list' in message or 'show' in message:
+            return 'vets', {'listing': True}
+        return 'vets', {}
+    if 'pet' in message and any(char.isdigit() for char in message):
+        pet_id_match = re.search(r'\d+', message)
+        if pet_id_match:
+            return 'pet_record', {'pet_id': int(pet_id_match.group())}
+    return None, {}
+
+
+def legacy_adoption(message):
+    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
+        return 'greeting', {}
+    if 'help' in message or 'what can you do' in message:
+        return 'help', {}
+    if 'adopt' in message and ('how' in message or 'process' in message or 'steps' in message or 'work' in message):
+        return 'process', {}
+    if 'available' in message or 'adoption' in message or 'find pet' in message:
+        if 'dog' in message:
+            return 'available', {'species': 'dog'}
+        elif 'cat' in message:
+            return 'available', {'species': 'cat'}
+        elif 'puppy' in message or 'puppies' in message:
+            return 'available', {'species': 'dog', 'young': True}
+        elif 'kitten' in message:
+            return 'available', {'species': 'cat', 'young': True}
+        return 'available', {}
+    if 'how many' in message or 'statistics' in message or 'stats' in message:
+        return 'stats', {}
+    if 'health' in message:
+        pet_id_match = re.search(r'\d+', message)
+        return 'health', {'pet_id': int(pet_id_match.group())} if pet_id_match else {}
+    if 'kid' in message or 'children' in message or 'family' in message:
+        return 'kids', {}
+    if 'find' in message or 'search' in message or 'show me' in message:
+        words = message.split()
+        search_term = None
+        for i, word in enumerate(words):
+            if word in ['find', 'search', 'show', 'me']:
+                if i + 1 < len(words) and words[i + 1] not in ['pet', 'pets', 'dog', 'cat']:
+                    search_term = words[i + 1].title()
+                    break
+        return 'search', {'term': search_term} if search_term else {}
+    return None, {}
+
+
+def time_calls(func, queries, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            func(query)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(queries)) * 1e6
+
+
+def best_of(repeats, *timers):
+    """Fastest of repeats rounds for each timer, run interleaved so noise hits both alike"""
+    best = [float('inf')] * len(timers)
+    for _ in range(repeats):
+        for i, timer in enumerate(timers):
+            best[i] = min(best[i], timer())
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=5, help='report the fastest of this many rounds')
+    parser.add_argument('--show', action='store_true', help='print the intent chosen for every query')
+    args = parser.parse_args()
+
+    routers = [
+        ('shelter', shelter_chatbot.router, legacy_shelter),
+        ('veterinary', vet_chatbot.router, legacy_veterinary),
+        ('adoption', adoption_chatbot.router, legacy_adoption),
+    ]
+
+    print(f"{len(SAMPLE_QUERIES)} queries x {args.iterations} iterations")
+    print(f"{'system':<12}{'router us/msg':>18}{'if-chain us/msg':>18}{'intent changes':>16}")
+
+    for name, router, legacy in routers:
+        router.compile()
+        router_us, legacy_us = best_of(
+            args.repeats,
+            lambda: time_calls(router.route, SAMPLE_QUERIES, args.iterations),
+            lambda: time_calls(legacy, SAMPLE_QUERIES, args.iterations),
+        )
+        # Intended: whole-word keywords and the reordered vet pet-id intent
+        changes = [q for q in SAMPLE_QUERIES if router.route(q).intent != legacy(q)[0]]
+        print(f"{name:<12}{router_us:>18.2f}{legacy_us:>18.2f}{len(changes):>16}")
+
+        if args.show:
+            for query in SAMPLE_QUERIES:
+                match = router.route(query)
+                print(f"    {query!r:<70} -> {match.intent} {match.slots}  (if-chain: {legacy(query)})")
+
+
+if __name__ == '__main__':
+    main()
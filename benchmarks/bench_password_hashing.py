@@ -0,0 +1,117 @@
+"""
+Benchmark login throughput per worker for password hashing settings
+For each hash method and pool size, a storm of concurrent logins hits one
+adoption app (one server worker) while a probe keeps requesting a light
+page. Reports logins/sec, login latency and the probe's latency, which shows
+how much the storm slows everything else down.
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def seed_users(app, count):
+    from adoption_system.models import User, db
+    from adoption_system.utils.passwords import hash_password
+    password = hash_password('benchmark')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([
+            User(name=f'User {i}', email=f'user{i}@example.com', password=password, role='adopter')
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+def storm(app, logins, concurrency):
+    """(login timings, probe timings, elapsed seconds)"""
+    login_timings, probe_timings = [], []
+    lock = threading.Lock()
+    done = threading.Event()
+    counter = iter(range(logins))
+
+    def login_worker():
+        local = []
+        for i in counter:
+            client = app.test_client()  # new cookie jar, so every login checks a password
+            start = time.perf_counter()
+            response = client.post('/auth/login', data={'email': f'user{i % 50}@example.com', 'password': 'benchmark'})
+            local.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 302, response.status_code
+        with lock:
+            login_timings.extend(local)
+
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/about')
+            probe_timings.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=login_worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe_thread.join()
+    return login_timings, probe_timings, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--methods', default='scrypt,pbkdf2:sha256:600000,pbkdf2:sha256:100000',
+                        help='comma-separated Werkzeug hash methods')
+    parser.add_argument('--workers', default='0,1,2,4', help='comma-separated pool sizes (0 = inline)')
+    parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='pet_passwords_')
+    os.environ['ADOPTION_DB_URI'] = f'sqlite:///{data_dir}/adoption.db'
+    os.environ['UPLOAD_FOLDER'] = os.path.join(data_dir, 'uploads')
+    os.environ['CACHE_DIR'] = os.path.join(data_dir, 'cache')
+
+    from config import Config
+    from adoption_system.factory import create_app
+    from adoption_system.utils import passwords
+
+    app = create_app()
+    app.config['MAIL_SUPPRESS_SEND'] = True
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, {args.pool} pool, {os.cpu_count()} CPU(s)\n")
+    print(f"{'method':<24}{'workers':>8}{'logins/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'probe p50':>11}{'probe p95':>11}")
+    for method in args.methods.split(','):
+        for workers in (int(value) for value in args.workers.split(',')):
+            Config.PASSWORD_HASH_METHOD = method
+            Config.PASSWORD_HASH_POOL = args.pool
+            Config.PASSWORD_HASH_WORKERS = workers
+            passwords.shutdown()
+            seed_users(app, 50)
+            login_timings, probe_timings, elapsed = storm(app, args.logins, args.concurrency)
+            print(f"{method:<24}{workers:>8}{len(login_timings) / elapsed:>10.1f}"
+                  f"{statistics.median(login_timings):>9.1f}{percentile(login_timings, 0.95):>9.1f}"
+                  f"{statistics.median(probe_timings):>11.1f}{percentile(probe_timings, 0.95):>11.1f}")
+    passwords.shutdown()
+
+
+if __name__ == '__main__':
+    main()
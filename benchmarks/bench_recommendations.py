@@ -0,0 +1,99 @@
+"""
+Benchmark the adopter-to-pet matching engine
+Encodes synthetic available pets into the feature matrix and times ranking
+for a few adopter profiles against a 50ms budget, with a plain Python loop
+over the same weights for comparison
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adoption_system.utils.matching import (
+    MatchingEngine, build_profile, profile_weights, GRADED_FEATURES
+)
+
+PROFILES = [
+    ('apartment, first pet', build_profile('Apartment', False, 'none', 'first time owner')),
+    ('house, yard, kids, cat', build_profile('House', True, 'one cat', 'grew up with dogs', has_kids=True)),
+    ('condo, experienced, dog', build_profile('Condo', False, 'a small dog', 'experienced foster')),
+]
+
+
+def synthetic_columns(count, seed=7):
+    rng = random.Random(seed)
+    levels = ['Low', 'Medium', 'High', None]
+    return {
+        'id': list(range(1, count + 1)),
+        'species': [rng.choice(['dog', 'cat']) for _ in range(count)],
+        'age': [rng.randint(0, 15) for _ in range(count)],
+        'size': [rng.choice(['small', 'Medium', 'large', None]) for _ in range(count)],
+        'energy_level': [rng.choice(levels) for _ in range(count)],
+        'shedding': [rng.choice(['None', 'Low', 'Medium', 'Heavy', 'Very Heavy']) for _ in range(count)],
+        'trainability': [rng.choice(levels) for _ in range(count)],
+        'good_with_kids': [rng.random() < 0.6 for _ in range(count)],
+        'good_with_pets': [rng.random() < 0.6 for _ in range(count)],
+        'good_with_dogs': [rng.choice([True, False, None]) for _ in range(count)],
+        'good_with_cats': [rng.random() < 0.4 for _ in range(count)],
+        'special_needs': [rng.random() < 0.05 for _ in range(count)],
+    }
+
+
+def python_rank(rows, ids, profile, limit):
+    """Score row by row, as a per-request loop over the inventory would"""
+    ideal, fit, conflicts = [w.tolist() for w in profile_weights(profile)]
+    graded = len(GRADED_FEATURES)
+    worst = sum(fit) + sum(conflicts)
+    scored = []
+    for pet_id, row in zip(ids, rows):
+        penalty = sum(abs(row[i] - ideal[i]) * fit[i] for i in range(graded))
+        penalty += sum(row[graded + i] * conflicts[i] for i in range(len(conflicts)))
+        scored.append((100.0 * (1.0 - penalty / worst), pet_id))
+    scored.sort(reverse=True)
+    return [pet_id for _, pet_id in scored[:limit]]
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pets', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.pets)
+    start = time.perf_counter()
+    engine = MatchingEngine.from_columns(columns)
+    print(f"encoded {len(engine)} pets x {engine.matrix.shape[1]} features "
+          f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    rows = engine.matrix.tolist()
+    ids = engine.ids.tolist()
+
+    print(f"\n{'profile':<26}{'numpy ms':>10}{'python ms':>11}{'budget':>8}")
+    failed = False
+    for name, profile in PROFILES:
+        numpy_ms, ranked = best_of(lambda: engine.rank(profile, limit=args.limit), args.repeat)
+        python_ms, _ = best_of(lambda: python_rank(rows, ids, profile, args.limit), 1)
+        ok = numpy_ms <= args.budget_ms
+        failed = failed or not ok
+        print(f"{name:<26}{numpy_ms:>10.2f}{python_ms:>11.0f}{'ok' if ok else 'OVER':>8}")
+        print(f"    top: {[(pet_id, score) for pet_id, score, _ in ranked[:5]]}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
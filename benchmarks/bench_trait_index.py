@@ -0,0 +1,135 @@
+"""
+Benchmark the trait bitmap index against SQL
+Seeds a throwaway SQLite shelter database with synthetic pets, then answers
+the same trait combinations (count + first page of ids) both ways
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    ('vaccinated', {'vaccinated': True}),
+    ('kids+cats+small', {'good_with_kids': True, 'good_with_cats': True, 'size': 'small'}),
+    ('dog, low or medium energy', {'species': 'dog', 'energy_level': ['low', 'medium'], 'microchipped': True}),
+    ('easy keeper OR trained', [
+        {'shedding': 'low', 'energy_level': 'low'},
+        {'trainability': 'high', 'spayed_neutered': True},
+    ]),
+    ('all medical, not large', {
+        'vaccinated': True, 'spayed_neutered': True, 'microchipped': True,
+        'not': {'size': 'large'},
+    }),
+]
+
+LEVELS = ['Low', 'Medium', 'High']
+
+
+def sql_filter(Pet, db, query):
+    """Translate an index query into the equivalent SQL condition"""
+    from shelter_system.utils.trait_index import BOOLEAN_TRAITS
+
+    if isinstance(query, list):
+        return db.or_(*[sql_filter(Pet, db, sub) for sub in query])
+
+    conditions = []
+    for field, value in query.items():
+        if field == 'any':
+            conditions.append(sql_filter(Pet, db, list(value)))
+        elif field == 'not':
+            conditions.append(db.not_(sql_filter(Pet, db, value)))
+        else:
+            column = getattr(Pet, field)
+            values = value if isinstance(value, (list, tuple)) else [value]
+            if field in BOOLEAN_TRAITS:
+                conditions.append(column.in_(values))
+            else:
+                conditions.append(db.func.lower(column).in_([v.lower() for v in values]))
+    return db.and_(*conditions)
+
+
+def seed(db, Pet, count, batch=20000):
+    rng = random.Random(42)
+    table = Pet.__table__
+    for start in range(0, count, batch):
+        rows = []
+        for _ in range(min(batch, count - start)):
+            rows.append({
+                'name': 'Pet', 'species': rng.choice(['dog', 'cat']),
+                'status': rng.choices(['available', 'pending', 'adopted'], [6, 1, 3])[0],
+                'size': rng.choice(['Small', 'medium', 'Large']),
+                'gender': rng.choice(['male', 'female']),
+                'energy_level': rng.choice(['low', 'medium', 'high']),
+                'shedding': rng.choice(LEVELS), 'trainability': rng.choice(LEVELS),
+                'vaccinated': rng.random() < 0.7, 'spayed_neutered': rng.random() < 0.5,
+                'microchipped': rng.random() < 0.4, 'good_with_kids': rng.random() < 0.6,
+                'good_with_pets': rng.random() < 0.6, 'good_with_dogs': rng.random() < 0.5,
+                'good_with_cats': rng.random() < 0.4,
+            })
+        db.session.execute(table.insert(), rows)
+    db.session.commit()
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pets', type=int, default=1_000_000)
+    parser.add_argument('--per-page', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='trait_index_')
+    os.environ['SHELTER_DB_URI'] = f"sqlite:///{os.path.join(workdir, 'shelter.db')}"
+
+    from shelter_system.app import app
+    from shelter_system.extensions import db
+    from shelter_system.models import Pet
+    from shelter_system.utils.trait_index import TraitIndex, INDEXED_COLUMNS
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(db, Pet, args.pets)
+        print(f"seeded {args.pets} pets in {time.perf_counter() - start:.1f}s ({workdir})")
+
+        index = TraitIndex(Pet)
+        start = time.perf_counter()
+        index.rebuild()
+        print(f"index built in {time.perf_counter() - start:.2f}s, "
+              f"{len(index._bitmaps)} bitmaps, {index.count(index._available)} available pets")
+
+        columns = [getattr(Pet, column) for column in INDEXED_COLUMNS]
+        row = Pet.query.with_entities(*columns).filter_by(id=args.pets // 2).one()
+        start = time.perf_counter()
+        index.update(row[0], dict(zip(INDEXED_COLUMNS, row)))
+        print(f"single pet update {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        print(f"\n{'query':<28}{'matches':>10}{'sql ms':>10}{'index ms':>10}{'speedup':>10}")
+        for name, query in QUERIES:
+            def run_sql():
+                base = Pet.query.filter(Pet.status == 'available', sql_filter(Pet, db, query))
+                total = base.count()
+                ids = [row[0] for row in base.with_entities(Pet.id)
+                       .order_by(Pet.id.desc()).limit(args.per_page)]
+                return {'ids': ids, 'total': total}
+
+            sql_ms, expected = best_of(run_sql, args.repeat)
+            index_ms, result = best_of(lambda: index.search(query, 1, args.per_page), args.repeat)
+            assert result == expected, (name, result, expected)
+            print(f"{name:<28}{result['total']:>10}{sql_ms:>10.1f}{index_ms:>10.2f}{sql_ms / index_ms:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark adoption -> shelter calls over loopback HTTP vs in-process
+Serves a seeded shelter app on a local port and times the same APIClient
+calls twice: once over HTTP, as separate services do, and once through the
+in-process transport used in co-located mode
+"""
+import sys
+import os
+import time
+import logging
+import random
+import argparse
+import tempfile
+import statistics
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure_environment(port):
+    data_dir = tempfile.mkdtemp(prefix='pet_transport_')
+    os.environ['SHELTER_SYSTEM_URL'] = f'http://127.0.0.1:{port}'
+    os.environ['SHELTER_DB_URI'] = f'sqlite:///{data_dir}/shelter.db'
+    os.environ['ADOPTION_DB_URI'] = f'sqlite:///{data_dir}/adoption.db'
+    os.environ['UPLOAD_FOLDER'] = os.path.join(data_dir, 'uploads')
+    os.environ['CACHE_DIR'] = os.path.join(data_dir, 'cache')
+
+
+def seed(app, count, seed_value=7):
+    from shelter_system.models import Pet
+    rng = random.Random(seed_value)
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        db.create_all()
+        for i in range(count):
+            species = rng.choice(['dog', 'cat'])
+            db.session.add(Pet(
+                name=f'Pet {i}', species=species, breed=rng.choice(['beagle', 'poodle', 'Siamese']),
+                age=rng.randint(0, 14), gender=rng.choice(['male', 'female']),
+                size=rng.choice(['small', 'medium', 'large']), description='Friendly.',
+            ))
+        db.session.commit()
+        return [pet_id for (pet_id,) in db.session.query(Pet.id)]
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pets', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=300)
+    parser.add_argument('--port', type=int, default=5199)
+    args = parser.parse_args()
+
+    # Config reads the environment on import, so set it up first
+    configure_environment(args.port)
+    from werkzeug.serving import make_server
+    from config import Config
+    from common.inprocess import transport
+    from shelter_system.factory import create_app
+    from adoption_system.utils import api_client
+
+    app = create_app()
+    pet_ids = seed(app, args.pets)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rng = random.Random(1)
+    calls = [
+        ('pet detail', lambda: api_client.get_pet_details_from_shelter(rng.choice(pet_ids))),
+        ('pet list (page)', lambda: api_client.get_all_pets_from_shelter(species='dog')),
+        ('facets', lambda: api_client.get_pet_facets_from_shelter(species='all')),
+        ('similar pets', lambda: api_client.get_similar_pets_from_shelter(rng.choice(pet_ids))),
+    ]
+
+    print(f"{'call':<18}{'http p50':>10}{'http p95':>10}{'local p50':>11}{'local p95':>11}{'speedup':>9}")
+    for name, call in calls:
+        call()  # warm caches and connections
+        transport.unmount_all()
+        http_p50, http_p95 = measure(call, args.repeat)
+        transport.mount(Config.SHELTER_SYSTEM_URL, app)
+        call()
+        local_p50, local_p95 = measure(call, args.repeat)
+        transport.unmount_all()
+        print(f"{name:<18}{http_p50:>10.2f}{http_p95:>10.2f}{local_p50:>11.2f}{local_p95:>11.2f}"
+              f"{http_p50 / local_p50:>8.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Local stand-in for the Google Calendar API
+Implements the parts the veterinary system uses: events insert, get, update,
+delete and list (with showDeleted, paging and sync tokens) and the
+batch/calendar/v3 endpoint. Events are kept in memory. Point
+GOOGLE_CALENDAR_API_ENDPOINT at it (e.g. http://127.0.0.1:8095/) and the
+discovery client talks to it instead of googleapis.com; no credentials are
+checked.
+
+Run with:
+    python benchmarks/calendar_standin.py --port 8095
+"""
+import re
+import uuid
+import argparse
+import threading
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+
+from flask import Flask, request, jsonify, Response
+
+EVENTS = '/calendar/v3/calendars/<calendar_id>/events'
+
+
+class CalendarStore:
+    """Events per calendar, each stamped with the change sequence that last touched it"""
+
+    def __init__(self):
+        self.calendars = {}  # calendar id -> {event id: event}
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def events(self, calendar_id):
+        return self.calendars.setdefault(calendar_id, {})
+
+    def save(self, calendar_id, event):
+        with self.lock:
+            self.sequence += 1
+            event['_sequence'] = self.sequence
+            event['updated'] = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+            self.events(calendar_id)[event['id']] = event
+            return event
+
+
+def public(event):
+    return {key: value for key, value in event.items() if not key.startswith('_')}
+
+
+def api_error(code, message):
+    return jsonify({'error': {'code': code, 'message': message, 'errors': [{'reason': message}]}}), code
+
+
+def create_standin(store=None):
+    """Flask app serving the Calendar API over store (a new CalendarStore by default)"""
+    app = Flask(__name__)
+    app.store = store = store or CalendarStore()
+
+    @app.route(EVENTS, methods=['POST'])
+    def insert_event(calendar_id):
+        body = request.get_json(force=True)
+        body.update({'id': uuid.uuid4().hex, 'status': 'confirmed', 'kind': 'calendar#event'})
+        return jsonify(public(store.save(calendar_id, body)))
+
+    @app.route(EVENTS + '/<event_id>', methods=['GET'])
+    def get_event(calendar_id, event_id):
+        event = store.events(calendar_id).get(event_id)
+        if event is None:
+            return api_error(404, 'notFound')
+        return jsonify(public(event))
+
+    @app.route(EVENTS + '/<event_id>', methods=['PUT'])
+    def update_event(calendar_id, event_id):
+        event = store.events(calendar_id).get(event_id)
+        if event is None:
+            return api_error(404, 'notFound')
+        if event['status'] == 'cancelled':
+            return api_error(410, 'deleted')
+        body = request.get_json(force=True)
+        body.update({'id': event_id, 'status': body.get('status', 'confirmed'), 'kind': 'calendar#event'})
+        return jsonify(public(store.save(calendar_id, body)))
+
+    @app.route(EVENTS + '/<event_id>', methods=['DELETE'])
+    def delete_event(calendar_id, event_id):
+        event = store.events(calendar_id).get(event_id)
+        if event is None:
+            return api_error(404, 'notFound')
+        if event['status'] == 'cancelled':
+            return api_error(410, 'deleted')
+        # Deleted events stay listed (as cancelled) for incremental sync
+        store.save(calendar_id, {**event, 'status': 'cancelled'})
+        return '', 204
+
+    @app.route(EVENTS, methods=['GET'])
+    def list_events(calendar_id):
+        sync_token = request.args.get('syncToken')
+        show_deleted = request.args.get('showDeleted') == 'true' or bool(sync_token)
+        offset = int(request.args.get('pageToken') or 0)
+        limit = int(request.args.get('maxResults') or 250)
+        with store.lock:
+            if sync_token is not None and not sync_token.isdecimal():
+                return api_error(410, 'fullSyncRequired')
+            since = int(sync_token or 0)
+            events = sorted(
+                (event for event in store.events(calendar_id).values()
+                 if event['_sequence'] > since and (show_deleted or event['status'] != 'cancelled')),
+                key=lambda event: event['_sequence']
+            )
+            sequence = store.sequence
+        page = events[offset:offset + limit]
+        result = {'kind': 'calendar#events', 'items': [public(event) for event in page]}
+        if offset + limit < len(events):
+            result['nextPageToken'] = str(offset + limit)
+        else:
+            result['nextSyncToken'] = str(sequence)
+        return jsonify(result)
+
+    @app.route('/batch/calendar/v3', methods=['POST'])
+    def batch():
+        """Run each application/http part against this app and answer multipart/mixed"""
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode() + request.get_data()
+        )
+        client = app.test_client()
+        boundary = f'batch_{uuid.uuid4().hex}'
+        parts = []
+        for part in message.iter_parts():
+            # The client separates the embedded request's lines with bare newlines
+            head, body = re.split(rb'\r?\n\r?\n', part.get_payload(decode=True), maxsplit=1)
+            request_line, *header_lines = head.decode().splitlines()
+            method, uri, _ = request_line.split(' ', 2)
+            headers = dict(line.split(': ', 1) for line in header_lines if line)
+            inner = client.open(uri, method=method, data=body, content_type=headers.get('Content-Type'))
+            content_id = part['Content-ID'].strip('<>')
+            parts.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {inner.status}\r\nContent-Type: application/json\r\n\r\n'
+                f'{inner.get_data(as_text=True)}\r\n'
+            )
+        return Response(''.join(parts) + f'--{boundary}--\r\n',
+                        content_type=f'multipart/mixed; boundary={boundary}')
+
+    return app
+
+
+def serve(app, port):
+    """Serve app on 127.0.0.1:port from a daemon thread; returns the server"""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='calendar-standin', daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8095)
+    args = parser.parse_args()
+    create_standin().run(host='127.0.0.1', port=args.port)
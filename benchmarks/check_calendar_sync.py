@@ -0,0 +1,163 @@
+"""
+End-to-end check of the calendar sync against a local Calendar API stand-in
+Boots benchmarks/calendar_standin.py on a local port, points the veterinary
+system at it and a throwaway SQLite database, then runs the real client code:
+flush() pushes created appointments in batches, pull_changes() lists the
+calendar with a sync token and applies reschedules and cancellations made
+there, and a deleted appointment's event is removed on the next flush. It
+also checks that only one worker holds the pull lease and that a change made
+by another worker, not in this process's queue, is not overwritten.
+
+Exits non-zero if any step does not leave the expected state behind.
+
+Run with:
+    python benchmarks/check_calendar_sync.py --appointments 120
+"""
+import sys
+import os
+import logging
+import argparse
+import tempfile
+import requests
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure_environment(port, data_dir):
+    """Point the veterinary system at the stand-in and a throwaway database before config is imported"""
+    os.environ['GOOGLE_CALENDAR_API_ENDPOINT'] = f'http://127.0.0.1:{port}/'
+    os.environ['GOOGLE_CALENDAR_TOKEN_FILE'] = os.path.join(data_dir, 'token.json')
+    os.environ['GOOGLE_CALENDAR_ID'] = 'clinic'
+    os.environ['VETERINARY_DB_URI'] = f'sqlite:///{data_dir}/veterinary.db'
+    # The check drives flush() and pull_changes() itself, without the worker thread
+    os.environ['CALENDAR_SYNC'] = 'False'
+
+
+def check(condition, message):
+    print(f"  {'ok ' if condition else 'FAIL'} {message}")
+    return condition
+
+
+def run(port, count):
+    from benchmarks.calendar_standin import create_standin, serve
+    from veterinary_system.factory import create_app
+    from veterinary_system.models import db, Vet, Appointment
+    from sqlalchemy import update
+    from veterinary_system.utils.calendar_sync import calendar_sync, pull_changes, claim_pull
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    standin = create_standin()
+    server = serve(standin, port)
+    events_url = f'http://127.0.0.1:{port}/calendar/v3/calendars/clinic/events'
+    app = create_app()
+    calendar_sync.watch()
+    passed = True
+
+    with app.app_context():
+        db.create_all()
+        vet = Vet(name='Dr. Check', email='check@example.com', specialization='General')
+        db.session.add(vet)
+        db.session.flush()
+        start = datetime(2030, 1, 7, 9, 0)
+        for i in range(count):
+            db.session.add(Appointment(
+                pet_id=i + 1, pet_name=f'Pet {i}', owner_name=f'Owner {i}',
+                owner_email=f'owner{i}@example.com', vet_id=vet.id,
+                date=start + timedelta(minutes=30 * i), duration=30, reason='Checkup'
+            ))
+        db.session.commit()
+
+        print("Push created appointments")
+        calls = calendar_sync.flush()
+        linked = Appointment.query.filter(Appointment.google_calendar_event_id.isnot(None)).count()
+        events = standin.store.events('clinic')
+        passed &= check(calls == count, f"{calls} calls sent for {count} appointments")
+        passed &= check(linked == count, f"{linked} appointments linked to an event")
+        passed &= check(len(events) == count, f"{len(events)} events in the calendar")
+
+        print("Initial pull")
+        stats = pull_changes()
+        passed &= check(stats['full'] and stats['events'] == count, f"full listing of {stats['events']} events")
+        passed &= check(stats['rescheduled'] == 0 and stats['cancelled'] == 0, "nothing changed by the listing")
+
+        print("Reschedule and cancel in the calendar, then pull")
+        appointments = Appointment.query.order_by(Appointment.id).all()
+        moved, cancelled = appointments[0], appointments[1]
+        new_start = moved.date + timedelta(days=1)
+        body = requests.get(f'{events_url}/{moved.google_calendar_event_id}', timeout=5).json()
+        body['start'] = {'dateTime': new_start.isoformat(), 'timeZone': 'UTC'}
+        body['end'] = {'dateTime': (new_start + timedelta(minutes=45)).isoformat(), 'timeZone': 'UTC'}
+        requests.put(f'{events_url}/{moved.google_calendar_event_id}', json=body, timeout=5).raise_for_status()
+        requests.delete(f'{events_url}/{cancelled.google_calendar_event_id}', timeout=5).raise_for_status()
+        moved_id, cancelled_id = moved.id, cancelled.id
+        db.session.expire_all()
+
+        stats = pull_changes()
+        moved, cancelled = db.session.get(Appointment, moved_id), db.session.get(Appointment, cancelled_id)
+        passed &= check(not stats['full'] and stats['events'] == 2, f"incremental listing of {stats['events']} events")
+        passed &= check(moved.date == new_start and moved.duration == 45, "rescheduled appointment moved")
+        passed &= check(cancelled.status == 'cancelled' and cancelled.google_calendar_event_id is None,
+                        "cancelled appointment unlinked and cancelled")
+        passed &= check(calendar_sync.pending() == 0, "pulled changes not queued to be pushed back")
+
+        print("Delete an appointment, then push")
+        deleted = appointments[2]
+        event_id = deleted.google_calendar_event_id
+        db.session.delete(deleted)
+        db.session.commit()
+        calls = calendar_sync.flush()
+        passed &= check(calls == 1, f"{calls} call sent for the deleted appointment")
+        passed &= check(events[event_id]['status'] == 'cancelled', "its event was deleted")
+
+        print("Pull again")
+        stats = pull_changes()
+        passed &= check(stats['events'] == 1 and stats['unlinked'] == 1,
+                        f"{stats['events']} changed event, {stats['unlinked']} without an appointment")
+
+        print("Reschedule in the calendar while another worker has a newer change queued")
+        other = appointments[3]
+        other_id, other_date = other.id, other.date
+        body = requests.get(f'{events_url}/{other.google_calendar_event_id}', timeout=5).json()
+        body['start'] = {'dateTime': (other_date + timedelta(hours=2)).isoformat(), 'timeZone': 'UTC'}
+        body['end'] = {'dateTime': (other_date + timedelta(hours=2, minutes=30)).isoformat(), 'timeZone': 'UTC'}
+        requests.put(f'{events_url}/{other.google_calendar_event_id}', json=body, timeout=5).raise_for_status()
+        # A bulk update stands in for the other worker: it is not queued here
+        db.session.execute(
+            update(Appointment).where(Appointment.id == other_id)
+            .values(notes='Changed on another worker', updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        stats = pull_changes()
+        db.session.expire_all()
+        passed &= check(stats['skipped'] == 1 and calendar_sync.pending() == 0,
+                        f"{stats['skipped']} event skipped without a local queue entry")
+        passed &= check(db.session.get(Appointment, other_id).date == other_date, "the local change was kept")
+
+        print("Pull lease")
+        passed &= check(claim_pull('worker-a', 60), "first worker takes the lease")
+        passed &= check(claim_pull('worker-a', 60), "and renews it")
+        passed &= check(not claim_pull('worker-b', 60), "second worker does not pull")
+        claim_pull('worker-a', -1)  # renewed into the past, as if worker-a had stopped
+        passed &= check(claim_pull('worker-b', 60), "an expired lease is taken over")
+
+    server.shutdown()
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8095)
+    parser.add_argument('--appointments', type=int, default=120,
+                        help='over 50 to span several batches, over 250 to page the listing')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        configure_environment(args.port, data_dir)
+        passed = run(args.port, args.appointments)
+    print("Calendar sync check passed" if passed else "Calendar sync check FAILED")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Import-time profile and cold-start budget for each app
+Imports an app module in fresh interpreters, as a serverless cold start
+does, and reports the median import time, the packages that account for
+it and the slowest first-party imports. Fails when the median exceeds the
+budget.
+"""
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = {
+    'adoption': 'adoption_system.app',
+    'shelter': 'shelter_system.app',
+    'veterinary': 'veterinary_system.app',
+}
+FIRST_PARTY = ('adoption_system', 'shelter_system', 'veterinary_system', 'common', 'config', 'utils', 'models', 'routes')
+
+TIMER = (
+    "import sys, time\n"
+    "sys.path.insert(0, {root!r})\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "print((time.perf_counter() - started) * 1000)\n"
+)
+
+
+def environment():
+    """Keep the apps away from real databases and caches while importing"""
+    data_dir = tempfile.mkdtemp(prefix='pet_import_')
+    env = dict(os.environ)
+    for name in ('ADOPTION', 'SHELTER', 'VETERINARY'):
+        env[f'{name}_DB_URI'] = f'sqlite:///{data_dir}/{name.lower()}.db'
+    env['UPLOAD_FOLDER'] = os.path.join(data_dir, 'uploads')
+    env['CACHE_DIR'] = os.path.join(data_dir, 'cache')
+    return env
+
+
+def time_import(module, env):
+    """Milliseconds to import module in a new interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', TIMER.format(root=ROOT, module=module)],
+        capture_output=True, text=True, env=env, cwd=tempfile.gettempdir(), check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_tree(module, env):
+    """(self_us, cumulative_us, depth, name) for every module loaded by the import"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import sys; sys.path.insert(0, {ROOT!r}); import {module}"],
+        capture_output=True, text=True, env=env, cwd=tempfile.gettempdir(), check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def report(name, module, runs, top, env):
+    timings = [time_import(module, env) for _ in range(runs)]
+    median = statistics.median(timings)
+    print(f"\n== {name} ({module}) ==")
+    print(f"import: median {median:.0f}ms, min {min(timings):.0f}ms, max {max(timings):.0f}ms over {runs} runs")
+
+    rows = import_tree(module, env)
+    packages = defaultdict(int)
+    for self_us, _, _, module_name in rows:
+        packages[module_name.split('.')[0]] += self_us
+    print(f"\n  {'package':<28}{'ms':>8}")
+    for package, total in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<28}{total / 1000:>8.1f}")
+
+    first_party = [row for row in rows if row[3].split('.')[0] in FIRST_PARTY and row[3] != module]
+    print(f"\n  {'first-party import (cumulative)':<44}{'ms':>8}")
+    for _, cumulative_us, _, module_name in sorted(first_party, key=lambda row: -row[1])[:top]:
+        print(f"  {module_name:<44}{cumulative_us / 1000:>8.1f}")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--app', choices=list(APPS) + ['all'], default='adoption')
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--top', type=int, default=12)
+    parser.add_argument('--budget-ms', type=float, default=750.0,
+                        help='maximum median import time per app')
+    args = parser.parse_args()
+
+    env = environment()
+    names = list(APPS) if args.app == 'all' else [args.app]
+    over = []
+    for name in names:
+        median = report(name, APPS[name], args.runs, args.top, env)
+        if median > args.budget_ms:
+            over.append(name)
+
+    print(f"\nbudget {args.budget_ms:.0f}ms: {'OVER for ' + ', '.join(over) if over else 'ok'}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
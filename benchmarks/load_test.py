@@ -0,0 +1,371 @@
+"""
+End-to-end load test for the shelter, veterinary and adoption systems
+Boots all three apps on local ports against freshly seeded SQLite databases,
+with canned stand-ins for dog.ceo / TheCatAPI and email sending suppressed,
+then replays a weighted mix of user scenarios from concurrent virtual users.
+Reports requests/sec and p50/p95/p99 latency per scenario, saves the run as
+JSON and can compare it against an earlier run to catch regressions.
+
+All three apps and the load generator share one Python process, so absolute
+numbers understate a real deployment; compare runs made on the same machine.
+"""
+import sys
+import os
+import json
+import logging
+import time
+import random
+import argparse
+import tempfile
+import threading
+import requests
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Scenario name -> relative weight in the replayed mix
+SCENARIOS = {
+    'browse': 30,
+    'detail': 30,
+    'chatbot': 15,
+    'apply': 10,
+    'review': 5,
+    'schedule': 10,
+}
+
+DOG_BREEDS = ['labrador', 'beagle', 'poodle', 'husky', 'boxer', 'pug', 'collie', 'terrier']
+CAT_BREEDS = ['Siamese', 'Bengal', 'Persian', 'Maine Coon', 'Sphynx', 'Ragdoll']
+CHAT_MESSAGES = [
+    'hello', 'how many pets are available', 'show me dogs', 'find a cat',
+    'how does adoption work', 'young dogs good with kids', 'help',
+]
+
+
+def configure_environment(base_port, data_dir):
+    """Point every system at local ports and throwaway databases before config is imported"""
+    os.environ['ADOPTION_SYSTEM_URL'] = f'http://127.0.0.1:{base_port}'
+    os.environ['SHELTER_SYSTEM_URL'] = f'http://127.0.0.1:{base_port + 1}'
+    os.environ['VETERINARY_SYSTEM_URL'] = f'http://127.0.0.1:{base_port + 2}'
+    os.environ['ADOPTION_DB_URI'] = f'sqlite:///{data_dir}/adoption.db'
+    os.environ['SHELTER_DB_URI'] = f'sqlite:///{data_dir}/shelter.db'
+    os.environ['VETERINARY_DB_URI'] = f'sqlite:///{data_dir}/veterinary.db'
+    os.environ['UPLOAD_FOLDER'] = os.path.join(data_dir, 'uploads')
+    os.environ['CACHE_DIR'] = os.path.join(data_dir, 'cache')
+    # Matches the seeded hashes, so logins do not upgrade them mid-run
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+
+def stub_external_apis(latency):
+    """Replace dog.ceo / TheCatAPI fetchers with canned data after a fixed delay"""
+    from adoption_system.utils import api_client
+
+    def delayed(value):
+        def fetch(*args, **kwargs):
+            time.sleep(latency)
+            return value
+        return fetch
+
+    api_client.dog_breed_catalog.fetcher = delayed(DOG_BREEDS)
+    api_client.cat_breed_catalog.fetcher = delayed(CAT_BREEDS)
+    api_client.dog_image_cache.fetcher = delayed([f'https://images.example/dog/{i}.jpg' for i in range(5)])
+    api_client.cat_info_cache.fetcher = delayed({'name': 'Cat', 'temperament': 'Calm', 'life_span': '12 - 15'})
+
+
+def seed(apps, pets, users, seed_value=7):
+    """Fill the three databases; returns ids the scenarios pick from"""
+    from werkzeug.security import generate_password_hash
+    from shelter_system.models import Pet
+    from veterinary_system.models import Vet
+    from adoption_system.models import User, AdoptionApplication
+
+    rng = random.Random(seed_value)
+    shelter, vet, adoption = apps['shelter'], apps['veterinary'], apps['adoption']
+
+    with shelter.app_context():
+        db = shelter.extensions['sqlalchemy']
+        db.create_all()
+        for i in range(pets):
+            species = rng.choice(['dog', 'cat'])
+            db.session.add(Pet(
+                name=f'Pet {i}',
+                species=species,
+                breed=rng.choice(DOG_BREEDS if species == 'dog' else CAT_BREEDS),
+                age=rng.randint(0, 14),
+                gender=rng.choice(['male', 'female']),
+                size=rng.choice(['small', 'medium', 'large']),
+                energy_level=rng.choice(['low', 'medium', 'high']),
+                description='Friendly and playful, loves walks and naps.',
+                adoption_fee=rng.choice([50, 100, 150, 200]),
+                vaccinated=rng.random() < 0.7,
+                good_with_kids=rng.random() < 0.6,
+                good_with_cats=rng.random() < 0.4,
+            ))
+        db.session.commit()
+        pet_ids = [pet_id for (pet_id,) in db.session.query(Pet.id)]
+
+    with vet.app_context():
+        db = vet.extensions['sqlalchemy']
+        db.create_all()
+        for i in range(5):
+            db.session.add(Vet(name=f'Dr. Vet {i}', email=f'vet{i}@example.com', specialization='General'))
+        db.session.commit()
+        vet_ids = [vet_id for (vet_id,) in db.session.query(Vet.id)]
+
+    # Cheap hashes: logins happen once per virtual user, outside the measurements
+    password = generate_password_hash('loadtest', method='pbkdf2:sha256:1000')
+    with adoption.app_context():
+        db = adoption.extensions['sqlalchemy']
+        db.create_all()
+        db.session.add(User(name='Staff', email='staff@example.com', password=password, role='shelter'))
+        for i in range(users):
+            db.session.add(User(name=f'Adopter {i}', email=f'adopter{i}@example.com', password=password,
+                                role='adopter', address='1 Main St', city='Springfield'))
+        db.session.commit()
+        adopter_ids = [user_id for (user_id,) in db.session.query(User.id).filter_by(role='adopter')]
+        for user_id in adopter_ids:
+            for pet_id in rng.sample(pet_ids, min(3, len(pet_ids))):
+                db.session.add(AdoptionApplication(
+                    user_id=user_id, pet_id=pet_id, pet_name='Pet', reason='Love animals',
+                    experience='Some', living_situation='House', status='pending',
+                ))
+        db.session.commit()
+
+    return {'pets': pet_ids, 'vets': vet_ids}
+
+
+def boot(base_port):
+    """Import the three apps and serve each on its own thread"""
+    from werkzeug.serving import make_server
+    from adoption_system.app import app as adoption_app
+    from shelter_system.app import app as shelter_app
+    from veterinary_system.app import app as veterinary_app
+
+    adoption_app.extensions['mail'].suppress = True
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    apps = {'adoption': adoption_app, 'shelter': shelter_app, 'veterinary': veterinary_app}
+    servers = []
+    for offset, app in enumerate([adoption_app, shelter_app, veterinary_app]):
+        server = make_server('127.0.0.1', base_port + offset, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return apps, servers
+
+
+class VirtualUser:
+    """One logged-in adopter with its own cookie jar"""
+
+    def __init__(self, index, urls, ids, rng):
+        self.urls = urls
+        self.ids = ids
+        self.rng = rng
+        self.session = requests.Session()
+        self.session.post(f"{urls['adoption']}/auth/login",
+                          data={'email': f'adopter{index}@example.com', 'password': 'loadtest'})
+
+    def browse(self):
+        params = {'species': self.rng.choice(['all', 'dog', 'cat']), 'page': self.rng.randint(1, 3)}
+        if self.rng.random() < 0.3:
+            params['good_with_kids'] = 'true'
+        return self.session.get(f"{self.urls['adoption']}/pets/browse", params=params)
+
+    def detail(self):
+        return self.session.get(f"{self.urls['adoption']}/pets/{self.rng.choice(self.ids['pets'])}")
+
+    def chatbot(self):
+        return self.session.post(f"{self.urls['adoption']}/chatbot/api/chat",
+                                 json={'message': self.rng.choice(CHAT_MESSAGES)})
+
+    def apply(self):
+        return self.session.post(
+            f"{self.urls['adoption']}/adoption/apply/{self.rng.choice(self.ids['pets'])}",
+            data={'reason': 'Looking for a companion', 'experience': 'Had dogs before',
+                  'living_situation': 'House', 'has_yard': 'yes', 'other_pets': 'none'},
+            allow_redirects=False,
+        )
+
+    def schedule(self):
+        date = datetime.utcnow() + timedelta(days=self.rng.randint(1, 60), hours=self.rng.randint(0, 8))
+        return self.session.post(
+            f"{self.urls['veterinary']}/appointments/api/schedule-appointment/",
+            json={'pet_id': self.rng.choice(self.ids['pets']), 'vet_id': self.rng.choice(self.ids['vets']),
+                  'date': date.replace(microsecond=0).isoformat(), 'reason': 'Checkup',
+                  'pet_name': 'Pet', 'owner_name': 'Adopter'},
+        )
+
+
+class Reviewer:
+    """Shelter staff session working through pending applications"""
+
+    def __init__(self, urls, apps):
+        self.urls = urls
+        self.apps = apps
+        self.session = requests.Session()
+        self.session.post(f"{urls['adoption']}/auth/login",
+                          data={'email': 'staff@example.com', 'password': 'loadtest'})
+        self._lock = threading.Lock()
+
+    def next_application(self):
+        from adoption_system.models import AdoptionApplication
+        with self._lock, self.apps['adoption'].app_context():
+            application = AdoptionApplication.query.filter_by(status='pending').first()
+            if application is None:
+                return None
+            # Claim it so concurrent reviewers do not pick the same one
+            application.status = 'in_review'
+            self.apps['adoption'].extensions['sqlalchemy'].session.commit()
+            return application.id
+
+    def review(self):
+        app_id = self.next_application()
+        if app_id is None:
+            return None
+        # Rejections keep the pet inventory stable across the run
+        return self.session.post(f"{self.urls['adoption']}/adoption/application/{app_id}/review",
+                                 data={'action': 'reject', 'notes': 'Load test'}, allow_redirects=False)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_load(users, reviewer, duration, warmup, seed_value):
+    """Drive every virtual user in its own thread; returns per-scenario samples"""
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in names]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def worker(user, index):
+        rng = random.Random(seed_value + index)
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights)[0]
+            action = reviewer.review if name == 'review' else getattr(user, name)
+            began = time.monotonic()
+            skipped = failed = False
+            try:
+                response = action()
+                skipped = response is None
+                failed = not skipped and response.status_code >= 500
+            except Exception as e:
+                print(f"Error running {name}: {e}")
+                failed = True
+            ended = time.monotonic()
+            if skipped or began < measure_from:
+                continue
+            with lock:
+                samples[name].append(ended - began)
+                errors[name] += failed
+
+    threads = [threading.Thread(target=worker, args=(user, i)) for i, user in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors
+
+
+def summarize(samples, errors, duration):
+    report = {}
+    for name, values in samples.items():
+        values.sort()
+        report[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'rps': round(len(values) / duration, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        }
+    total = sum(len(values) for values in samples.values())
+    report['total'] = {'requests': total, 'errors': sum(errors.values()), 'rps': round(total / duration, 2)}
+    return report
+
+
+def print_report(report, baseline=None, tolerance=0.2):
+    """Print the table; with a baseline, mark p95 regressions beyond tolerance"""
+    print(f"\n{'scenario':<10}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  vs baseline p95")
+    regressions = []
+    for name in SCENARIOS:
+        row = report[name]
+        line = (f"{name:<10}{row['requests']:>7}{row['errors']:>6}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+        previous = (baseline or {}).get(name)
+        if previous and previous.get('p95_ms'):
+            change = row['p95_ms'] / previous['p95_ms'] - 1
+            line += f"  {change:+.0%}"
+            if change > tolerance:
+                line += ' REGRESSION'
+                regressions.append(name)
+        print(line)
+    total = report['total']
+    print(f"{'total':<10}{total['requests']:>7}{total['errors']:>6}{total['rps']:>9.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=8, help='virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds before measuring')
+    parser.add_argument('--pets', type=int, default=500)
+    parser.add_argument('--base-port', type=int, default=5100,
+                        help='adoption on this port, shelter and veterinary on the next two')
+    parser.add_argument('--external-latency', type=float, default=0.05,
+                        help='seconds each stubbed dog.ceo / TheCatAPI call takes')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='where to save results (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare p95 latency against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slowdown before failing')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='pet_loadtest_')
+    configure_environment(args.base_port, data_dir)
+    apps, servers = boot(args.base_port)
+    stub_external_apis(args.external_latency)
+    ids = seed(apps, args.pets, args.concurrency, args.seed)
+
+    urls = {
+        'adoption': os.environ['ADOPTION_SYSTEM_URL'],
+        'shelter': os.environ['SHELTER_SYSTEM_URL'],
+        'veterinary': os.environ['VETERINARY_SYSTEM_URL'],
+    }
+    users = [VirtualUser(i, urls, ids, random.Random(args.seed + i)) for i in range(args.concurrency)]
+    reviewer = Reviewer(urls, apps)
+
+    print(f"{args.concurrency} users, {args.pets} pets, {args.warmup:.0f}s warmup + {args.duration:.0f}s measured "
+          f"(data in {data_dir})")
+    samples, errors = run_load(users, reviewer, args.duration, args.warmup, args.seed)
+    for server in servers:
+        server.shutdown()
+
+    report = summarize(samples, errors, args.duration)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['scenarios']
+    regressions = print_report(report, baseline, args.tolerance)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'scenarios': report,
+        }, f, indent=2)
+    print(f"\nsaved {output}")
+
+    sys.exit(1 if regressions or report['total']['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
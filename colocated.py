@@ -0,0 +1,84 @@
+"""
+Co-located mode - all three systems in one process
+The adoption system is served at the root, the shelter system under
+/shelter and the veterinary system under /veterinary. Calls from one system
+to another are dispatched in-process instead of over loopback HTTP.
+
+Run with:
+    gunicorn colocated:application --bind 0.0.0.0:$PORT --workers 2 --worker-class gthread --threads ${WEB_THREADS:-64}
+    python colocated.py
+"""
+import sys
+import os
+# Add this directory to path to import config and the systems
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from config import Config
+from common.inprocess import transport
+
+SHELTER_PREFIX = '/shelter'
+VETERINARY_PREFIX = '/veterinary'
+
+
+def create_application(public_url=None):
+    """
+    Build the combined WSGI app
+
+    public_url is where the combined app is reachable (default
+    ADOPTION_SYSTEM_URL). The system URLs in Config are pointed at the
+    mounts, so this must run before the system packages are imported.
+    """
+    public_url = (public_url or Config.ADOPTION_SYSTEM_URL).rstrip('/')
+    Config.ADOPTION_SYSTEM_URL = public_url
+    Config.SHELTER_SYSTEM_URL = public_url + SHELTER_PREFIX
+    Config.VETERINARY_SYSTEM_URL = public_url + VETERINARY_PREFIX
+
+    from adoption_system.factory import create_app as create_adoption_app
+    from shelter_system.factory import create_app as create_shelter_app
+    from veterinary_system.factory import create_app as create_veterinary_app
+
+    adoption_app = create_adoption_app()
+    shelter_app = create_shelter_app()
+    veterinary_app = create_veterinary_app()
+
+    # The systems share a host, so keep their session cookies apart
+    for app, prefix in ((shelter_app, SHELTER_PREFIX), (veterinary_app, VETERINARY_PREFIX)):
+        app.config['SESSION_COOKIE_NAME'] = f"{prefix.strip('/')}_session"
+        app.config['SESSION_COOKIE_PATH'] = prefix
+
+    transport.mount(Config.ADOPTION_SYSTEM_URL, adoption_app)
+    transport.mount(Config.SHELTER_SYSTEM_URL, shelter_app)
+    transport.mount(Config.VETERINARY_SYSTEM_URL, veterinary_app)
+
+    dispatcher = DispatcherMiddleware(adoption_app, {
+        SHELTER_PREFIX: shelter_app,
+        VETERINARY_PREFIX: veterinary_app,
+    })
+    dispatcher.apps = {'adoption': adoption_app, 'shelter': shelter_app, 'veterinary': veterinary_app}
+    return dispatcher
+
+
+application = create_application()
+
+if __name__ == '__main__':
+    from werkzeug.serving import run_simple
+
+    # Create database tables
+    from adoption_system.models import create_missing_indexes as create_adoption_indexes
+    from shelter_system.models import create_missing_indexes as create_shelter_indexes, lowercase_pet_traits
+    from veterinary_system.models import create_missing_indexes as create_veterinary_indexes
+    for name, app in application.apps.items():
+        with app.app_context():
+            app.extensions['sqlalchemy'].create_all()
+            if name == 'adoption':
+                create_adoption_indexes()
+            elif name == 'shelter':
+                create_shelter_indexes()
+                lowercase_pet_traits()
+            elif name == 'veterinary':
+                create_veterinary_indexes()
+
+    port = int(os.environ.get('PORT', 5000))
+    debug = os.environ.get('FLASK_ENV') != 'production'
+    run_simple('0.0.0.0', port, application, use_reloader=debug, use_debugger=debug, threaded=True)
@@ -0,0 +1,69 @@
+"""
+Liveness and readiness probes
+/healthz answers as long as the process can serve requests. /readyz also
+pings the database and the downstream systems, and caches the outcome for
+READINESS_CACHE_TTL seconds so frequent probes stay cheap.
+"""
+import time
+from datetime import datetime
+
+from flask import jsonify
+from sqlalchemy import text
+
+from common.snapshot import SnapshotCache
+from common.tracing import http
+
+
+def _probe(check):
+    """Run one check, returning its status and how long it took"""
+    started = time.perf_counter()
+    try:
+        check()
+        result = {'status': 'ok'}
+    except Exception as e:
+        result = {'status': 'fail', 'error': type(e).__name__}
+    result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def init_health(app, db, required=(), optional=()):
+    """
+    Add /healthz and /readyz to app
+
+    required and optional are (name, base_url) pairs of downstream systems,
+    probed through their /healthz. The app reports not ready when the
+    database or a required system is unreachable; optional systems are only
+    reported, since pages degrade without them.
+    """
+    timeout = app.config.get('READINESS_TIMEOUT', 1.0)
+
+    def reach(base_url):
+        response = http.get(f"{base_url}/healthz", timeout=timeout)
+        response.raise_for_status()
+
+    def check_readiness():
+        checks = {'database': _probe(lambda: db.session.execute(text('SELECT 1')))}
+        for name, base_url in list(required) + list(optional):
+            checks[name] = _probe(lambda: reach(base_url))
+        critical = ['database'] + [name for name, _ in required]
+        ready = all(checks[name]['status'] == 'ok' for name in critical)
+        return {
+            'status': 'ready' if ready else 'unavailable',
+            'checks': checks,
+            'checked_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        }
+
+    readiness = SnapshotCache(check_readiness, ttl=app.config.get('READINESS_CACHE_TTL', 5))
+
+    @app.route('/healthz')
+    def healthz():
+        """Liveness probe: no database or network access"""
+        return jsonify({'status': 'ok'})
+
+    @app.route('/readyz')
+    def readyz():
+        """Readiness probe: database and downstream systems, cached"""
+        result = readiness.get()
+        return jsonify(result), 200 if result['status'] == 'ready' else 503
+
+    return app
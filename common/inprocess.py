@@ -0,0 +1,102 @@
+"""
+In-process transport between co-located systems
+When the systems run in one process (see colocated.py), calls to a mounted
+system's URL are dispatched straight into that Flask app instead of going
+out over loopback HTTP. The target app runs its normal request pipeline
+(hooks, error handlers, request ID), but there is no socket, HTTP parsing or
+connection pool involved.
+"""
+import json as jsonlib
+import threading
+from urllib.parse import urlsplit
+
+from werkzeug.test import EnvironBuilder
+
+
+class LocalResponse:
+    """The parts of requests.Response the API clients use"""
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return jsonlib.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class InProcessTransport:
+    """Base URL -> Flask app table for systems served by this process"""
+
+    def __init__(self):
+        self._mounts = {}  # (scheme, netloc, path prefix) -> app
+        self._lock = threading.Lock()
+
+    def mount(self, base_url, app):
+        """Route calls under base_url to app"""
+        parts = urlsplit(base_url)
+        with self._lock:
+            self._mounts[(parts.scheme, parts.netloc, parts.path.rstrip('/'))] = app
+
+    def unmount_all(self):
+        with self._lock:
+            self._mounts.clear()
+
+    def resolve(self, url):
+        """(app, script_root, path) for a mounted URL, or None"""
+        if not self._mounts:
+            return None
+        parts = urlsplit(url)
+        # Longest prefix first, so /shelter wins over an app mounted at the root
+        for (scheme, netloc, prefix), app in sorted(self._mounts.items(), key=lambda item: -len(item[0][2])):
+            if parts.scheme == scheme and parts.netloc == netloc and \
+                    (parts.path == prefix or parts.path.startswith(prefix + '/')):
+                return app, prefix, parts.path[len(prefix):] or '/'
+        return None
+
+    def send(self, target, method, url, params=None, data=None, json=None, headers=None, **ignored):
+        """Run the request through the target app and return a LocalResponse"""
+        app, script_root, path = target
+        parts = urlsplit(url)
+        builder = EnvironBuilder(
+            path=path,
+            base_url=f"{parts.scheme}://{parts.netloc}{script_root}",
+            method=method.upper(),
+            query_string=params if params else (parts.query or None),
+            data=data,
+            json=json,
+            headers=headers,
+        )
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+
+        # Same steps as Flask.wsgi_app, minus the WSGI response iteration
+        with app.request_context(environ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception as e:
+                response = app.make_response(app.handle_exception(e))
+            content = response.get_data()
+            status_code = response.status_code
+            response_headers = dict(response.headers)
+            response.close()
+        return LocalResponse(url, status_code, response_headers, content)
+
+
+transport = InProcessTransport()
@@ -0,0 +1,189 @@
+"""
+Intent classification for the chatbots
+The registered intents are compiled into one generated if-chain: intents are
+tried in priority order with the same `in` substring checks the hand-written
+chains used, and a phrase's precompiled word-boundary regex only runs when
+the substring is present. Slots are extracted when a handler first reads one.
+benchmarks/bench_intent_router.py compares it with the old chains.
+"""
+import re
+
+ALNUM = r'[^\W_]'  # a letter or digit; \b would also treat '_' as part of a word
+NUMBER = re.compile(r'[0-9]+')  # ASCII only: str.isdigit() also accepts '²', which int() rejects
+
+# Phrases ending in '*' match any word starting with the phrase ("kid*" matches
+# "kids"); all other phrases must match whole words ("hi" does not match "this").
+SPECIES_TERMS = {
+    'dog': 'dog', 'dogs': 'dog', 'puppy': 'dog', 'puppies': 'dog',
+    'cat': 'cat', 'cats': 'cat', 'kitten*': 'cat',
+}
+
+YOUNG_TERMS = {
+    'puppy': 'puppy', 'puppies': 'puppy', 'kitten*': 'kitten',
+}
+
+COMMON_BREEDS = [
+    'Golden Retriever', 'Labrador Retriever', 'Labrador', 'Beagle', 'German Shepherd',
+    'Bulldog', 'Poodle', 'Rottweiler', 'Siberian Husky', 'Husky', 'Dachshund', 'Boxer',
+    'Persian', 'Maine Coon', 'Siamese', 'Ragdoll', 'Bengal', 'British Shorthair',
+    'Abyssinian', 'Sphynx', 'Scottish Fold', 'Russian Blue',
+]
+
+
+def breed_terms(breeds):
+    """Build slot phrases for a list of breed names (plurals included)"""
+    return {f"{breed.lower()}*": breed for breed in breeds}
+
+
+class IntentMatch:
+    """Result of routing a message"""
+
+    __slots__ = ('intent', '_slots', '_extract', '_text')
+
+    def __init__(self, intent=None, slots=None, extract=None, text=None):
+        self.intent = intent
+        self._slots = slots
+        self._extract = extract  # extract(text) computes the slots on first use
+        self._text = text
+
+    @property
+    def slots(self):
+        if self._slots is None:
+            self._slots = self._extract(self._text) if self._extract else {}
+        return self._slots
+
+    def get(self, slot, default=None):
+        """Get an extracted slot value"""
+        return self.slots.get(slot, default)
+
+    def __repr__(self):
+        return f'<IntentMatch {self.intent} {self.slots}>'
+
+
+class IntentRouter:
+    """
+    Keyword based intent router
+
+    Each intent is a list of keyword groups; the intent matches when every
+    group has at least one phrase in the message. When several intents match,
+    the one with the lowest priority wins (registration order by default).
+    Slots map phrases to values (the first registered phrase found wins, as
+    in an if/elif chain) and the first number in the message can be captured
+    as a slot as well.
+    """
+
+    def __init__(self, number_slot=None):
+        self.number_slot = number_slot
+        self._intents = []
+        self._slots = []  # (slot, {phrase: value})
+        self._compiled = False
+
+    def add_intent(self, name, *groups, priority=None, requires=()):
+        """
+        Register an intent
+
+        Args:
+            name: Intent name returned by route()
+            *groups: Iterables of phrases, every group must match
+            priority: Lower wins, defaults to registration order
+            requires: Slot names that must be extracted for a match
+        """
+        order = len(self._intents)
+        self._intents.append({
+            'name': name,
+            'priority': order if priority is None else priority,
+            'order': order,
+            'groups': [list(group) for group in groups],
+            'requires': tuple(requires),
+        })
+        self._compiled = False
+        return self
+
+    def add_slot(self, slot, phrases):
+        """Register phrases for a slot, given as {phrase: value} or a list of phrases"""
+        if not isinstance(phrases, dict):
+            phrases = {phrase: phrase.rstrip('*') for phrase in phrases}
+        self._slots.append((slot, dict(phrases)))
+        self._compiled = False
+        return self
+
+    def compile(self):
+        """
+        Generate route()'s classifier: one function that tests the intents in
+        priority order as an if-chain of substring checks, whole-word checked
+        only on a hit (as collections.namedtuple builds its class from source)
+        """
+        ranked = sorted(self._intents, key=lambda i: (i['priority'], i['order']))
+        namespace = {'NUMBER': NUMBER, 'IntentMatch': IntentMatch, 'extract': self.extract_slots}
+        slot_tests = {}
+        for slot, phrases in self._slots:
+            test = group_test(phrases, namespace)
+            slot_tests[slot] = f'({slot_tests[slot]} or {test})' if slot in slot_tests else test
+        if self.number_slot:
+            slot_tests.setdefault(self.number_slot, 'NUMBER.search(text)')
+
+        lines = ['def classify(message):', '    text = message.lower()']
+        for intent in ranked:
+            tests = [group_test(group, namespace) for group in intent['groups']]
+            tests += [slot_tests.get(slot, 'False') for slot in intent['requires']]
+            lines.append(f'    if {" and ".join(tests) or "True"}:')
+            lines.append(f'        return IntentMatch({intent["name"]!r}, None, extract, text)')
+        lines.append('    return IntentMatch(None, None, extract, text)')
+        exec('\n'.join(lines), namespace)
+        self._classify = namespace['classify']
+        self._slot_phrases = [
+            (slot, [(phrase.lower().rstrip('*'), re.compile(phrase_pattern(phrase)).search, value)
+                    for phrase, value in values.items() if phrase.rstrip('*')])
+            for slot, values in self._slots
+        ]
+        self._compiled = True
+        return self
+
+    def extract_slots(self, text):
+        """{slot: value} for the first registered phrase of each slot found in lowercased text"""
+        slots = {}
+        for slot, phrases in self._slot_phrases:
+            if slot in slots:
+                continue
+            for literal, search, value in phrases:
+                if literal in text and search(text):
+                    slots[slot] = value
+                    break
+        if self.number_slot and self.number_slot not in slots:
+            found = NUMBER.search(text)
+            if found:
+                slots[self.number_slot] = int(found.group())
+        return slots
+
+    def route(self, message):
+        """Classify a message; its slots are extracted when first read"""
+        if not self._compiled:
+            self.compile()
+        return self._classify(message)
+
+
+def phrase_pattern(phrase):
+    """
+    Regex for one phrase: whole words, or the start of a word when it ends in '*'
+
+    The start check is a lookbehind after the literal, so the regex engine can
+    still jump straight to the literal instead of trying every position.
+    """
+    literal = re.escape(phrase.lower().rstrip('*'))
+    pattern = f'{literal}(?<!{ALNUM}{literal})'
+    return pattern if phrase.endswith('*') else pattern + f'(?!{ALNUM})'
+
+
+def group_test(phrases, namespace):
+    """
+    Source of an expression that is true when any of phrases is in text as
+    whole words; each phrase's regex is added to namespace
+    """
+    checks = []
+    for phrase in phrases:
+        literal = phrase.lower().rstrip('*')
+        if literal:
+            name = f'phrase_{len(namespace)}'
+            namespace[name] = re.compile(phrase_pattern(phrase)).search
+            checks.append(f'({literal!r} in text and {name}(text))')
+    return f'({" or ".join(checks)})' if checks else 'False'
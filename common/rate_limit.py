@@ -0,0 +1,205 @@
+"""
+Token-bucket admission control
+Expensive public endpoints get two budgets: one per client address and
+one for the route as a whole. Each is a token bucket refilled at a steady
+rate up to a burst size. A request that finds either bucket empty is
+answered 429 with Retry-After from a before_request hook, before the view
+(or anything else that touches the database) runs, and charges neither
+bucket. Calls between the systems carry the shared SERVICE_TOKEN and are
+not limited.
+
+Buckets live in process memory by default. With RATE_LIMIT_STORAGE set to
+a file path they are kept in a small SQLite database shared by every
+worker on the host.
+"""
+import os
+import hmac
+import math
+import time
+import sqlite3
+import ipaddress
+import threading
+from collections import OrderedDict
+
+from flask import request, jsonify
+
+from common.tracing import SERVICE_TOKEN_HEADER
+
+MAX_CLIENTS = 10000  # idle buckets are full, so dropping the oldest is harmless
+
+
+def parse_rules(spec):
+    """
+    {endpoint: ((rate, burst) per client, (rate, burst) for the route or None)}
+
+    spec is "endpoint=rate/burst[,rate/burst];..." with rates in requests
+    per second, e.g. "chatbot.chat=1/5,10/20".
+    """
+    rules = {}
+    for item in filter(None, (part.strip() for part in spec.split(';'))):
+        endpoint, budgets = item.split('=', 1)
+        limits = []
+        for budget in budgets.split(','):
+            rate, burst = budget.split('/')
+            limits.append((float(rate), float(burst)))
+        rules[endpoint.strip()] = (limits[0], limits[1] if len(limits) > 1 else None)
+    return rules
+
+
+def take(state, rate, burst, now):
+    """(tokens left, seconds to wait) after taking a token from state (tokens, updated_at) or None"""
+    tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryBuckets:
+    """Buckets in this process, least recently used dropped first"""
+
+    def __init__(self, maxsize=MAX_CLIENTS):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, budgets, now):
+        """Take a token from every (key, rate, burst) bucket, or from none; returns seconds to wait"""
+        with self._lock:
+            results = [(key, *take(self._buckets.get(key), rate, burst, now)) for key, rate, burst in budgets]
+            wait = max(wait for _, _, wait in results)
+            if wait:
+                return wait
+            for key, tokens, _ in results:
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return 0.0
+
+
+class SQLiteBuckets:
+    """Buckets in a SQLite file, shared by the workers on one host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Connections are not carried across a fork
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=0.05, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def take(self, budgets, now):
+        """Take a token from every (key, rate, burst) bucket, or from none; returns seconds to wait"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            results = []
+            for key, rate, burst in budgets:
+                state = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                results.append((key, *take(state, rate, burst, now)))
+            wait = max(wait for _, _, wait in results)
+            if not wait:
+                connection.executemany('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                                       [(key, tokens, now) for key, tokens, _ in results])
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimiter:
+    """Per-client and per-route token buckets for a set of endpoints"""
+
+    def __init__(self, rules, storage=None):
+        self.rules = rules
+        self.buckets = SQLiteBuckets(storage) if storage else MemoryBuckets()
+
+    def check(self, endpoint, client):
+        """Seconds until the request would be admitted; 0 admits it now"""
+        per_client, per_route = self.rules[endpoint]
+        budgets = [(f'{endpoint}|{client}', *per_client)]
+        if per_route:
+            budgets.append((endpoint, *per_route))
+        try:
+            # Both buckets at once: a caller over its own budget does not drain the shared one
+            wait = self.buckets.take(budgets, time.time())
+        except sqlite3.Error as e:
+            # Fail open: a busy or broken store should not take the API down
+            print(f"Error checking rate limit: {e}")
+            return 0.0
+        return wait
+
+
+def parse_networks(spec):
+    networks = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        networks.append(ipaddress.ip_network(item, strict=False))
+    return networks
+
+
+def client_address(proxy_hops=0):
+    """The caller's address; with proxy_hops, taken from X-Forwarded-For as set by that many proxies"""
+    if proxy_hops:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= proxy_hops:
+            return forwarded[-proxy_hops]
+    return request.remote_addr or 'unknown'
+
+
+def is_exempt(address, networks):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def is_service_call(token):
+    """Whether the request carries the systems' shared token"""
+    return bool(token) and hmac.compare_digest(request.headers.get(SERVICE_TOKEN_HEADER, ''), token)
+
+
+def init_rate_limit(app):
+    """Add admission control for the endpoints in RATE_LIMITS that this app has"""
+    if not app.config.get('RATE_LIMIT_ENABLED', False):
+        return None
+    rules = {
+        endpoint: budgets for endpoint, budgets in parse_rules(app.config.get('RATE_LIMITS', '')).items()
+        if endpoint in app.view_functions
+    }
+    if not rules:
+        return None
+    limiter = RateLimiter(rules, app.config.get('RATE_LIMIT_STORAGE'))
+    # Other systems on this host (and in-process calls) come from these addresses
+    exempt = parse_networks(app.config.get('RATE_LIMIT_EXEMPT', ''))
+    proxy_hops = app.config.get('RATE_LIMIT_PROXY_HOPS', 0)
+    service_token = app.config.get('SERVICE_TOKEN', '')
+
+    @app.before_request
+    def admit():
+        if request.endpoint not in rules or is_service_call(service_token):
+            return None
+        client = client_address(proxy_hops)
+        if is_exempt(client, exempt):
+            return None
+        wait = limiter.check(request.endpoint, client)
+        if not wait:
+            return None
+        response = jsonify({'error': 'Too many requests', 'retry_after': math.ceil(wait)})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(math.ceil(wait))
+        return response
+
+    return limiter
@@ -0,0 +1,138 @@
+"""
+Cached data snapshots
+A snapshot is a plain dict of facts built by one function, kept for a short
+time and dropped as soon as a commit touches the models it was built from
+"""
+import time
+import threading
+from collections import OrderedDict
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class SnapshotCache:
+    """
+    Holds the latest result of a builder function
+
+    The snapshot is rebuilt lazily when it is older than ttl seconds or has
+    been invalidated. Only one thread rebuilds at a time; other threads keep
+    reading the previous snapshot meanwhile. If a rebuild fails and an older
+    snapshot exists, the older one is served.
+    """
+
+    def __init__(self, builder, ttl=30):
+        self.builder = builder
+        self.ttl = ttl
+        self._data = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current snapshot, rebuilding it if stale"""
+        if self._data is not None and not self.is_stale():
+            return self._data
+
+        if not self._lock.acquire(blocking=self._data is None):
+            return self._data
+
+        try:
+            if self._data is not None and not self.is_stale():
+                return self._data
+            generation = self._generation
+            try:
+                data = self.builder()
+            except Exception:
+                if self._data is None:
+                    raise
+                return self._data
+            self._data = data
+            # A write that landed during the rebuild keeps the snapshot stale
+            self._built_at = time.monotonic() if generation == self._generation else 0.0
+            return data
+        finally:
+            self._lock.release()
+
+    def is_stale(self):
+        return time.monotonic() - self._built_at >= self.ttl
+
+    def invalidate(self):
+        """Force a rebuild on the next read"""
+        self._generation += 1
+        self._built_at = 0.0
+
+    def invalidate_on_commit(self, *models):
+        """Invalidate whenever a committed session added, changed or deleted any of the models"""
+        on_commit(models, self.invalidate)
+        return self
+
+
+class KeyedSnapshotCache:
+    """
+    Snapshots built per key, e.g. one per filter combination
+
+    builder(key) is called on a miss or when the entry is older than ttl
+    seconds. At most maxsize keys are kept, least recently used first out.
+    Invalidation drops every key at once.
+    """
+
+    def __init__(self, builder, ttl=30, maxsize=256):
+        self.builder = builder
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (built_at, generation, data)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the snapshot for key, building it if missing or stale"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] == self._generation and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[2]
+            generation = self._generation
+
+        data = self.builder(key)
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (now, generation, data)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self):
+        """Drop every cached key"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def invalidate_on_commit(self, *models):
+        """Invalidate whenever a committed session added, changed or deleted any of the models"""
+        on_commit(models, self.invalidate)
+        return self
+
+
+def on_commit(models, callback):
+    """Call callback after every commit that added, changed or deleted an instance of models"""
+    models = tuple(models)
+    key = ('on_commit', id(callback))
+
+    def after_flush(session, flush_context):
+        if any(isinstance(obj, models) for obj in chain(session.new, session.dirty, session.deleted)):
+            session.info[key] = True
+
+    def after_commit(session):
+        if session.info.pop(key, False):
+            callback()
+
+    def after_rollback(session, previous_transaction):
+        session.info.pop(key, None)
+
+    event.listen(Session, 'after_flush', after_flush)
+    event.listen(Session, 'after_commit', after_commit)
+    event.listen(Session, 'after_soft_rollback', after_rollback)
@@ -0,0 +1,115 @@
+"""
+Per-request SQL profiler
+Opt-in (SQL_PROFILER=True). Counts the statements each request runs and the
+time spent in them, reports both in a Server-Timing header, and logs
+statements slower than SLOW_QUERY_MS and requests that run more than
+SQL_PROFILER_QUERY_LIMIT statements or repeat one statement, the usual
+sign of an N+1 lazy load.
+"""
+import contextvars
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+from sqlalchemy import event
+
+from common.tracing import current_request_id
+
+# One statement run this many times in a request is most likely a lazy load in a loop
+REPEATED_QUERY_LIMIT = 5
+
+_profile = contextvars.ContextVar('sql_profile', default=None)
+
+
+class RequestProfile:
+    """Statement count and time for one request, shared with its fan-out threads"""
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, statement, duration):
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[statement] += 1
+
+    def server_timing(self):
+        total = (time.perf_counter() - self.started) * 1000
+        return (f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries", '
+                f'app;dur={total:.1f}')
+
+
+def _describe(profile):
+    request_id = current_request_id()
+    return f"{profile.route} [{request_id}]" if request_id else profile.route
+
+
+def _watch_engine(engine, slow_seconds):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def finish_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('profile_started')
+        if not started:
+            return
+        duration = time.perf_counter() - started.pop()
+        profile = _profile.get()
+        if profile is None:
+            return
+        profile.add(statement, duration)
+        if duration >= slow_seconds:
+            print(f"Slow query ({duration * 1000:.1f}ms) on {_describe(profile)}: {' '.join(statement.split())}")
+
+    @event.listens_for(engine, 'handle_error')
+    def abandon_query(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('profile_started'):
+            connection.info['profile_started'].pop()
+
+
+def init_sql_profiler(app, db):
+    """Profile every engine of db while app serves requests, if enabled"""
+    if not app.config.get('SQL_PROFILER'):
+        return app
+
+    slow_seconds = app.config.get('SLOW_QUERY_MS', 100) / 1000
+    query_limit = app.config.get('SQL_PROFILER_QUERY_LIMIT', 25)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _watch_engine(engine, slow_seconds)
+
+    @app.before_request
+    def start_profile():
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        g.sql_profile_token = _profile.set(RequestProfile(f"{request.method} {route}"))
+
+    @app.after_request
+    def finish_profile(response):
+        profile = _profile.get()
+        if profile is None:
+            return response
+        response.headers.add('Server-Timing', profile.server_timing())
+
+        if profile.count > query_limit:
+            print(f"{profile.count} queries ({profile.duration * 1000:.1f}ms) on {_describe(profile)}")
+        if profile.statements:
+            statement, repeats = profile.statements.most_common(1)[0]
+            if repeats >= REPEATED_QUERY_LIMIT:
+                print(f"Statement repeated {repeats} times on {_describe(profile)}: {' '.join(statement.split())}")
+        return response
+
+    @app.teardown_request
+    def end_profile(exc):
+        if 'sql_profile_token' in g:
+            _profile.reset(g.pop('sql_profile_token'))
+
+    return app
@@ -0,0 +1,399 @@
+"""
+Request tracing and latency metrics
+Every request carries an X-Request-ID, taken from the caller or generated,
+which is forwarded on calls to the other systems. Request, outgoing call,
+database and template timings are recorded as histograms and served at
+/metrics in the Prometheus text format. Metrics are kept per process;
+with METRICS_DIR set, every worker process also writes them to a snapshot
+file there and /metrics sums the snapshots of all workers.
+"""
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from flask import Response, g, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+from common.inprocess import transport
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+SERVICE_TOKEN_HEADER = 'X-Service-Token'  # Config.SERVICE_TOKEN, sent to the other systems only
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; roughly doubling from 5ms to 10s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Incoming IDs are echoed into headers and logs, so keep them short and plain
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+service_var = contextvars.ContextVar('service', default='none')
+deadline_var = contextvars.ContextVar('deadline', default=None)  # time.monotonic() a fan-out call must end by
+
+
+def current_request_id():
+    """Request ID of the request being handled, if any"""
+    return request_id_var.get()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Histogram:
+    """Cumulative latency histogram with one series per label combination"""
+
+    def __init__(self, name, description, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        """{label values: [bucket counts..., count, sum]}, copied"""
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def render(self, series=None):
+        """Exposition lines for series (default: this process's)"""
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        series = sorted((series if series is not None else self.snapshot()).items())
+
+        for key, values in series:
+            labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key))
+            prefix = labels + ',' if labels else ''
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {values[-2]}')
+            lines.append(f'{self.name}_count{{{labels}}} {values[-2]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {values[-1]:.6f}')
+        return lines
+
+
+class Registry:
+    """
+    Metrics exposed at /metrics
+
+    After share(directory), each process writes its series to
+    metrics-<pid>.json in directory every `interval` seconds (and when it
+    is scraped), and render() adds up the files of all processes. Files of
+    exited workers are kept so totals stay cumulative; the directory should
+    start empty on each deploy.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.directory = None
+        self.interval = 5.0
+        self._writer_pid = None
+        self._write_lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def share(self, directory, interval=5.0):
+        """Merge metrics across worker processes through snapshot files in directory"""
+        # In co-located mode every app shares this registry, so the first directory wins
+        if self.directory is None:
+            os.makedirs(directory, exist_ok=True)
+            self.directory = directory
+            self.interval = interval
+        return self
+
+    def ensure_writer(self):
+        """Start this process's snapshot writer (once per process, so forked workers get theirs)"""
+        if self.directory is None or self._writer_pid == os.getpid():
+            return
+        with self._write_lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+            threading.Thread(target=self._write_periodically, name='metrics-writer', daemon=True).start()
+
+    def _write_periodically(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                print(f"Error writing metrics snapshot: {e}")
+
+    def write_snapshot(self):
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        data = {
+            metric.name: [[list(key), values] for key, values in metric.snapshot().items()]
+            for metric in self.metrics
+        }
+        with self._write_lock:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(data, f)
+            os.replace(path + '.tmp', path)
+
+    def _merged(self):
+        """{metric name: {label values: summed values}} over every process's snapshot"""
+        self.write_snapshot()
+        merged = {metric.name: {} for metric in self.metrics}
+        for name in os.listdir(self.directory):
+            if not (name.startswith('metrics-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # a worker is replacing it, or it is unreadable
+            for metric_name, entries in data.items():
+                series = merged.get(metric_name)
+                if series is None:
+                    continue
+                for key, values in entries:
+                    key = tuple(key)
+                    total = series.get(key)
+                    series[key] = values if total is None else [a + b for a, b in zip(total, values)]
+        return merged
+
+    def render(self):
+        merged = self._merged() if self.directory else {}
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render(merged.get(metric.name)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    'http_request_duration_seconds', 'Time spent handling incoming requests',
+    ['service', 'method', 'endpoint', 'status']))
+DEPENDENCY_LATENCY = registry.register(Histogram(
+    'dependency_request_duration_seconds', 'Time spent waiting on outgoing HTTP calls',
+    ['service', 'endpoint', 'dependency', 'method', 'status']))
+DB_LATENCY = registry.register(Histogram(
+    'db_query_duration_seconds', 'Time spent executing SQL statements',
+    ['service', 'endpoint']))
+TEMPLATE_LATENCY = registry.register(Histogram(
+    'template_render_duration_seconds', 'Time spent rendering templates',
+    ['service', 'template']))
+
+
+def _current_endpoint():
+    """Route pattern of the current request, or '' outside a request"""
+    try:
+        rule = request.url_rule
+    except RuntimeError:
+        return ''
+    return rule.rule if rule is not None else 'unmatched'
+
+
+SYSTEMS = ('shelter', 'veterinary', 'adoption')
+
+
+def dependency_name(url):
+    """Name an outgoing call by the system it goes to"""
+    systems = {
+        'shelter': Config.SHELTER_SYSTEM_URL,
+        'veterinary': Config.VETERINARY_SYSTEM_URL,
+        'adoption': Config.ADOPTION_SYSTEM_URL,
+    }
+    target = urlsplit(url)
+    best, best_length = None, -1
+    for name, base_url in systems.items():
+        base = urlsplit(base_url)
+        prefix = base.path.rstrip('/')
+        # Longest matching path wins when systems share a host (co-located mode)
+        if target.netloc == base.netloc and len(prefix) > best_length and \
+                (target.path == prefix or target.path.startswith(prefix + '/')):
+            best, best_length = name, len(prefix)
+    return best or target.netloc or 'unknown'
+
+
+class TracedHTTP:
+    """
+    Drop-in for requests.get/post/put/delete that forwards the current
+    X-Request-ID and records the call in DEPENDENCY_LATENCY
+
+    Calls to the other systems also carry Config.SERVICE_TOKEN, so their
+    rate limits let them through; it is never sent to outside hosts.
+
+    Calls to a system mounted in this process go through the in-process
+    transport instead of HTTP; timeouts do not apply to those. Inside a
+    fan-out call (deadline_var set) the timeout is cut to the time left, and
+    a call whose deadline has passed is not made at all.
+    """
+
+    def request(self, method, url, **kwargs):
+        # requests (and urllib3) load on the first outgoing call, not at cold start
+        import requests
+
+        dependency = dependency_name(url)
+        deadline = deadline_var.get()
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            kwargs['timeout'] = remaining if kwargs.get('timeout') is None else min(kwargs['timeout'], remaining)
+        headers = dict(kwargs.get('headers') or {})
+        request_id = request_id_var.get()
+        if request_id is not None:
+            headers.setdefault(REQUEST_ID_HEADER, request_id)
+        if Config.SERVICE_TOKEN and dependency in SYSTEMS:
+            headers.setdefault(SERVICE_TOKEN_HEADER, Config.SERVICE_TOKEN)
+        if headers:
+            kwargs['headers'] = headers
+
+        status = 'error'
+        started = time.perf_counter()
+        try:
+            if deadline is not None and kwargs['timeout'] <= 0:
+                # Nobody is waiting for the answer any more
+                raise requests.Timeout(f'Deadline passed before calling {url}')
+            local = transport.resolve(url)
+            if local is not None:
+                response = transport.send(local, method, url, **kwargs)
+            else:
+                response = requests.request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        except requests.Timeout:
+            status = 'timeout'
+            raise
+        finally:
+            DEPENDENCY_LATENCY.observe(
+                time.perf_counter() - started,
+                service=service_var.get(),
+                endpoint=_current_endpoint(),
+                dependency=dependency,
+                method=method.upper(),
+                status=status,
+            )
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+http = TracedHTTP()
+
+_db_timing_installed = False
+_db_timing_lock = threading.Lock()
+
+
+def install_db_timing():
+    """Time every SQL statement on every engine in this process"""
+    global _db_timing_installed
+    with _db_timing_lock:
+        if _db_timing_installed:
+            return
+        _db_timing_installed = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def finish_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('query_started')
+        if started:
+            DB_LATENCY.observe(time.perf_counter() - started.pop(),
+                               service=service_var.get(), endpoint=_current_endpoint())
+
+    @event.listens_for(Engine, 'handle_error')
+    def abandon_query(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_started'):
+            connection.info['query_started'].pop()
+
+
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+def init_tracing(app, service):
+    """Add request IDs, latency histograms and /metrics to an app"""
+    install_db_timing()
+    if app.config.get('METRICS_DIR'):
+        registry.share(os.path.join(app.config['METRICS_DIR'], service),
+                       app.config.get('METRICS_FLUSH_INTERVAL', 5.0))
+
+    @app.before_request
+    def start_trace():
+        registry.ensure_writer()
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = incoming if VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        g.trace_started = time.perf_counter()
+        g.trace_recorded = False
+        g.trace_tokens = (request_id_var.set(g.request_id), service_var.set(service))
+
+    @app.after_request
+    def finish_trace(response):
+        if 'request_id' in g:
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+            _record_request(service, response.status_code)
+        return response
+
+    @app.teardown_request
+    def end_trace(exc):
+        if 'trace_tokens' not in g:
+            return
+        # after_request does not run when a handler raised
+        _record_request(service, 500)
+        request_token, service_token = g.pop('trace_tokens')
+        request_id_var.reset(request_token)
+        service_var.reset(service_token)
+
+    def start_template(sender, template, context, **extra):
+        g.setdefault('template_started', []).append(time.perf_counter())
+
+    def finish_template(sender, template, context, **extra):
+        started = g.get('template_started')
+        if started:
+            TEMPLATE_LATENCY.observe(time.perf_counter() - started.pop(),
+                                     service=service, template=template.name)
+
+    before_render_template.connect(start_template, app, weak=False)
+    template_rendered.connect(finish_template, app, weak=False)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return app
+
+
+def _record_request(service, status):
+    if g.get('trace_recorded', True):
+        return
+    g.trace_recorded = True
+    REQUEST_LATENCY.observe(
+        time.perf_counter() - g.trace_started,
+        service=service,
+        method=request.method,
+        endpoint=_current_endpoint(),
+        status=str(status),
+    )
@@ -2,6 +2,7 @@
 Central configuration file for all three systems
 """
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -17,6 +18,29 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = timedelta(seconds=int(os.getenv('PERMANENT_SESSION_LIFETIME', 3600)))
     
+    # Logged-in users cached per process (seconds before other processes see a change; 0 turns it off)
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+    
+    # Password hashing (stored hashes made with other parameters are upgraded at login)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_POOL = os.getenv('PASSWORD_HASH_POOL', 'thread')  # thread or process
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))  # per process; 0 hashes inline
+    
+    # In-app notifications: cached unread counts and the Server-Sent Events stream.
+    # Streams are served by the gevent process at NOTIFICATION_STREAM_URL (see
+    # adoption_system/stream.py). Without it the web workers serve them, where each
+    # parks a gthread thread, so NOTIFICATION_MAX_STREAMS stays well below --threads.
+    UNREAD_COUNT_TTL = int(os.getenv('UNREAD_COUNT_TTL', 30))
+    NOTIFICATION_STREAM_URL = os.getenv('NOTIFICATION_STREAM_URL', '')  # e.g. http://localhost:5003
+    NOTIFICATION_STREAM_CONNECTIONS = int(os.getenv('NOTIFICATION_STREAM_CONNECTIONS', 1000))  # stream process cap
+    NOTIFICATION_TOKEN_MAX_AGE = int(os.getenv('NOTIFICATION_TOKEN_MAX_AGE', 3600))  # a page's stream token, like the session
+    NOTIFICATION_POLL_INTERVAL = float(os.getenv('NOTIFICATION_POLL_INTERVAL', 2.0))
+    NOTIFICATION_HEARTBEAT = int(os.getenv('NOTIFICATION_HEARTBEAT', 15))
+    NOTIFICATION_STREAM_LIFETIME = int(os.getenv('NOTIFICATION_STREAM_LIFETIME', 60))
+    NOTIFICATION_MAX_STREAMS = int(os.getenv('NOTIFICATION_MAX_STREAMS', 8))  # per web worker
+    
     # File Upload Configuration
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB
@@ -26,6 +50,67 @@ class Config:
     PETS_PER_PAGE = int(os.getenv('PETS_PER_PAGE', 12))
     RECORDS_PER_PAGE = int(os.getenv('RECORDS_PER_PAGE', 20))
     
+    # Shelter activity log: older rows move to compressed archive files
+    LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', 365))
+    LOG_ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'archive/shelter_logs')
+    # 'sync' writes each entry in the request; 'buffered' batches them in the background
+    AUDIT_LOG_MODE = os.getenv('AUDIT_LOG_MODE', 'sync')
+    AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', 200))
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', 2.0))
+    AUDIT_LOG_SPOOL = os.getenv('AUDIT_LOG_SPOOL', 'archive/audit_log_spool.jsonl')  # entries not yet in the database
+    
+    # Chatbot data snapshots (seconds before counts and lists are rebuilt)
+    CHATBOT_SNAPSHOT_TTL = int(os.getenv('CHATBOT_SNAPSHOT_TTL', 30))
+    
+    # Browse facet counts, cached per filter combination
+    FACET_CACHE_TTL = int(os.getenv('FACET_CACHE_TTL', 60))
+    
+    # Trait bitmap index: catch up with other workers' writes / full rebuild (seconds)
+    TRAIT_INDEX_REFRESH = int(os.getenv('TRAIT_INDEX_REFRESH', 30))
+    TRAIT_INDEX_REBUILD = int(os.getenv('TRAIT_INDEX_REBUILD', 600))
+    
+    # Similar pets kept per available pet
+    SIMILAR_PETS_NEIGHBOURS = int(os.getenv('SIMILAR_PETS_NEIGHBOURS', 8))
+    
+    # Pet feature matrix used for recommendations (seconds before it is refetched)
+    RECOMMENDATION_SNAPSHOT_TTL = int(os.getenv('RECOMMENDATION_SNAPSHOT_TTL', 300))
+    
+    # Request threads per worker process; the Procfile passes the same value to gunicorn --threads
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 64))
+    
+    # Concurrent lookups per page: overall deadline (seconds) and shared pool size.
+    # A page fans out up to 4 calls, so the pool covers every request thread doing so at once
+    FANOUT_DEADLINE = float(os.getenv('FANOUT_DEADLINE', 3.0))
+    FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', WEB_THREADS * 4))
+    
+    # Per-request SQL profiler (Server-Timing header and slow/N+1 query log)
+    SQL_PROFILER = os.getenv('SQL_PROFILER', 'False') == 'True'
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+    SQL_PROFILER_QUERY_LIMIT = int(os.getenv('SQL_PROFILER_QUERY_LIMIT', 25))
+    
+    # /readyz: seconds a probe result is reused, and per-dependency timeout
+    READINESS_CACHE_TTL = float(os.getenv('READINESS_CACHE_TTL', 5))
+    READINESS_TIMEOUT = float(os.getenv('READINESS_TIMEOUT', 1.0))
+    
+    # /metrics across gunicorn workers: each worker writes a snapshot under
+    # METRICS_DIR/<service> every METRICS_FLUSH_INTERVAL seconds and /metrics sums them
+    # (unset: every worker reports only its own requests)
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5.0))
+    
+    # Token-bucket rate limits: "endpoint=rate/burst per client[,rate/burst for the route];..."
+    # (rates per second; buckets are per process unless RATE_LIMIT_STORAGE names a shared SQLite file)
+    # Opt-in; set SERVICE_TOKEN too so the systems' calls to each other are never limited
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'False') == 'True'
+    RATE_LIMITS = os.getenv(
+        'RATE_LIMITS',
+        'pets_api.get_all_pets=5/20,50/100;chatbot.chat=1/5,10/20;health_api.get_all_records=2/10,20/40'
+    )
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', '')
+    RATE_LIMIT_EXEMPT = os.getenv('RATE_LIMIT_EXEMPT', '127.0.0.1/32,::1/128')  # the systems calling each other
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', 0))  # proxies that append to X-Forwarded-For
+    SERVICE_TOKEN = os.getenv('SERVICE_TOKEN', '')  # shared secret the systems send each other
+    
     # System URLs
     ADOPTION_SYSTEM_URL = os.getenv('ADOPTION_SYSTEM_URL', 'http://localhost:5000')
     SHELTER_SYSTEM_URL = os.getenv('SHELTER_SYSTEM_URL', 'http://localhost:5001')
@@ -39,6 +124,13 @@ class Config:
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
     
+    # Local caches of external API data (must be writable; /tmp on serverless)
+    CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pet_adoption_cache'))
+    BREED_CATALOG_TTL = int(os.getenv('BREED_CATALOG_TTL', 604800))  # 1 week
+    BREED_MEDIA_TTL = int(os.getenv('BREED_MEDIA_TTL', 604800))
+    BREED_MEDIA_NEGATIVE_TTL = int(os.getenv('BREED_MEDIA_NEGATIVE_TTL', 86400))  # unknown breeds
+    BREED_MEDIA_CACHE_SIZE = int(os.getenv('BREED_MEDIA_CACHE_SIZE', 1000))
+    
     # API Keys
     CAT_API_KEY = os.getenv('CAT_API_KEY', '')
     DOG_API_KEY = os.getenv('DOG_API_KEY', '')  # Not needed for dog.ceo
@@ -46,6 +138,12 @@ class Config:
     # Google Calendar
     GOOGLE_CALENDAR_CREDENTIALS_FILE = os.getenv('GOOGLE_CALENDAR_CREDENTIALS_FILE', 'credentials.json')
     GOOGLE_CALENDAR_TOKEN_FILE = os.getenv('GOOGLE_CALENDAR_TOKEN_FILE', 'token.json')
+    GOOGLE_CALENDAR_ID = os.getenv('GOOGLE_CALENDAR_ID', 'primary')
+    GOOGLE_CALENDAR_API_ENDPOINT = os.getenv('GOOGLE_CALENDAR_API_ENDPOINT', '')  # e.g. a local stand-in server
+    CALENDAR_SYNC = os.getenv('CALENDAR_SYNC', 'False') == 'True'  # push appointment changes in the background
+    CALENDAR_SYNC_INTERVAL = float(os.getenv('CALENDAR_SYNC_INTERVAL', 5))
+    CALENDAR_SYNC_BATCH_SIZE = int(os.getenv('CALENDAR_SYNC_BATCH_SIZE', 50))  # the batch API allows 50 calls
+    CALENDAR_PULL_INTERVAL = float(os.getenv('CALENDAR_PULL_INTERVAL', 60))  # 0 turns off pulling calendar changes
     
     @staticmethod
     def allowed_file(filename):
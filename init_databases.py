@@ -19,10 +19,11 @@ def init_adoption_system():
         
         # Import from adoption system
         from adoption_system.app import app, db
-        from adoption_system.models import User, AdoptionApplication, AdoptedPet, Notification
+        from adoption_system.models import User, AdoptionApplication, AdoptedPet, Notification, create_missing_indexes
         
         with app.app_context():
             db.create_all()
+            create_missing_indexes()
             print("✓ Adoption System database tables created")
         
         return True
@@ -44,10 +45,12 @@ def init_shelter_system():
         
         # Import from shelter system
         from shelter_system.app import app, db
-        from shelter_system.models import Pet, PetImage, ShelterLog
+        from shelter_system.models import Pet, PetImage, ShelterLog, create_missing_indexes, lowercase_pet_traits
         
         with app.app_context():
             db.create_all()
+            create_missing_indexes()
+            lowercase_pet_traits()
             print("✓ Shelter System database tables created")
         
         return True
@@ -69,10 +72,11 @@ def init_veterinary_system():
         
         # Import from veterinary system
         from veterinary_system.app import app, db
-        from veterinary_system.models import Vet, VetRecord, Appointment
+        from veterinary_system.models import Vet, VetRecord, Appointment, create_missing_indexes
         
         with app.app_context():
             db.create_all()
+            create_missing_indexes()
             print("✓ Veterinary System database tables created")
         
         return True
@@ -91,17 +95,17 @@ def seed_sample_data():
     try:
         from adoption_system.app import app, db
         from adoption_system.models import User
-        from werkzeug.security import generate_password_hash
+        from adoption_system.utils.passwords import hash_password
         
         with app.app_context():
             if User.query.count() == 0:
                 users = [
                     User(name='John Adopter', email='adopter@example.com',
-                         password=generate_password_hash('password123'), role='adopter'),
+                         password=hash_password('password123'), role='adopter'),
                     User(name='Shelter Manager', email='shelter@example.com',
-                         password=generate_password_hash('password123'), role='shelter'),
+                         password=hash_password('password123'), role='shelter'),
                     User(name='Dr. Veterinarian', email='vet@example.com',
-                         password=generate_password_hash('password123'), role='vet'),
+                         password=hash_password('password123'), role='vet'),
                 ]
                 for user in users:
                     db.session.add(user)
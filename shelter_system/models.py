@@ -2,11 +2,25 @@
 Database models for Shelter Inventory System
 """
 from datetime import datetime
+from sqlalchemy.orm import validates
 from shelter_system.extensions import db
 
+# Stored lowercased and filtered by equality
+LOWERCASE_TRAITS = ('size', 'energy_level')
+
+
 class Pet(db.Model):
     """Pet model for shelter inventory"""
     __tablename__ = 'pets'
+    __table_args__ = (
+        # Listing filters always start from status, then narrow by species/age or fee
+        db.Index('ix_pets_status_species_age', 'status', 'species', 'age'),
+        db.Index('ix_pets_status_fee', 'status', 'adoption_fee'),
+        db.Index('ix_pets_status_created', 'status', 'created_at'),
+        # Trait filters (equality on lowercased values), listed newest first
+        db.Index('ix_pets_status_size_created', 'status', 'size', 'created_at'),
+        db.Index('ix_pets_status_energy_created', 'status', 'energy_level', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -52,6 +66,11 @@ class Pet(db.Model):
     images = db.relationship('PetImage', backref='pet', lazy=True, cascade='all, delete-orphan')
     logs = db.relationship('ShelterLog', backref='pet', lazy=True, cascade='all, delete-orphan')
     
+    @validates(*LOWERCASE_TRAITS)
+    def lowercase_trait(self, key, value):
+        """Listing filters compare these with == so they can use the index"""
+        return value.strip().lower() if isinstance(value, str) else value
+    
     def to_dict(self):
         """Convert pet to dictionary"""
         return {
@@ -118,6 +137,11 @@ class PetImage(db.Model):
 class ShelterLog(db.Model):
     """Log of pet status changes and activities"""
     __tablename__ = 'shelter_logs'
+    __table_args__ = (
+        # Per-pet history pages and the shelter-wide feed / archival scan
+        db.Index('ix_shelter_logs_pet_timestamp', 'pet_id', 'timestamp'),
+        db.Index('ix_shelter_logs_timestamp', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
@@ -139,3 +163,19 @@ class ShelterLog(db.Model):
     
     def __repr__(self):
         return f'<ShelterLog {self.action} - Pet {self.pet_id}>'
+
+
+def create_missing_indexes():
+    """Create indexes added after the tables were first created (create_all skips existing tables)"""
+    for model in (Pet, PetImage, ShelterLog):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def lowercase_pet_traits():
+    """Lowercase size and energy level on rows stored before they were normalised on write"""
+    for field in LOWERCASE_TRAITS:
+        column = getattr(Pet, field)
+        normalised = db.func.lower(db.func.trim(column))
+        db.session.execute(db.update(Pet).where(column != normalised).values({field: normalised}))
+    db.session.commit()
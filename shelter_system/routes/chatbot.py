@@ -12,6 +12,91 @@ bp = Blueprint('chatbot', __name__, url_prefix='/chatbot')
 
 from shelter_system.extensions import db
 from shelter_system.models import Pet, PetImage, ShelterLog
+from common.intent_router import IntentRouter, SPECIES_TERMS, COMMON_BREEDS, breed_terms
+from common.snapshot import SnapshotCache
+from config import ShelterSystemConfig
+
+# Intents are checked in registration order, first match wins
+router = IntentRouter()
+router.add_slot('species', SPECIES_TERMS)
+router.add_slot('breed', breed_terms(COMMON_BREEDS))
+router.add_intent('greeting', ['hello', 'hi', 'hey', 'greetings'])
+router.add_intent('help', ['help', 'what can you do'])
+router.add_intent('stats', ['how many', 'total', 'statistics', 'stats'])
+router.add_intent('available', ['available', 'ready for adoption'])
+router.add_intent('pending', ['pending'])
+router.add_intent('adopted', ['adopted', 'found home'])
+router.add_intent('search', ['find', 'search', 'show me', 'looking for'])
+router.add_intent('vaccinated', ['vaccinated', 'vaccination*'])
+router.add_intent('microchipped', ['microchip*'])
+router.add_intent('spayed_neutered', ['spay*', 'neuter*'])
+router.add_intent('activity', ['recent', 'latest', 'activity'])
+router.add_intent('kids', ['kid*', 'children'])
+
+
+def pet_summary(pet):
+    """Plain copy of the pet fields the chatbot lists"""
+    return {
+        'id': pet.id,
+        'name': pet.name,
+        'species': pet.species,
+        'breed': pet.breed,
+        'age': pet.age,
+        'gender': pet.gender,
+        'status': pet.status,
+    }
+
+
+def build_snapshot():
+    """Collect the counts and short lists the chatbot answers from"""
+    def count_if(*conditions):
+        return db.func.sum(db.case((db.and_(*conditions), 1), else_=0))
+    
+    row = db.session.query(
+        db.func.count(Pet.id),
+        count_if(Pet.status == 'available'),
+        count_if(Pet.status == 'pending'),
+        count_if(Pet.status == 'adopted'),
+        count_if(Pet.species == 'dog'),
+        count_if(Pet.species == 'cat'),
+        count_if(Pet.species == 'dog', Pet.status == 'available'),
+        count_if(Pet.species == 'cat', Pet.status == 'available'),
+        count_if(Pet.vaccinated == True),
+        count_if(Pet.microchipped == True),
+        count_if(Pet.spayed_neutered == True),
+        count_if(Pet.good_with_kids == True, Pet.status == 'available'),
+    ).one()
+    keys = ['total_pets', 'available', 'pending', 'adopted', 'dogs', 'cats',
+            'dogs_available', 'cats_available', 'vaccinated', 'microchipped',
+            'spayed_neutered', 'kids_available']
+    counts = {key: value or 0 for key, value in zip(keys, row)}
+    
+    def first(query, limit):
+        return [pet_summary(pet) for pet in query.limit(limit).all()]
+    
+    logs = db.session.query(ShelterLog, Pet.name).outerjoin(
+        Pet, Pet.id == ShelterLog.pet_id
+    ).order_by(ShelterLog.timestamp.desc()).limit(5).all()
+    
+    return {
+        'counts': counts,
+        'available': {
+            None: first(Pet.query.filter_by(status='available'), 5),
+            'dog': first(Pet.query.filter_by(species='dog', status='available'), 5),
+            'cat': first(Pet.query.filter_by(species='cat', status='available'), 5),
+        },
+        'pending': first(Pet.query.filter_by(status='pending'), 5),
+        'adopted': first(Pet.query.filter_by(status='adopted'), 5),
+        'kids': first(Pet.query.filter_by(good_with_kids=True, status='available'), 3),
+        'activity': [
+            {'action': log.action, 'description': log.description, 'pet_name': pet_name or 'Unknown'}
+            for log, pet_name in logs
+        ],
+    }
+
+
+snapshot = SnapshotCache(build_snapshot, ttl=ShelterSystemConfig.CHATBOT_SNAPSHOT_TTL)
+snapshot.invalidate_on_commit(Pet, ShelterLog)
 
 @bp.route('/')
 def chatbot_page():
@@ -34,14 +119,17 @@ def chat():
 
 def process_query(message):
     """Process user query and return appropriate response"""
-    
-    # Greetings
-    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
-        return "Hello! 👋 I'm the Shelter Assistant. I can help you with information about our pets, statistics, and more. Try asking 'How many pets do we have?' or 'Show me available dogs'."
-    
-    # Help
-    if 'help' in message or 'what can you do' in message:
-        return """I can help you with:
+    match = router.route(message)
+    handler = HANDLERS.get(match.intent, answer_default)
+    return handler(message, match)
+
+
+def answer_greeting(message, match):
+    return "Hello! 👋 I'm the Shelter Assistant. I can help you with information about our pets, statistics, and more. Try asking 'How many pets do we have?' or 'Show me available dogs'."
+
+
+def answer_help(message, match):
+    return """I can help you with:
         
 📊 Statistics: "How many pets do we have?"
 🐕 Dogs: "Show me dogs" or "How many dogs?"
@@ -53,100 +141,99 @@ def process_query(message):
 💉 Medical info: "Vaccinated pets" or "Microchipped pets"
 
 Just ask naturally!"""
+
+
+def answer_stats(message, match):
+    """Statistics queries"""
+    counts = snapshot.get()['counts']
+    species = match.get('species')
     
-    # Statistics queries
-    if 'how many' in message or 'total' in message or 'statistics' in message or 'stats' in message:
-        total_pets = Pet.query.count()
-        available = Pet.query.filter_by(status='available').count()
-        pending = Pet.query.filter_by(status='pending').count()
-        adopted = Pet.query.filter_by(status='adopted').count()
-        dogs = Pet.query.filter_by(species='dog').count()
-        cats = Pet.query.filter_by(species='cat').count()
-        
-        if 'dog' in message:
-            return f"🐕 We currently have **{dogs} dogs** in our shelter ({Pet.query.filter_by(species='dog', status='available').count()} available for adoption)."
-        elif 'cat' in message:
-            return f"🐱 We currently have **{cats} cats** in our shelter ({Pet.query.filter_by(species='cat', status='available').count()} available for adoption)."
-        else:
-            return f"""📊 **Shelter Statistics:**
+    if species == 'dog':
+        return f"🐕 We currently have **{counts['dogs']} dogs** in our shelter ({counts['dogs_available']} available for adoption)."
+    elif species == 'cat':
+        return f"🐱 We currently have **{counts['cats']} cats** in our shelter ({counts['cats_available']} available for adoption)."
+    
+    return f"""📊 **Shelter Statistics:**
             
-🐾 Total Pets: **{total_pets}**
-✅ Available: **{available}**
-⏳ Pending Adoption: **{pending}**
-🏠 Adopted: **{adopted}**
-🐕 Dogs: **{dogs}**
-🐱 Cats: **{cats}**"""
-    
-    # Available pets
-    if 'available' in message or 'ready for adoption' in message:
-        if 'dog' in message:
-            pets = Pet.query.filter_by(species='dog', status='available').limit(5).all()
-            species_name = "dogs"
-        elif 'cat' in message:
-            pets = Pet.query.filter_by(species='cat', status='available').limit(5).all()
-            species_name = "cats"
-        else:
-            pets = Pet.query.filter_by(status='available').limit(5).all()
-            species_name = "pets"
-        
-        if not pets:
-            return f"Currently, we don't have any available {species_name}. Please check back soon!"
-        
-        response = f"✅ **Available {species_name.title()}:**\n\n"
-        for pet in pets:
-            response += f"• **{pet.name}** - {pet.breed or pet.species.title()} ({pet.age} years old, {pet.gender})\n"
-        
-        if len(pets) == 5:
-            response += f"\n...and more! Visit /pets to see all available {species_name}."
-        
-        return response
+🐾 Total Pets: **{counts['total_pets']}**
+✅ Available: **{counts['available']}**
+⏳ Pending Adoption: **{counts['pending']}**
+🏠 Adopted: **{counts['adopted']}**
+🐕 Dogs: **{counts['dogs']}**
+🐱 Cats: **{counts['cats']}**"""
+
+
+def answer_available(message, match):
+    """Available pets"""
+    species = match.get('species')
+    pets = snapshot.get()['available'][species]
+    species_name = {'dog': 'dogs', 'cat': 'cats'}.get(species, 'pets')
     
-    # Pending adoptions
-    if 'pending' in message:
-        pets = Pet.query.filter_by(status='pending').limit(5).all()
-        
-        if not pets:
-            return "Great news! We have no pending adoptions right now. All our pets are either available or already in loving homes! 🏠"
-        
-        response = "⏳ **Pets Pending Adoption:**\n\n"
-        for pet in pets:
-            response += f"• **{pet.name}** - {pet.breed or pet.species.title()} (Adoption in progress)\n"
-        
-        return response
+    if not pets:
+        return f"Currently, we don't have any available {species_name}. Please check back soon!"
     
-    # Adopted pets
-    if 'adopted' in message or 'found home' in message:
-        pets = Pet.query.filter_by(status='adopted').limit(5).all()
-        count = Pet.query.filter_by(status='adopted').count()
-        
-        if not pets:
-            return "We're working on finding homes for all our pets! No successful adoptions yet, but we're hopeful! 💕"
-        
-        response = f"🏠 **Recently Adopted Pets** ({count} total):\n\n"
-        for pet in pets:
-            response += f"• **{pet.name}** - {pet.breed or pet.species.title()} (Found forever home! 💕)\n"
-        
-        return response
+    response = f"✅ **Available {species_name.title()}:**\n\n"
+    for pet in pets:
+        response += f"• **{pet['name']}** - {pet['breed'] or pet['species'].title()} ({pet['age']} years old, {pet['gender']})\n"
     
-    # Search by name
-    if 'find' in message or 'search' in message or 'show me' in message or 'looking for' in message:
-        # Extract potential pet name or breed
-        words = message.split()
-        search_term = None
-        
-        for i, word in enumerate(words):
-            if word in ['find', 'search', 'show', 'looking', 'for', 'me']:
-                if i + 1 < len(words):
-                    search_term = words[i + 1].title()
-                    break
+    if len(pets) == 5:
+        response += f"\n...and more! Visit /pets to see all available {species_name}."
+    
+    return response
+
+
+def answer_pending(message, match):
+    """Pending adoptions"""
+    pets = snapshot.get()['pending']
+    
+    if not pets:
+        return "Great news! We have no pending adoptions right now. All our pets are either available or already in loving homes! 🏠"
+    
+    response = "⏳ **Pets Pending Adoption:**\n\n"
+    for pet in pets:
+        response += f"• **{pet['name']}** - {pet['breed'] or pet['species'].title()} (Adoption in progress)\n"
+    
+    return response
+
+
+def answer_adopted(message, match):
+    """Adopted pets"""
+    data = snapshot.get()
+    pets = data['adopted']
+    count = data['counts']['adopted']
+    
+    if not pets:
+        return "We're working on finding homes for all our pets! No successful adoptions yet, but we're hopeful! 💕"
+    
+    response = f"🏠 **Recently Adopted Pets** ({count} total):\n\n"
+    for pet in pets:
+        response += f"• **{pet['name']}** - {pet['breed'] or pet['species'].title()} (Found forever home! 💕)\n"
+    
+    return response
+
+
+def answer_search(message, match):
+    """Search by name or breed"""
+    # Extract potential pet name or breed
+    words = message.split()
+    search_term = None
+    
+    for i, word in enumerate(words):
+        if word in ['find', 'search', 'show', 'looking', 'for', 'me']:
+            if i + 1 < len(words):
+                search_term = words[i + 1].title()
+                break
+    
+    breed = match.get('breed')
+    if not search_term and not breed:
+        return "Please specify what you're looking for. Try: 'Find Max' or 'Show me Golden Retrievers'"
+    
+    if search_term:
+        # Search by name first
+        pet = Pet.query.filter(Pet.name.ilike(f'%{search_term}%')).first()
         
-        if search_term:
-            # Search by name first
-            pet = Pet.query.filter(Pet.name.ilike(f'%{search_term}%')).first()
-            
-            if pet:
-                images = "with photos" if pet.images else "no photos yet"
-                return f"""🔍 **Found: {pet.name}**
+        if pet:
+            return f"""🔍 **Found: {pet.name}**
                 
 📋 **Details:**
 • Species: {pet.species.title()}
@@ -166,65 +253,71 @@ Just ask naturally!"""
 • Pets: {'✅ Yes' if pet.good_with_pets else '❌ No'}
 
 View full details at: /pets/{pet.id}/view"""
-            
-            # Search by breed
-            pets = Pet.query.filter(Pet.breed.ilike(f'%{search_term}%')).limit(5).all()
-            if pets:
-                response = f"🔍 **Found {len(pets)} {search_term}(s):**\n\n"
-                for pet in pets:
-                    response += f"• **{pet.name}** ({pet.age} years, {pet.status})\n"
-                return response
-            
-            return f"Sorry, I couldn't find any pets matching '{search_term}'. Try asking 'Show me available dogs' or 'How many cats do we have?'"
-        
-        return "Please specify what you're looking for. Try: 'Find Max' or 'Show me Golden Retrievers'"
     
-    # Medical information
-    if 'vaccinated' in message or 'vaccination' in message:
-        vaccinated_count = Pet.query.filter_by(vaccinated=True).count()
-        total = Pet.query.count()
-        return f"💉 **{vaccinated_count} out of {total} pets** are fully vaccinated ({int(vaccinated_count/total*100)}%)! We take pet health seriously! 🏥"
-    
-    if 'microchip' in message:
-        microchipped_count = Pet.query.filter_by(microchipped=True).count()
-        total = Pet.query.count()
-        return f"📍 **{microchipped_count} out of {total} pets** are microchipped ({int(microchipped_count/total*100)}%)! This helps reunite lost pets with their families! 🔍"
-    
-    if 'spay' in message or 'neuter' in message:
-        fixed_count = Pet.query.filter_by(spayed_neutered=True).count()
-        total = Pet.query.count()
-        return f"✂️ **{fixed_count} out of {total} pets** are spayed/neutered ({int(fixed_count/total*100)}%)! This is important for pet health and population control! 🏥"
-    
-    # Activity logs
-    if 'recent' in message or 'latest' in message or 'activity' in message:
-        logs = ShelterLog.query.order_by(ShelterLog.timestamp.desc()).limit(5).all()
-        
-        if not logs:
-            return "No recent activity to show."
-        
-        response = "📝 **Recent Activity:**\n\n"
-        for log in logs:
-            pet = Pet.query.get(log.pet_id)
-            pet_name = pet.name if pet else "Unknown"
-            response += f"• {log.action.title()}: {pet_name} - {log.description}\n"
-        
-        return response
-    
-    # Good with kids/pets
-    if 'kid' in message or 'children' in message:
-        count = Pet.query.filter_by(good_with_kids=True, status='available').count()
-        pets = Pet.query.filter_by(good_with_kids=True, status='available').limit(3).all()
-        
-        if not pets:
-            return "We're currently updating our pet profiles. Please check back soon!"
-        
-        response = f"👶 **{count} available pets are great with kids!**\n\n"
+    # Search by breed, preferring the full breed name when one was recognised
+    breed_term = breed or search_term
+    pets = Pet.query.filter(Pet.breed.ilike(f'%{breed_term}%')).limit(5).all()
+    if pets:
+        response = f"🔍 **Found {len(pets)} {breed_term}(s):**\n\n"
         for pet in pets:
-            response += f"• **{pet.name}** - {pet.breed or pet.species.title()}\n"
-        
+            response += f"• **{pet.name}** ({pet.age} years, {pet.status})\n"
         return response
     
-    # Default response
+    return f"Sorry, I couldn't find any pets matching '{breed_term}'. Try asking 'Show me available dogs' or 'How many cats do we have?'"
+
+
+def answer_vaccinated(message, match):
+    counts = snapshot.get()['counts']
+    vaccinated_count = counts['vaccinated']
+    total = counts['total_pets']
+    return f"💉 **{vaccinated_count} out of {total} pets** are fully vaccinated ({int(vaccinated_count/total*100)}%)! We take pet health seriously! 🏥"
+
+
+def answer_microchipped(message, match):
+    counts = snapshot.get()['counts']
+    microchipped_count = counts['microchipped']
+    total = counts['total_pets']
+    return f"📍 **{microchipped_count} out of {total} pets** are microchipped ({int(microchipped_count/total*100)}%)! This helps reunite lost pets with their families! 🔍"
+
+
+def answer_spayed_neutered(message, match):
+    counts = snapshot.get()['counts']
+    fixed_count = counts['spayed_neutered']
+    total = counts['total_pets']
+    return f"✂️ **{fixed_count} out of {total} pets** are spayed/neutered ({int(fixed_count/total*100)}%)! This is important for pet health and population control! 🏥"
+
+
+def answer_activity(message, match):
+    """Activity logs"""
+    logs = snapshot.get()['activity']
+    
+    if not logs:
+        return "No recent activity to show."
+    
+    response = "📝 **Recent Activity:**\n\n"
+    for log in logs:
+        response += f"• {log['action'].title()}: {log['pet_name']} - {log['description']}\n"
+    
+    return response
+
+
+def answer_kids(message, match):
+    """Good with kids/pets"""
+    data = snapshot.get()
+    count = data['counts']['kids_available']
+    pets = data['kids']
+    
+    if not pets:
+        return "We're currently updating our pet profiles. Please check back soon!"
+    
+    response = f"👶 **{count} available pets are great with kids!**\n\n"
+    for pet in pets:
+        response += f"• **{pet['name']}** - {pet['breed'] or pet['species'].title()}\n"
+    
+    return response
+
+
+def answer_default(message, match):
     return """I'm not sure how to answer that. Here are some things you can ask me:
 
 💬 "How many pets do we have?"
@@ -234,3 +327,19 @@ View full details at: /pets/{pet.id}/view"""
 💬 "Recent activity"
 
 Or just type 'help' to see all my features!"""
+
+
+HANDLERS = {
+    'greeting': answer_greeting,
+    'help': answer_help,
+    'stats': answer_stats,
+    'available': answer_available,
+    'pending': answer_pending,
+    'adopted': answer_adopted,
+    'search': answer_search,
+    'vaccinated': answer_vaccinated,
+    'microchipped': answer_microchipped,
+    'spayed_neutered': answer_spayed_neutered,
+    'activity': answer_activity,
+    'kids': answer_kids,
+}
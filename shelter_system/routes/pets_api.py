@@ -3,6 +3,7 @@ API routes for Shelter System
 Provides REST API for adoption system to access pet data
 """
 from flask import Blueprint, jsonify, request
+from werkzeug.datastructures import MultiDict
 from datetime import datetime
 import sys
 import os
@@ -12,47 +13,92 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 bp = Blueprint('pets_api', __name__, url_prefix='/api')
 
 from shelter_system.extensions import db
-from shelter_system.models import Pet, PetImage, ShelterLog
+from shelter_system.models import Pet, PetImage, ShelterLog, LOWERCASE_TRAITS
+from shelter_system.utils.trait_index import TraitIndex
+from shelter_system.utils.similarity import SimilarityIndex
+from shelter_system.utils.activity_log import recent_logs, archived_logs
+from shelter_system.utils.audit_log import audit_log
+from common.snapshot import KeyedSnapshotCache
+from config import ShelterSystemConfig
 
-@bp.route('/pets/', methods=['GET'])
-def get_all_pets():
-    """Get all pets with filtering and pagination"""
-    # Get query parameters
-    species = request.args.get('species', 'all')
-    breed = request.args.get('breed', '')
-    age = request.args.get('age', '')
-    gender = request.args.get('gender', '')
-    status = request.args.get('status', 'available')
-    search = request.args.get('search', '')
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 12, type=int)
-    
-    # Build query
-    query = Pet.query
+BOOLEAN_FILTERS = [
+    'vaccinated', 'spayed_neutered', 'microchipped',
+    'good_with_kids', 'good_with_pets', 'good_with_dogs', 'good_with_cats'
+]
+
+
+def parse_bool(value):
+    """Parse a boolean query parameter, None if absent or unrecognised"""
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    return None
+
+
+def apply_pet_filters(query, args):
+    """Apply the listing filters from query parameters to a Pet query"""
+    status = args.get('status', 'available')
+    species = args.get('species', 'all')
+    breed = args.get('breed', '')
+    age = args.get('age', '')
+    gender = args.get('gender', '')
+    search = args.get('search', '')
     
     # Filter by status (default to available only)
     if status != 'all':
-        query = query.filter_by(status=status)
+        query = query.filter(Pet.status == status)
     
     # Filter by species
-    if species != 'all':
-        query = query.filter_by(species=species)
+    if species and species != 'all':
+        query = query.filter(Pet.species == species)
     
     # Filter by breed
     if breed:
         query = query.filter(Pet.breed.ilike(f'%{breed}%'))
     
-    # Filter by age
+    # Filter by exact age or age range
     if age:
         try:
-            age_val = int(age)
-            query = query.filter_by(age=age_val)
+            query = query.filter(Pet.age == int(age))
         except ValueError:
             pass
     
+    age_min = args.get('age_min', type=int)
+    if age_min is not None:
+        query = query.filter(Pet.age >= age_min)
+    
+    age_max = args.get('age_max', type=int)
+    if age_max is not None:
+        query = query.filter(Pet.age <= age_max)
+    
+    fee_max = args.get('fee_max', type=float)
+    if fee_max is not None:
+        query = query.filter(Pet.adoption_fee <= fee_max)
+    
+    # Filter by an explicit id list, e.g. "3,17,42"
+    ids = args.get('ids', '')
+    if ids:
+        # isdecimal, not isdigit: '²' is a digit that int() rejects
+        query = query.filter(Pet.id.in_([int(i) for i in ids.split(',') if i.strip().isdecimal()]))
+    
     # Filter by gender
     if gender:
-        query = query.filter_by(gender=gender)
+        query = query.filter(Pet.gender == gender)
+    
+    # Stored lowercased, so equality can use the status/trait/created_at indexes
+    for field in LOWERCASE_TRAITS:
+        value = args.get(field, '').strip().lower()
+        if value:
+            query = query.filter(getattr(Pet, field) == value)
+    
+    for field in BOOLEAN_FILTERS:
+        value = parse_bool(args.get(field))
+        if value is not None:
+            query = query.filter(getattr(Pet, field) == value)
     
     # Search by name or description
     if search:
@@ -64,6 +110,17 @@ def get_all_pets():
             )
         )
     
+    return query
+
+
+@bp.route('/pets/', methods=['GET'])
+def get_all_pets():
+    """Get all pets with filtering and pagination"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 12, type=int)
+    
+    query = apply_pet_filters(Pet.query, request.args)
+    
     # Paginate
     pagination = query.order_by(Pet.created_at.desc()).paginate(
         page=page,
@@ -80,6 +137,151 @@ def get_all_pets():
     })
 
 
+# Upper bound (inclusive) and label of each age bucket
+AGE_BUCKETS = [(1, '0-1'), (3, '2-3'), (7, '4-7'), (None, '8+')]
+
+# Listing parameters that do not change which pets match
+NON_FILTER_ARGS = {'page', 'per_page'}
+
+# The parameters that filter each facet; a facet is counted without its own
+# (disjunctive faceting), so picking a species still shows the other species
+FACET_PARAMS = {
+    'species': ('species',),
+    'breed': ('breed',),
+    'size': ('size',),
+    'age': ('age', 'age_min', 'age_max'),
+    'gender': ('gender',),
+}
+FACET_PARAMS.update({field: (field,) for field in BOOLEAN_FILTERS})
+
+
+def age_bucket_column():
+    """SQL expression mapping age to its bucket label"""
+    whens = [(Pet.age <= upper, label) for upper, label in AGE_BUCKETS if upper is not None]
+    return db.case((Pet.age == None, 'unknown'), *whens, else_=AGE_BUCKETS[-1][1])
+
+
+def build_facets(signature):
+    """Count pets per facet value for one filter combination in a single grouped query"""
+    args = MultiDict(signature)
+    grouped = [Pet.species, Pet.breed, db.func.lower(Pet.size), age_bucket_column(), Pet.gender]
+    grouped += [getattr(Pet, field) for field in BOOLEAN_FILTERS]
+    
+    query = apply_pet_filters(db.session.query(*grouped, db.func.count(Pet.id)), args)
+    rows = query.group_by(*grouped).all()
+    
+    names = ['species', 'breed', 'size', 'age', 'gender']
+    facets = {name: {} for name in names}
+    traits = {field: 0 for field in BOOLEAN_FILTERS}
+    total = 0
+    
+    for row in rows:
+        count = row[-1]
+        total += count
+        for name, value in zip(names, row):
+            key = value if value not in (None, '') else 'unknown'
+            facets[name][key] = facets[name].get(key, 0) + count
+        for field, value in zip(BOOLEAN_FILTERS, row[len(names):-1]):
+            if value:
+                traits[field] += count
+    
+    facets['traits'] = traits
+    return {'total': total, 'facets': facets}
+
+
+facet_cache = KeyedSnapshotCache(build_facets, ttl=ShelterSystemConfig.FACET_CACHE_TTL)
+facet_cache.invalidate_on_commit(Pet)
+
+
+@bp.route('/pets/facets', methods=['GET'])
+def get_pet_facets():
+    """
+    Get counts per species, breed, size, age bucket, gender and trait for the current filters
+    
+    total applies every filter. Each facet's counts apply every filter but
+    its own, so one grouped query runs (and is cached) per filter signature:
+    the full one plus one per facet that is being filtered on.
+    """
+    signature = tuple(sorted(
+        (key, value) for key, value in request.args.items(multi=True)
+        if key not in NON_FILTER_ARGS and value != ''
+    ))
+    result = facet_cache.get(signature)
+    facets = dict(result['facets'])
+    traits = dict(facets['traits'])
+    
+    for name, params in FACET_PARAMS.items():
+        others = tuple((key, value) for key, value in signature if key not in params)
+        if others == signature:
+            continue
+        counts = facet_cache.get(others)['facets']
+        if name in traits:
+            traits[name] = counts['traits'][name]
+        else:
+            facets[name] = counts[name]
+    
+    facets['traits'] = traits
+    return jsonify({'total': result['total'], 'facets': facets})
+
+
+trait_index = TraitIndex(
+    Pet,
+    refresh_interval=ShelterSystemConfig.TRAIT_INDEX_REFRESH,
+    rebuild_interval=ShelterSystemConfig.TRAIT_INDEX_REBUILD
+).watch()
+
+
+@bp.route('/pets/match', methods=['POST'])
+def match_pets():
+    """Find available pets by an AND/OR trait combination using the bitmap index"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        page = max(int(data.get('page', 1)), 1)
+        per_page = min(max(int(data.get('per_page', 12)), 1), 100)
+        result = trait_index.ensure_current().search(data.get('where', {}), page, per_page)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = {
+        'ids': result['ids'],
+        'total': result['total'],
+        'pages': -(-result['total'] // per_page),
+        'current_page': page,
+        'per_page': per_page
+    }
+    
+    if data.get('include_pets') and result['ids']:
+        # One IN query for the page, returned in index order
+        pets = {pet.id: pet for pet in Pet.query.filter(Pet.id.in_(result['ids'])).all()}
+        response['pets'] = [pets[pet_id].to_dict() for pet_id in result['ids'] if pet_id in pets]
+    
+    return jsonify(response)
+
+
+# Columns the adoption system scores adopters against
+FEATURE_COLUMNS = [
+    'id', 'species', 'age', 'size', 'energy_level', 'shedding', 'trainability',
+    'good_with_kids', 'good_with_pets', 'good_with_dogs', 'good_with_cats', 'special_needs'
+]
+
+
+@bp.route('/pets/features', methods=['GET'])
+def get_pet_features():
+    """Get the matching features of every available pet as parallel column lists"""
+    columns = [getattr(Pet, name) for name in FEATURE_COLUMNS]
+    rows = db.session.execute(db.select(*columns).where(Pet.status == 'available')).all()
+    
+    data = {name: list(values) for name, values in zip(FEATURE_COLUMNS, zip(*rows))}
+    if rows:
+        # Only whether a pet has special needs matters for matching
+        data['special_needs'] = [bool(value and value.strip()) for value in data['special_needs']]
+    else:
+        data = {name: [] for name in FEATURE_COLUMNS}
+    
+    return jsonify({'count': len(rows), 'columns': data})
+
+
 @bp.route('/pets/<int:pet_id>', methods=['GET'])
 def get_pet(pet_id):
     """Get specific pet details"""
@@ -87,6 +289,43 @@ def get_pet(pet_id):
     return jsonify(pet.to_dict())
 
 
+similarity_index = SimilarityIndex(
+    Pet,
+    neighbours=ShelterSystemConfig.SIMILAR_PETS_NEIGHBOURS,
+    refresh_interval=ShelterSystemConfig.TRAIT_INDEX_REFRESH,
+    rebuild_interval=ShelterSystemConfig.TRAIT_INDEX_REBUILD
+).watch()
+
+
+@bp.route('/pets/<int:pet_id>/similar', methods=['GET'])
+def get_similar_pets(pet_id):
+    """Get the available pets most similar to a pet"""
+    pet = Pet.query.get_or_404(pet_id)
+    limit = min(max(request.args.get('limit', 6, type=int), 1), ShelterSystemConfig.SIMILAR_PETS_NEIGHBOURS)
+    
+    similarity_index.ensure_current()
+    matches = similarity_index.similar(pet_id, limit)
+    if matches is None:
+        # Pets that are not available are not indexed; score them on the fly
+        matches = similarity_index.similar_to(
+            {column: getattr(pet, column) for column in similarity_index.columns}, limit
+        )
+    
+    ids = [other_id for _, other_id in matches]
+    pets = {
+        other.id: other for other in
+        Pet.query.options(db.selectinload(Pet.images)).filter(Pet.id.in_(ids)).all()
+    } if ids else {}
+    
+    return jsonify({
+        'pet_id': pet_id,
+        'similar': [
+            {**pets[other_id].to_dict(), 'similarity': round(score, 3)}
+            for score, other_id in matches if other_id in pets
+        ]
+    })
+
+
 @bp.route('/pets/', methods=['POST'])
 def add_pet():
     """Add new pet to shelter"""
@@ -122,14 +361,12 @@ def add_pet():
     db.session.commit()
     
     # Log the action
-    log = ShelterLog(
-        pet_id=pet.id,
-        action='added',
-        description=f'Pet {pet.name} added to shelter',
+    audit_log.record(
+        pet.id,
+        'added',
+        f'Pet {pet.name} added to shelter',
         performed_by=data.get('staff_name', 'System')
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify(pet.to_dict()), 201
 
@@ -156,14 +393,12 @@ def update_pet(pet_id):
     db.session.commit()
     
     # Log the action
-    log = ShelterLog(
-        pet_id=pet.id,
-        action='updated',
-        description=f'Pet {pet.name} information updated',
+    audit_log.record(
+        pet.id,
+        'updated',
+        f'Pet {pet.name} information updated',
         performed_by=data.get('staff_name', 'System')
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify(pet.to_dict())
 
@@ -187,14 +422,12 @@ def update_pet_status():
     db.session.commit()
     
     # Log the action
-    log = ShelterLog(
-        pet_id=pet.id,
-        action='status_changed',
-        description=f'Pet status changed from {old_status} to {status}',
+    audit_log.record(
+        pet.id,
+        'status_changed',
+        f'Pet status changed from {old_status} to {status}',
         performed_by=data.get('system', 'Adoption System')
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify({'success': True, 'pet': pet.to_dict()})
 
@@ -262,17 +495,57 @@ def pet_images(pet_id):
     return jsonify({'error': 'Invalid file type'}), 400
 
 
+MAX_LOG_PAGE = 200
+
+
+def log_page_size():
+    """The requested page size, clamped to 1..MAX_LOG_PAGE"""
+    return min(max(request.args.get('limit', 50, type=int), 1), MAX_LOG_PAGE)
+
+
 @bp.route('/pets/<int:pet_id>/logs', methods=['GET'])
 def get_pet_logs(pet_id):
-    """Get pet activity logs"""
-    pet = Pet.query.get_or_404(pet_id)
-    logs = ShelterLog.query.filter_by(pet_id=pet_id).order_by(
-        ShelterLog.timestamp.desc()
-    ).all()
+    """Get pet activity logs, newest first, a page at a time"""
+    Pet.query.get_or_404(pet_id)
+    logs, next_cursor = recent_logs(pet_id, limit=log_page_size(), cursor=request.args.get('cursor'))
+    
+    return jsonify({
+        'pet_id': pet_id,
+        'logs': [log.to_dict() for log in logs],
+        'next_cursor': next_cursor
+    })
+
+
+@bp.route('/pets/<int:pet_id>/logs/archive', methods=['GET'])
+def get_archived_pet_logs(pet_id):
+    """Get pet activity logs moved to the archive (the pet itself may be gone)"""
+    try:
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO 8601 dates'}), 400
+    
+    limit = log_page_size()
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    logs, total = archived_logs(pet_id, since=since, until=until, limit=limit, offset=offset)
     
     return jsonify({
         'pet_id': pet_id,
-        'logs': [log.to_dict() for log in logs]
+        'logs': logs,
+        'total': total,
+        'offset': offset,
+        'limit': limit
+    })
+
+
+@bp.route('/logs', methods=['GET'])
+def get_logs():
+    """Get shelter-wide activity logs, newest first, a page at a time"""
+    logs, next_cursor = recent_logs(limit=log_page_size(), cursor=request.args.get('cursor'))
+    
+    return jsonify({
+        'logs': [log.to_dict() for log in logs],
+        'next_cursor': next_cursor
     })
 
 
@@ -12,6 +12,9 @@ bp = Blueprint('pets_management', __name__, url_prefix='/manage')
 
 from shelter_system.extensions import db
 from shelter_system.models import Pet, PetImage, ShelterLog
+from shelter_system.utils.activity_log import recent_logs, count_logs
+from shelter_system.utils.audit_log import audit_log
+from config import ShelterSystemConfig
 
 @bp.route('/pets')
 def list_pets():
@@ -62,15 +65,13 @@ def add_pet():
         db.session.add(pet)
         db.session.commit()
         
-        # Log action
-        log = ShelterLog(
-            pet_id=pet.id,
-            action='added',
-            description=f'Pet {pet.name} added to shelter',
+        # Log the action
+        audit_log.record(
+            pet.id,
+            'added',
+            f'Pet {pet.name} added to shelter',
             performed_by=request.form.get('staff_name', 'Staff')
         )
-        db.session.add(log)
-        db.session.commit()
         
         flash(f'Pet {pet.name} added successfully!', 'success')
         return redirect(url_for('pets_management.view_pet', pet_id=pet.id))
@@ -82,11 +83,14 @@ def add_pet():
 def view_pet(pet_id):
     """View pet details"""
     pet = Pet.query.get_or_404(pet_id)
-    logs = ShelterLog.query.filter_by(pet_id=pet_id).order_by(
-        ShelterLog.timestamp.desc()
-    ).all()
+    logs, next_log_cursor = recent_logs(
+        pet_id,
+        limit=ShelterSystemConfig.RECORDS_PER_PAGE,
+        cursor=request.args.get('log_cursor')
+    )
     
-    return render_template('manage/view_pet.html', pet=pet, logs=logs)
+    return render_template('view_pet.html', pet=pet, logs=logs,
+                          log_count=count_logs(pet_id), next_log_cursor=next_log_cursor)
 
 
 @bp.route('/pets/<int:pet_id>/edit', methods=['GET', 'POST'])
@@ -116,15 +120,13 @@ def edit_pet(pet_id):
         
         db.session.commit()
         
-        # Log action
-        log = ShelterLog(
-            pet_id=pet.id,
-            action='updated',
-            description=f'Pet {pet.name} information updated',
+        # Log the action
+        audit_log.record(
+            pet.id,
+            'updated',
+            f'Pet {pet.name} information updated',
             performed_by=request.form.get('staff_name', 'Staff')
         )
-        db.session.add(log)
-        db.session.commit()
         
         flash(f'Pet {pet.name} updated successfully!', 'success')
         return redirect(url_for('pets_management.view_pet', pet_id=pet.id))
@@ -0,0 +1,171 @@
+"""
+Shelter activity log pages and cold-storage archive
+Logs are read a page at a time, newest first, with a keyset cursor over the
+(pet_id, timestamp) and timestamp indexes. archive_logs() moves rows older
+than the retention period into gzip-compressed JSON-lines files, one per
+month, and archived_logs() reads them back on demand.
+"""
+import os
+import json
+import gzip
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, func
+
+from config import Config
+from shelter_system.extensions import db
+from shelter_system.models import ShelterLog
+
+ARCHIVE_BATCH = 2000
+DELETE_CHUNK = 500  # stays under SQLite's bound-parameter limit
+MANIFEST = 'manifest.json'
+
+_archive_lock = threading.Lock()
+
+
+def encode_cursor(log):
+    """Opaque position after which the next page starts"""
+    return f"{log.timestamp.isoformat()}_{log.id}"
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) from a cursor, or None if it is malformed"""
+    try:
+        timestamp, log_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def recent_logs(pet_id=None, limit=20, cursor=None):
+    """
+    A page of logs, newest first, for one pet or the whole shelter
+
+    Returns (logs, next_cursor). Pass next_cursor back for the following
+    page; it is None on the last one.
+    """
+    query = ShelterLog.query
+    if pet_id is not None:
+        query = query.filter(ShelterLog.pet_id == pet_id)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        timestamp, log_id = position
+        query = query.filter(or_(
+            ShelterLog.timestamp < timestamp,
+            and_(ShelterLog.timestamp == timestamp, ShelterLog.id < log_id)
+        ))
+    logs = query.order_by(ShelterLog.timestamp.desc(), ShelterLog.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(logs[limit - 1]) if len(logs) > limit else None
+    return logs[:limit], next_cursor
+
+
+def count_logs(pet_id):
+    """Number of logs kept in the database for a pet"""
+    return db.session.query(func.count(ShelterLog.id)).filter(ShelterLog.pet_id == pet_id).scalar()
+
+
+def _load_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+
+def _append(directory, manifest, month, rows):
+    """Append rows to the month's file and record its range and pets in the manifest"""
+    name = f"shelter_logs_{month}.jsonl.gz"
+    # Every run adds a gzip member; readers see them as one stream
+    with gzip.open(os.path.join(directory, name), 'at', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+    timestamps = [row['timestamp'] for row in rows]
+    entry = manifest.setdefault(name, {'rows': 0, 'first': min(timestamps), 'last': max(timestamps), 'pet_ids': []})
+    entry['rows'] += len(rows)
+    entry['first'] = min(entry['first'], min(timestamps))
+    entry['last'] = max(entry['last'], max(timestamps))
+    entry['pet_ids'] = sorted(set(entry['pet_ids']) | {row['pet_id'] for row in rows})
+
+
+def archive_logs(older_than_days=None):
+    """
+    Move logs older than the retention period to the archive; needs an app context
+
+    Rows are written to the archive before they are deleted, so an
+    interrupted run can at worst archive some rows twice, and reads drop
+    the duplicates. Returns the number of rows moved.
+    """
+    days = Config.LOG_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    directory = Config.LOG_ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    moved = 0
+    with _archive_lock:
+        manifest = _load_manifest(directory)
+        while True:
+            logs = ShelterLog.query.filter(ShelterLog.timestamp < cutoff).order_by(
+                ShelterLog.timestamp, ShelterLog.id
+            ).limit(ARCHIVE_BATCH).all()
+            if not logs:
+                return moved
+
+            by_month = defaultdict(list)
+            for log in logs:
+                by_month[log.timestamp.strftime('%Y-%m')].append(log.to_dict())
+            for month, rows in by_month.items():
+                _append(directory, manifest, month, rows)
+            _save_manifest(directory, manifest)
+
+            ids = [log.id for log in logs]
+            for start in range(0, len(ids), DELETE_CHUNK):
+                ShelterLog.query.filter(ShelterLog.id.in_(ids[start:start + DELETE_CHUNK])).delete(
+                    synchronize_session=False
+                )
+            db.session.commit()
+            moved += len(ids)
+
+
+def archived_logs(pet_id=None, since=None, until=None, limit=50, offset=0):
+    """
+    Archived logs, newest first, read from cold storage
+
+    Only the monthly files whose time range and pets can match are
+    decompressed. Returns (logs, total) with logs as to_dict() dictionaries.
+    """
+    directory = Config.LOG_ARCHIVE_DIR
+    since = since.isoformat() if since else None
+    until = until.isoformat() if until else None
+    seen = set()
+
+    def matching():
+        for name, entry in sorted(_load_manifest(directory).items()):
+            if pet_id is not None and pet_id not in entry['pet_ids']:
+                continue
+            if (since and entry['last'] < since) or (until and entry['first'] >= until):
+                continue
+            with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    row = json.loads(line)
+                    if pet_id is not None and row['pet_id'] != pet_id:
+                        continue
+                    if (since and row['timestamp'] < since) or (until and row['timestamp'] >= until):
+                        continue
+                    if row['id'] in seen:
+                        continue
+                    seen.add(row['id'])
+                    yield row
+
+    page = heapq.nlargest(offset + limit, matching(), key=lambda row: (row['timestamp'], row['id']))
+    return page[offset:], len(seen)
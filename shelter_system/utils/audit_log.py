@@ -0,0 +1,220 @@
+"""
+ShelterLog audit writer
+In the default 'sync' mode every entry is inserted and committed in the
+request, as before. In 'buffered' mode entries are kept in memory and
+written by a background thread in batched inserts, once
+AUDIT_LOG_BATCH_SIZE entries are waiting or every AUDIT_LOG_FLUSH_INTERVAL
+seconds. Entries that cannot be written, including at shutdown, go to a
+JSON-lines spool file that is replayed on the next successful flush. Each
+process spools to its own file (AUDIT_LOG_SPOOL with the PID added), and
+files left by processes that have exited are taken over by a running one.
+
+Buffered entries keep the time they were recorded, but only show up in the
+log pages once flushed.
+"""
+import os
+import glob
+import json
+import atexit
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from shelter_system.extensions import db
+from shelter_system.models import ShelterLog
+
+
+class AuditLogWriter:
+    """Writes ShelterLog entries now or in batches, depending on AUDIT_LOG_MODE"""
+
+    def __init__(self):
+        self.app = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.stats = {'entries': 0, 'batches': 0, 'spooled': 0}
+
+    @property
+    def buffered(self):
+        return self.app is not None and self.app.config['AUDIT_LOG_MODE'] == 'buffered'
+
+    def start(self, app):
+        """Use app's settings; in buffered mode start the flush thread"""
+        self.app = app
+        if self.buffered and self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='audit-log', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def record(self, pet_id, action, description=None, performed_by=None):
+        """Log an action on a pet"""
+        if not self.buffered:
+            db.session.add(ShelterLog(
+                pet_id=pet_id,
+                action=action,
+                description=description,
+                performed_by=performed_by
+            ))
+            db.session.commit()
+            return
+
+        entry = {
+            'pet_id': pet_id,
+            'action': action,
+            'description': description,
+            'performed_by': performed_by,
+            'timestamp': datetime.utcnow()
+        }
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.app.config['AUDIT_LOG_BATCH_SIZE']
+        if full:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.app.config['AUDIT_LOG_FLUSH_INTERVAL'])
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write buffered (and previously spooled) entries; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+            spools = self._own_spools()
+            entries = self._read_spool(spools) + entries
+            if not entries:
+                return 0
+            batch_size = self.app.config['AUDIT_LOG_BATCH_SIZE']
+            written = 0
+            try:
+                with self.app.app_context():
+                    for start in range(0, len(entries), batch_size):
+                        self._insert(entries[start:start + batch_size])
+                        written = min(start + batch_size, len(entries))
+            except Exception as e:
+                print(f"Error flushing audit log, spooling {len(entries) - written} entries: {e}")
+            # The spool is rewritten with whatever is still unwritten
+            self._spool(entries[written:])
+            for path in spools:
+                if path != self._spool_path():
+                    os.remove(path)
+            return written
+
+    def _insert(self, batch):
+        try:
+            db.session.execute(insert(ShelterLog), batch)
+            db.session.commit()
+        except IntegrityError:
+            # e.g. the pet was deleted before the flush; keep the rest
+            db.session.rollback()
+            self._insert_one_by_one(batch)
+        self.stats['batches'] += 1
+        self.stats['entries'] += len(batch)
+
+    def _insert_one_by_one(self, batch):
+        for entry in batch:
+            try:
+                db.session.execute(insert(ShelterLog), [entry])
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                print(f"Error writing audit log entry for pet {entry['pet_id']}: {e}")
+
+    def close(self):
+        """Stop the flush thread and write what is left"""
+        self._stopping = True
+        self._wake.set()
+        if self.app is not None:
+            self.flush()
+
+    # Spool files: the durable fallback when the database cannot be written.
+    # Worker processes never share one; AUDIT_LOG_SPOOL archive/spool.jsonl
+    # becomes archive/spool.<pid>.jsonl, and a file taken over from an
+    # exited process archive/spool.<pid>-<old pid>.jsonl.
+
+    def _spool_path(self, suffix=''):
+        root, ext = os.path.splitext(self.app.config['AUDIT_LOG_SPOOL'])
+        return f'{root}.{os.getpid()}{suffix}{ext}'
+
+    def _own_spools(self):
+        """This process's spool files, after taking over those of exited processes"""
+        root, ext = os.path.splitext(self.app.config['AUDIT_LOG_SPOOL'])
+        own = []
+        for path in sorted(glob.glob(f'{glob.escape(root)}.*{ext}')):
+            owner, _, previous = path[len(root) + 1:len(path) - len(ext)].partition('-')
+            if not owner.isdigit():
+                continue
+            if int(owner) == os.getpid():
+                own.append(path)
+            elif not _running(int(owner)):
+                claimed = self._spool_path(f'-{previous or owner}')
+                if os.path.exists(claimed):
+                    # The old PID was reused by another process that also exited
+                    claimed = self._spool_path(f'-{previous or owner}.{owner}')
+                try:
+                    # Only one process wins the rename
+                    os.rename(path, claimed)
+                except OSError:
+                    continue
+                own.append(claimed)
+        return own
+
+    def _spool(self, entries):
+        """Replace this process's spool file with entries (removing it when there are none)"""
+        path = self._spool_path()
+        if not entries:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps({**entry, 'timestamp': entry['timestamp'].isoformat()}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+            self.stats['spooled'] = len(entries)
+        except OSError as e:
+            print(f"Error spooling audit log, {len(entries)} entries lost: {e}")
+
+    def _read_spool(self, paths):
+        entries = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+                        entries.append(entry)
+        return entries
+
+
+def _running(pid):
+    """Whether a process with this PID exists; assumed so where it cannot be checked"""
+    if os.name != 'posix':
+        # os.kill would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+audit_log = AuditLogWriter()
@@ -0,0 +1,115 @@
+"""
+Base class for in-memory indexes over available pets
+Handles loading the available pets, applying committed Pet writes as they
+happen and catching up with writes made by other worker processes
+"""
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+
+class PetIndex:
+    """
+    An index kept in step with the pets table
+
+    Subclasses list the Pet columns they need in `columns` (starting with
+    'id' and 'status') and implement build(rows) and update(pet_id, values).
+    Changes committed in this process are applied right after the commit;
+    changes from other processes are caught up from updated_at every
+    refresh_interval seconds, and the whole index is rebuilt every
+    rebuild_interval seconds to drop pets deleted elsewhere.
+    """
+
+    columns = ['id', 'status']
+
+    def __init__(self, model=None, refresh_interval=30, rebuild_interval=600):
+        self.model = model
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._built_at = None
+        self._refreshed_at = 0.0
+        self._synced_to = None  # updated_at high-water mark
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+
+    def build(self, rows):
+        """Replace the index from rows of available pets, values in `columns` order"""
+        raise NotImplementedError
+
+    def update(self, pet_id, values):
+        """Re-index one pet from a {column: value} dict, or drop it when values is None"""
+        raise NotImplementedError
+
+    def _select(self):
+        return select(*[getattr(self.model, column) for column in self.columns])
+
+    def rebuild(self):
+        """Rebuild from the database (needs an app context)"""
+        started = datetime.utcnow()
+        session = self.model.query.session
+        self.build(session.execute(self._select().where(self.model.status == 'available')))
+        self._synced_to = started - timedelta(seconds=1)
+        self._built_at = self._refreshed_at = time.monotonic()
+        return self
+
+    def _due(self, now):
+        if self._built_at is None or now - self._built_at >= self.rebuild_interval:
+            return 'rebuild'
+        if now - self._refreshed_at >= self.refresh_interval:
+            return 'refresh'
+        return None
+
+    def ensure_current(self):
+        """Build on first use and catch up with writes made by other processes"""
+        if not self._due(time.monotonic()):
+            return self
+        # One request refreshes at a time; the others keep using the current
+        # index, and only wait when there is none yet
+        if not self._refresh_lock.acquire(blocking=self._built_at is None):
+            return self
+        try:
+            due = self._due(time.monotonic())
+            if due == 'rebuild':
+                return self.rebuild()
+            if due == 'refresh':
+                self._catch_up()
+            return self
+        finally:
+            self._refresh_lock.release()
+
+    def _catch_up(self):
+        self._refreshed_at = time.monotonic()
+        started = datetime.utcnow()
+        session = self.model.query.session
+        changed = session.execute(self._select().where(self.model.updated_at >= self._synced_to)).all()
+        for row in changed:
+            self.update(row[0], dict(zip(self.columns, row)))
+        self._synced_to = started - timedelta(seconds=1)
+
+    def watch(self):
+        """Apply committed inserts, updates and deletes of the model to the index"""
+        key = (type(self).__name__, id(self))
+        model = self.model
+
+        def after_flush(session, flush_context):
+            pending = session.info.setdefault(key, {})
+            for obj in session.new | session.dirty:
+                if isinstance(obj, model):
+                    pending[obj.id] = {column: getattr(obj, column) for column in self.columns}
+            for obj in session.deleted:
+                if isinstance(obj, model):
+                    pending[obj.id] = None
+
+        def after_commit(session):
+            for pet_id, values in session.info.pop(key, {}).items():
+                self.update(pet_id, values)
+
+        def after_rollback(session, previous_transaction):
+            session.info.pop(key, None)
+
+        event.listen(Session, 'after_flush', after_flush)
+        event.listen(Session, 'after_commit', after_commit)
+        event.listen(Session, 'after_soft_rollback', after_rollback)
+        return self
@@ -0,0 +1,239 @@
+"""
+Nearest-neighbour index of similar available pets
+Each pet becomes a unit feature vector (species, breed, age, size, energy,
+traits, description terms) and keeps its k most similar available pets,
+updated incrementally as pets are added, change or leave the shelter
+"""
+import re
+import math
+import zlib
+from collections import defaultdict
+import numpy as np
+
+from shelter_system.utils.pet_index import PetIndex
+from shelter_system.utils.trait_index import BOOLEAN_TRAITS
+
+SIZE_LEVELS = {'small': 0.0, 'medium': 0.5, 'large': 1.0}
+ENERGY_LEVELS = {'low': 0.0, 'medium': 0.5, 'high': 1.0, 'very high': 1.0}
+MAX_AGE = 15
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'he', 'her',
+    'his', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'she', 'so', 'that', 'the', 'they', 'this', 'to',
+    'very', 'was', 'who', 'will', 'with', 'loves', 'love', 'pet', 'dog', 'cat', 'looking', 'home',
+}
+
+# Feature blocks: (name, dimensions, weight). Every block is a unit vector
+# scaled by sqrt(weight / total), so the dot product of two pets is the
+# weighted average of their per-block cosine similarities.
+BLOCKS = [
+    ('species', 4, 3.0),
+    ('breed', 32, 2.0),
+    ('age', 2, 1.0),
+    ('size', 2, 1.0),
+    ('energy', 2, 1.0),
+    ('traits', len(BOOLEAN_TRAITS), 0.5),
+    ('terms', 64, 1.5),
+]
+TOTAL_WEIGHT = sum(weight for _, _, weight in BLOCKS)
+DIMENSIONS = sum(size for _, size, _ in BLOCKS)
+
+
+def hashed(tokens, size):
+    """Bag of (token, weight) pairs folded into a fixed-size vector"""
+    vector = np.zeros(size, dtype=np.float32)
+    for token, weight in tokens:
+        vector[zlib.crc32(token.encode()) % size] += weight
+    return vector
+
+
+def graded(value):
+    """Place a 0..1 value on a quarter circle so nearby values have cosine close to 1"""
+    if value is None:
+        return np.zeros(2, dtype=np.float32)
+    angle = min(max(value, 0.0), 1.0) * math.pi / 2
+    return np.array([math.cos(angle), math.sin(angle)], dtype=np.float32)
+
+
+def encode(values):
+    """Feature vector of one pet from a {column: value} dict"""
+    species = (values.get('species') or '').strip().lower()
+    breed = (values.get('breed') or '').strip().lower()
+    age = values.get('age')
+    text = (values.get('description') or '').lower()
+
+    blocks = {
+        'species': hashed([(species, 1.0)] if species else [], 4),
+        'breed': hashed(
+            ([(breed, 1.0)] if breed else []) + [(word, 0.5) for word in breed.split() if len(breed.split()) > 1],
+            32
+        ),
+        'age': graded(None if age is None else age / MAX_AGE),
+        'size': graded(SIZE_LEVELS.get((values.get('size') or '').strip().lower())),
+        'energy': graded(ENERGY_LEVELS.get((values.get('energy_level') or '').strip().lower())),
+        'traits': np.array([
+            0.0 if values.get(field) is None else (1.0 if values.get(field) else -1.0)
+            for field in BOOLEAN_TRAITS
+        ], dtype=np.float32),
+        'terms': hashed(
+            [(word, 1.0) for word in re.findall(r'[a-z]{3,}', text) if word not in STOP_WORDS],
+            64
+        ),
+    }
+
+    parts = []
+    for name, _, weight in BLOCKS:
+        block = blocks[name]
+        norm = float(np.linalg.norm(block))
+        if norm:
+            block = block * (math.sqrt(weight / TOTAL_WEIGHT) / norm)
+        parts.append(block)
+    return np.concatenate(parts).astype(np.float32)
+
+
+class SimilarityIndex(PetIndex):
+    """
+    k nearest available pets for every available pet
+
+    A new or changed pet costs one matrix-vector product: it gets its own
+    neighbour list and is inserted into the lists of pets it beats. A pet that
+    leaves only forces the pets that listed it to recompute their lists.
+    """
+
+    columns = ['id', 'status', 'species', 'breed', 'age', 'size', 'energy_level'] + BOOLEAN_TRAITS + ['description']
+
+    def __init__(self, model=None, neighbours=8, refresh_interval=30, rebuild_interval=600):
+        super().__init__(model, refresh_interval, rebuild_interval)
+        self.k = neighbours
+        self._reset(0)
+
+    def _reset(self, capacity):
+        self._matrix = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)  # row -> pet id, 0 when free
+        self._floor = np.full(capacity, np.inf, dtype=np.float32)  # worst kept similarity per row
+        self._rows = {}  # pet id -> row
+        self._free = list(range(capacity - 1, -1, -1))
+        self._neighbours = {}  # pet id -> [(similarity, pet id)], best first
+        self._referrers = defaultdict(set)  # pet id -> pets whose lists contain it
+
+    def __len__(self):
+        return len(self._rows)
+
+    # Maintenance
+
+    def build(self, rows, block=512):
+        """Replace the index from rows of available pets, values in `columns` order"""
+        vectors, ids = [], []
+        for row in rows:
+            values = dict(zip(self.columns, row))
+            if values['status'] == 'available':
+                ids.append(values['id'])
+                vectors.append(encode(values))
+
+        with self._lock:
+            self._reset(len(ids))
+            if not ids:
+                return self
+            self._matrix[:] = np.stack(vectors)
+            self._ids[:] = ids
+            self._rows = {pet_id: row for row, pet_id in enumerate(ids)}
+            self._free = []
+            for start in range(0, len(ids), block):
+                sims = self._matrix[start:start + block] @ self._matrix.T
+                for offset in range(sims.shape[0]):
+                    sims[offset, start + offset] = -np.inf
+                    self._set_neighbours(start + offset, sims[offset])
+        return self
+
+    def update(self, pet_id, values):
+        """Re-index one pet from a {column: value} dict, or drop it when values is None"""
+        with self._lock:
+            if pet_id in self._rows:
+                self._remove(pet_id)
+            if values is not None and values.get('status') == 'available':
+                self._add(pet_id, encode(values))
+
+    def _set_neighbours(self, row, sims):
+        """Store the top k of a row's similarity vector as its neighbour list"""
+        pet_id = int(self._ids[row])
+        for _, old in self._neighbours.get(pet_id, []):
+            self._referrers[old].discard(pet_id)
+
+        candidates = np.flatnonzero(np.isfinite(sims))
+        if len(candidates) > self.k:
+            candidates = candidates[np.argpartition(-sims[candidates], self.k - 1)[:self.k]]
+        candidates = candidates[np.argsort(-sims[candidates], kind='stable')]
+
+        neighbours = [(float(sims[i]), int(self._ids[i])) for i in candidates]
+        self._neighbours[pet_id] = neighbours
+        for _, other in neighbours:
+            self._referrers[other].add(pet_id)
+        self._floor[row] = neighbours[-1][0] if len(neighbours) >= self.k else -np.inf
+
+    def _similarities(self, vector, exclude=None):
+        sims = self._matrix @ vector
+        sims[self._ids == 0] = -np.inf
+        if exclude is not None:
+            sims[exclude] = -np.inf
+        return sims
+
+    def _add(self, pet_id, vector):
+        if not self._free:
+            grow = max(len(self._ids), 64)
+            self._matrix = np.vstack([self._matrix, np.zeros((grow, DIMENSIONS), dtype=np.float32)])
+            self._ids = np.concatenate([self._ids, np.zeros(grow, dtype=np.int64)])
+            self._floor = np.concatenate([self._floor, np.full(grow, np.inf, dtype=np.float32)])
+            self._free = list(range(len(self._ids) - 1, len(self._ids) - grow - 1, -1))
+
+        row = self._free.pop()
+        self._matrix[row] = vector
+        self._ids[row] = pet_id
+        self._rows[pet_id] = row
+
+        sims = self._similarities(vector, exclude=row)
+        self._set_neighbours(row, sims)
+
+        # Pets for which the newcomer beats their current worst neighbour
+        for other_row in np.flatnonzero(sims > self._floor):
+            other = int(self._ids[other_row])
+            neighbours = self._neighbours[other]
+            neighbours.append((float(sims[other_row]), pet_id))
+            neighbours.sort(key=lambda pair: -pair[0])
+            self._referrers[pet_id].add(other)
+            if len(neighbours) > self.k:
+                _, dropped = neighbours.pop()
+                self._referrers[dropped].discard(other)
+            self._floor[other_row] = neighbours[-1][0] if len(neighbours) >= self.k else -np.inf
+
+    def _remove(self, pet_id):
+        row = self._rows.pop(pet_id)
+        self._matrix[row] = 0.0
+        self._ids[row] = 0
+        self._floor[row] = np.inf
+        self._free.append(row)
+
+        for _, other in self._neighbours.pop(pet_id, []):
+            self._referrers[other].discard(pet_id)
+        for other in self._referrers.pop(pet_id, set()):
+            other_row = self._rows.get(other)
+            if other_row is not None:
+                self._set_neighbours(other_row, self._similarities(self._matrix[other_row], exclude=other_row))
+
+    # Querying
+
+    def similar(self, pet_id, limit=6):
+        """Precomputed (similarity, pet id) pairs for an indexed pet, None if not indexed"""
+        neighbours = self._neighbours.get(pet_id)
+        return None if neighbours is None else neighbours[:limit]
+
+    def similar_to(self, values, limit=6):
+        """Most similar available pets to any pet, computed on demand"""
+        with self._lock:
+            if not self._rows:
+                return []
+            sims = self._similarities(encode(values))
+            sims[self._ids == values.get('id')] = -np.inf
+            limit = min(limit, len(self._rows))
+            top = np.argpartition(-sims, limit - 1)[:limit]
+            top = top[np.argsort(-sims[top], kind='stable')]
+            return [(float(sims[i]), int(self._ids[i])) for i in top if np.isfinite(sims[i])]
@@ -0,0 +1,216 @@
+"""
+Bitmap index over available pets
+Every (trait, value) pair owns a bitmap with bit n set when pet n is available
+and has that value, so trait combinations become integer AND/OR operations
+instead of multi-column scans
+"""
+from shelter_system.utils.pet_index import PetIndex
+
+BOOLEAN_TRAITS = [
+    'vaccinated', 'spayed_neutered', 'microchipped',
+    'good_with_kids', 'good_with_pets', 'good_with_dogs', 'good_with_cats'
+]
+
+# Stored with mixed capitalisation, indexed lowercased
+CATEGORICAL_TRAITS = ['species', 'gender', 'size', 'energy_level', 'shedding', 'trainability']
+
+TRAITS = BOOLEAN_TRAITS + CATEGORICAL_TRAITS
+
+# Columns read for every indexed pet, in this order
+INDEXED_COLUMNS = ['id', 'status'] + TRAITS
+
+
+def normalize(field, value):
+    """Normalise a trait value to its bitmap key, None when it cannot be indexed"""
+    if value is None or value == '':
+        return None
+    if field in BOOLEAN_TRAITS:
+        if isinstance(value, str):
+            value = value.strip().lower()
+            if value in ('1', 'true', 'yes', 'on'):
+                return True
+            if value in ('0', 'false', 'no', 'off'):
+                return False
+            return None
+        return bool(value)
+    return str(value).strip().lower()
+
+
+class TraitIndex(PetIndex):
+    """
+    In-memory bitmap index answering trait combinations over available pets
+
+    Queries are nested dicts and lists: a dict ANDs its fields, a list of
+    values for one field ORs them, and a list of dicts ORs the dicts, e.g.
+    {'vaccinated': True, 'size': ['small', 'medium'],
+     'any': [{'good_with_kids': True}, {'energy_level': 'low'}]}.
+    'not' negates a sub-query against the available set.
+
+    Bitmaps are kept as bytearrays so a pet write flips single bits in place;
+    queries work on int views of them, converted once after each change.
+    Writes and queries hold the index lock, so a query never sees half of
+    an update.
+    """
+
+    columns = INDEXED_COLUMNS
+
+    def __init__(self, model=None, refresh_interval=30, rebuild_interval=600):
+        super().__init__(model, refresh_interval, rebuild_interval)
+        self._available = bytearray()
+        self._buffers = {}  # (field, value) -> bytearray, bit n set for pet n
+        self._ints = {}  # (field, value), or None for the available set -> int view
+
+    def build(self, rows):
+        """Replace the index from rows of INDEXED_COLUMNS values"""
+        size = 0
+        available = bytearray()
+        buffers = {}  # (field, value) -> bytearray
+        # Per trait: raw column value -> buffer (None when not indexable)
+        lookups = [{} for _ in TRAITS]
+
+        def buffer_for(field, raw):
+            value = normalize(field, raw)
+            if value is None:
+                return None
+            if (field, value) not in buffers:
+                buffers[(field, value)] = bytearray(size)
+            return buffers[(field, value)]
+
+        for row in rows:
+            if row[1] != 'available':
+                continue
+            pet_id = row[0]
+            byte, bit = pet_id >> 3, 1 << (pet_id & 7)
+            if byte >= size:
+                size = max(byte + 1, size * 2, 4096)
+                for buffer in (available, *buffers.values()):
+                    buffer.extend(bytes(size - len(buffer)))
+            available[byte] |= bit
+            for lookup, field, raw in zip(lookups, TRAITS, row[2:]):
+                buffer = lookup.get(raw, False)
+                if buffer is False:
+                    buffer = lookup[raw] = buffer_for(field, raw)
+                if buffer is not None:
+                    buffer[byte] |= bit
+
+        with self._lock:
+            self._available = available
+            self._buffers = buffers
+            self._ints = {}
+        return self
+
+    def _assign(self, key, buffer, byte, bit, on):
+        """Set or clear one pet's bit in buffer, dropping its int view if that changed it"""
+        if on:
+            if byte >= len(buffer):
+                buffer.extend(bytes(max(byte + 1, len(buffer) * 2) - len(buffer)))
+            elif buffer[byte] & bit:
+                return
+            buffer[byte] |= bit
+        else:
+            if byte >= len(buffer) or not buffer[byte] & bit:
+                return
+            buffer[byte] &= ~bit
+        self._ints.pop(key, None)
+
+    def update(self, pet_id, values):
+        """Re-index one pet from a {column: value} dict, or drop it when values is None"""
+        byte, bit = pet_id >> 3, 1 << (pet_id & 7)
+        keep = values is not None and values.get('status') == 'available'
+        wanted = set()
+        if keep:
+            for field in TRAITS:
+                value = normalize(field, values.get(field))
+                if value is not None:
+                    wanted.add((field, value))
+
+        # One bit test per bitmap; only the bitmaps the pet enters or leaves change
+        with self._lock:
+            self._assign(None, self._available, byte, bit, keep)
+            for key in wanted:
+                if key not in self._buffers:
+                    self._buffers[key] = bytearray()
+                self._assign(key, self._buffers[key], byte, bit, True)
+            for key, buffer in self._buffers.items():
+                if key not in wanted:
+                    self._assign(key, buffer, byte, bit, False)
+
+    # Querying
+
+    def _as_int(self, key):
+        if key not in self._ints:
+            buffer = self._available if key is None else self._buffers.get(key)
+            self._ints[key] = int.from_bytes(buffer, 'little') if buffer else 0
+        return self._ints[key]
+
+    def bitmap(self, field, value):
+        """Bitmap of available pets with field == value"""
+        if field not in TRAITS:
+            raise ValueError(f'Unknown trait: {field}')
+        with self._lock:
+            return self._as_int((field, normalize(field, value)))
+
+    def evaluate(self, query):
+        """Resolve a nested query to a bitmap of matching available pets"""
+        with self._lock:
+            return self._evaluate(query)
+
+    def _evaluate(self, query):
+        available = self._as_int(None)
+        if isinstance(query, list):
+            result = 0
+            for sub in query:
+                result |= self._evaluate(sub)
+            return result & available
+        if not isinstance(query, dict):
+            raise ValueError('A query must be a dict or a list of dicts')
+
+        result = available
+        for field, value in query.items():
+            if field == 'any':
+                result &= self._evaluate(list(value))
+            elif field == 'not':
+                result &= ~self._evaluate(value)
+            elif isinstance(value, (list, tuple)):
+                either = 0
+                for item in value:
+                    either |= self.bitmap(field, item)
+                result &= either
+            else:
+                result &= self.bitmap(field, value)
+            if not result:
+                break
+        return result
+
+    @staticmethod
+    def count(bitmap):
+        return bitmap.bit_count()
+
+    @staticmethod
+    def ids(bitmap, offset=0, limit=None):
+        """Pet ids set in bitmap, newest (highest id) first"""
+        if not bitmap:
+            return []
+        bits = bin(bitmap)
+        top = len(bits) - 1  # bits[2] is the highest set bit
+        result = []
+        pos = bits.find('1', 2)
+        skipped = 0
+        while pos != -1:
+            if skipped < offset:
+                skipped += 1
+            else:
+                result.append(top - pos)
+                if limit is not None and len(result) >= limit:
+                    break
+            pos = bits.find('1', pos + 1)
+        return result
+
+    def search(self, query, page=1, per_page=12):
+        """Evaluate a query and return one page of ids plus the total"""
+        bitmap = self.evaluate(query)
+        page = max(page, 1)
+        return {
+            'ids': self.ids(bitmap, offset=(page - 1) * per_page, limit=per_page),
+            'total': self.count(bitmap),
+        }
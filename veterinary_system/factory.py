@@ -0,0 +1,128 @@
+"""
+Veterinary Management System - application factory
+create_app() lives here, apart from the module-level app in app.py, so
+importing it (as co-located mode does) builds no app as a side effect.
+"""
+import sys
+import os
+# Add parent directory to path to import config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import click
+from flask import Flask, render_template, jsonify, request, redirect, url_for, flash
+from config import VeterinarySystemConfig
+
+from veterinary_system.extensions import db, cors
+from veterinary_system.models import Vet, VetRecord, Appointment, create_missing_indexes
+from veterinary_system.routes import health_api, appointments, vets, health_records, chatbot
+from common.health import init_health
+from common.rate_limit import init_rate_limit
+from common.sql_profiler import init_sql_profiler
+from common.tracing import init_tracing
+
+
+def create_app(config_class=VeterinarySystemConfig):
+    """Build the veterinary app with its extensions, blueprints and routes"""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    
+    # Initialize extensions
+    db.init_app(app)
+    cors.init_app(app)
+    
+    # Register blueprints
+    app.register_blueprint(health_api.bp)
+    app.register_blueprint(appointments.bp)
+    app.register_blueprint(vets.bp)
+    app.register_blueprint(health_records.bp)
+    app.register_blueprint(chatbot.bp)
+    
+    # Request IDs, latency histograms, /metrics, rate limits, the opt-in SQL profiler and health probes
+    init_tracing(app, 'veterinary')
+    init_rate_limit(app)
+    init_sql_profiler(app, db)
+    init_health(app, db)
+    
+    # Push appointment changes to Google Calendar in batches
+    if app.config['CALENDAR_SYNC']:
+        from veterinary_system.utils.calendar_sync import calendar_sync
+        calendar_sync.start(app)
+    
+    @app.route('/')
+    def index():
+        """Veterinary system home page"""
+        stats = {
+            'total_vets': Vet.query.count(),
+            'total_records': VetRecord.query.count(),
+            'upcoming_appointments': Appointment.query.filter(
+                Appointment.status == 'scheduled'
+            ).count(),
+            'recent_checkups': VetRecord.query.order_by(
+                VetRecord.last_checkup.desc()
+            ).limit(5).all()
+        }
+        return render_template('index.html', stats=stats)
+
+    @app.route('/dashboard')
+    def dashboard():
+        """Veterinary dashboard"""
+        appointments = Appointment.query.order_by(Appointment.date.desc()).limit(10).all()
+        records = VetRecord.query.order_by(VetRecord.last_checkup.desc()).limit(10).all()
+        return render_template('dashboard.html', appointments=appointments, records=records)
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({'error': 'Not found'}), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+    # CLI commands
+    @app.cli.command()
+    def init_db():
+        """Initialize the database"""
+        db.create_all()
+        create_missing_indexes()
+        print("Veterinary database initialized!")
+
+    @app.cli.command()
+    def seed_db():
+        """Seed database with sample data"""
+        vets = [
+            Vet(name='Dr. Sarah Johnson', email='sarah@vetclinic.com',
+                specialization='General Practice', phone='555-0101'),
+            Vet(name='Dr. Michael Chen', email='michael@vetclinic.com',
+                specialization='Surgery', phone='555-0102'),
+            Vet(name='Dr. Emily Rodriguez', email='emily@vetclinic.com',
+                specialization='Internal Medicine', phone='555-0103'),
+        ]
+    
+        for vet in vets:
+            db.session.add(vet)
+    
+        db.session.commit()
+        print("Sample vets added!")
+
+    @app.cli.command()
+    @click.option('--full', is_flag=True, help='List every calendar event instead of changes since the last sync')
+    def sync_calendar(full):
+        """Push scheduled appointments missing from Google Calendar, then pull calendar changes"""
+        from veterinary_system.utils.calendar_sync import calendar_sync, pull_changes
+        missing = Appointment.query.filter(
+            Appointment.status == 'scheduled',
+            Appointment.google_calendar_event_id.is_(None)
+        ).with_entities(Appointment.id).all()
+        for (appointment_id,) in missing:
+            calendar_sync.enqueue(appointment_id)
+        calls = calendar_sync.flush()
+        print(f"Sent {calls} calendar changes, {calendar_sync.pending()} left to retry")
+        stats = pull_changes(full=full)
+        if stats:
+            print(f"Pulled {stats['events']} changed events ({'full' if stats['full'] else 'incremental'}): "
+                  f"{stats['rescheduled']} rescheduled, {stats['cancelled']} cancelled, "
+                  f"{stats['skipped']} kept for newer local changes")
+    
+    return app
@@ -182,7 +182,7 @@ class Appointment(db.Model):
     status = db.Column(db.String(20), default='scheduled')  # scheduled, completed, cancelled
     
     # Google Calendar integration
-    google_calendar_event_id = db.Column(db.String(200))
+    google_calendar_event_id = db.Column(db.String(200), index=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -208,3 +208,25 @@ class Appointment(db.Model):
     
     def __repr__(self):
         return f'<Appointment {self.id} - Pet {self.pet_id}>'
+
+
+class CalendarSyncState(db.Model):
+    """Where the last incremental pull from a Google calendar stopped"""
+    __tablename__ = 'calendar_sync_state'
+    
+    calendar_id = db.Column(db.String(200), primary_key=True)
+    sync_token = db.Column(db.String(500))  # nextSyncToken of the last pull
+    last_full_sync = db.Column(db.DateTime)
+    last_synced_at = db.Column(db.DateTime)
+    pull_owner = db.Column(db.String(100))  # host:pid of the process that pulls this calendar
+    pull_lease_until = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<CalendarSyncState {self.calendar_id}>'
+
+
+def create_missing_indexes():
+    """Create indexes added after the tables were first created (create_all skips existing tables)"""
+    for model in (Appointment,):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
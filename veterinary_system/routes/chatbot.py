@@ -13,6 +13,80 @@ bp = Blueprint('chatbot', __name__, url_prefix='/chatbot')
 
 from veterinary_system.extensions import db
 from veterinary_system.models import VetRecord, Appointment, Vet
+from common.intent_router import IntentRouter
+from common.snapshot import SnapshotCache
+from config import VeterinarySystemConfig
+
+# Intents are checked in registration order, first match wins
+router = IntentRouter(number_slot='pet_id')
+router.add_slot('topic', {'record*': 'record', 'appointment*': 'appointment', 'vet': 'vet', 'vets': 'vet'})
+router.add_slot('when', {
+    'today': 'today', 'upcoming': 'upcoming', 'future': 'upcoming', 'scheduled': 'upcoming',
+    'past': 'past', 'completed': 'past', 'recent': 'recent', 'latest': 'recent',
+})
+router.add_slot('listing', ['available', 'list', 'show'])
+router.add_intent('greeting', ['hello', 'hi', 'hey', 'greetings'])
+router.add_intent('help', ['help', 'what can you do'])
+router.add_intent('stats', ['how many', 'total', 'statistics', 'stats'])
+router.add_intent('pet_record', ['pet', 'pets'], requires=['pet_id'])
+router.add_intent('records', ['health', 'record*'])
+router.add_intent('appointments', ['appointment*'])
+router.add_intent('vets', ['vet', 'vets'])
+
+
+def build_snapshot():
+    """Collect the counts and short lists the chatbot answers from"""
+    now = datetime.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    
+    def appointments(*criteria, order=Appointment.date, limit=None):
+        query = db.session.query(Appointment, Vet.name).outerjoin(
+            Vet, Vet.id == Appointment.vet_id
+        ).filter(*criteria).order_by(order)
+        if limit:
+            query = query.limit(limit)
+        return [{
+            'date': apt.date,
+            'pet_id': apt.pet_id,
+            'pet_name': apt.pet_name,
+            'reason': apt.reason,
+            'vet_name': vet_name,
+        } for apt, vet_name in query.all()]
+    
+    records = VetRecord.query.order_by(VetRecord.last_checkup.desc()).limit(5).all()
+    vets = Vet.query.all()
+    
+    return {
+        'counts': {
+            'records': VetRecord.query.count(),
+            'records_recent': VetRecord.query.filter(
+                VetRecord.last_checkup >= now - timedelta(days=30)
+            ).count(),
+            'appointments': Appointment.query.count(),
+            'upcoming': Appointment.query.filter(Appointment.date >= now).count(),
+            'vets': len(vets),
+        },
+        'recent_records': [{
+            'pet_id': record.pet_id,
+            'pet_name': record.pet_name,
+            'last_checkup': record.last_checkup,
+        } for record in records],
+        'today': appointments(Appointment.date >= today_start, Appointment.date < today_end),
+        'upcoming': appointments(Appointment.date >= now, limit=5),
+        'past': appointments(Appointment.date < now, order=Appointment.date.desc(), limit=5),
+        'vets': [{
+            'name': vet.name,
+            'specialization': vet.specialization,
+            'email': vet.email,
+            'phone': vet.phone,
+        } for vet in vets],
+        'specializations': sorted({vet.specialization for vet in vets if vet.specialization}),
+    }
+
+
+snapshot = SnapshotCache(build_snapshot, ttl=VeterinarySystemConfig.CHATBOT_SNAPSHOT_TTL)
+snapshot.invalidate_on_commit(VetRecord, Appointment, Vet)
 
 @bp.route('/')
 def chatbot_page():
@@ -35,14 +109,17 @@ def chat():
 
 def process_query(message):
     """Process user query and return appropriate response"""
-    
-    # Greetings
-    if any(word in message for word in ['hello', 'hi', 'hey', 'greetings']):
-        return "Hello! 👋 I'm the Veterinary Assistant. I can help you with health records, appointments, and veterinarian information. Try asking 'How many health records?' or 'Show upcoming appointments'."
-    
-    # Help
-    if 'help' in message or 'what can you do' in message:
-        return """I can help you with:
+    match = router.route(message)
+    handler = HANDLERS.get(match.intent, answer_default)
+    return handler(message, match)
+
+
+def answer_greeting(message, match):
+    return "Hello! 👋 I'm the Veterinary Assistant. I can help you with health records, appointments, and veterinarian information. Try asking 'How many health records?' or 'Show upcoming appointments'."
+
+
+def answer_help(message, match):
+    return """I can help you with:
         
 📊 Statistics: "How many health records?"
 📅 Appointments: "Upcoming appointments" or "Today's appointments"
@@ -51,148 +128,136 @@ def process_query(message):
 🔍 Search: "Find record for pet [id]"
 
 Just ask naturally!"""
+
+
+def answer_stats(message, match):
+    """Statistics queries"""
+    counts = snapshot.get()['counts']
+    topic = match.get('topic')
     
-    # Statistics queries
-    if 'how many' in message or 'total' in message or 'statistics' in message or 'stats' in message:
-        total_records = VetRecord.query.count()
-        total_appointments = Appointment.query.count()
-        total_vets = Vet.query.count()
-        
-        if 'record' in message:
-            return f"📊 We have **{total_records} health records** in our system."
-        elif 'appointment' in message:
-            upcoming = Appointment.query.filter(Appointment.appointment_date >= datetime.now()).count()
-            return f"📅 We have **{total_appointments} total appointments** ({upcoming} upcoming)."
-        elif 'vet' in message:
-            return f"👨‍⚕️ We have **{total_vets} veterinarians** on staff."
-        else:
-            return f"""📊 **Veterinary System Statistics:**
-            
-🏥 Health Records: **{total_records}**
-📅 Appointments: **{total_appointments}**
-👨‍⚕️ Veterinarians: **{total_vets}**"""
-    
-    # Health records
-    if 'health' in message or 'record' in message:
-        if 'recent' in message or 'latest' in message:
-            records = VetRecord.query.order_by(VetRecord.last_checkup.desc()).limit(5).all()
-            
-            if not records:
-                return "No health records found in the system."
-            
-            response = "🏥 **Recent Health Records:**\n\n"
-            for record in records:
-                checkup_date = record.last_checkup.strftime('%Y-%m-%d') if record.last_checkup else 'No checkup'
-                response += f"• Pet ID {record.pet_id} ({record.pet_name or 'Unknown'}): Last checkup {checkup_date}\n"
+    if topic == 'record':
+        return f"📊 We have **{counts['records']} health records** in our system."
+    elif topic == 'appointment':
+        return f"📅 We have **{counts['appointments']} total appointments** ({counts['upcoming']} upcoming)."
+    elif topic == 'vet':
+        return f"👨‍⚕️ We have **{counts['vets']} veterinarians** on staff."
+    
+    return f"""📊 **Veterinary System Statistics:**
             
-            return response
+🏥 Health Records: **{counts['records']}**
+📅 Appointments: **{counts['appointments']}**
+👨‍⚕️ Veterinarians: **{counts['vets']}**"""
+
+
+def answer_records(message, match):
+    """Health records"""
+    data = snapshot.get()
+    
+    if match.get('when') == 'recent':
+        records = data['recent_records']
         
-        else:
-            total = VetRecord.query.count()
-            recent = VetRecord.query.filter(
-                VetRecord.last_checkup >= datetime.now() - timedelta(days=30)
-            ).count() if VetRecord.query.first() and VetRecord.query.first().last_checkup else 0
-            
-            return f"🏥 We have **{total} total health records** ({recent} updated in the last 30 days)."
+        if not records:
+            return "No health records found in the system."
+        
+        response = "🏥 **Recent Health Records:**\n\n"
+        for record in records:
+            checkup_date = record['last_checkup'].strftime('%Y-%m-%d') if record['last_checkup'] else 'No checkup'
+            response += f"• Pet ID {record['pet_id']} ({record['pet_name'] or 'Unknown'}): Last checkup {checkup_date}\n"
+        
+        return response
     
-    # Appointments
-    if 'appointment' in message:
-        if 'today' in message:
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            
-            appointments = Appointment.query.filter(
-                Appointment.appointment_date >= today_start,
-                Appointment.appointment_date < today_end
-            ).all()
-            
-            if not appointments:
-                return "No appointments scheduled for today. All clear! ✅"
-            
-            response = f"📅 **Today's Appointments ({len(appointments)}):**\n\n"
-            for apt in appointments:
-                vet = Vet.query.get(apt.veterinarian_id)
-                vet_name = f"Dr. {vet.name}" if vet else "Unknown"
-                response += f"• {apt.appointment_date.strftime('%H:%M')} - Pet ID {apt.pet_id} ({apt.pet_name or 'Unknown'}) with {vet_name}\n  Reason: {apt.reason}\n"
-            
-            return response
+    counts = data['counts']
+    return f"🏥 We have **{counts['records']} total health records** ({counts['records_recent']} updated in the last 30 days)."
+
+
+def answer_appointments(message, match):
+    """Appointments"""
+    data = snapshot.get()
+    when = match.get('when')
+    
+    if when == 'today':
+        appointments = data['today']
         
-        elif 'upcoming' in message or 'future' in message or 'scheduled' in message:
-            appointments = Appointment.query.filter(
-                Appointment.appointment_date >= datetime.now()
-            ).order_by(Appointment.appointment_date).limit(5).all()
-            
-            if not appointments:
-                return "No upcoming appointments scheduled."
-            
-            response = "📅 **Upcoming Appointments:**\n\n"
-            for apt in appointments:
-                vet = Vet.query.get(apt.veterinarian_id)
-                vet_name = f"Dr. {vet.name}" if vet else "Unknown"
-                response += f"• {apt.appointment_date.strftime('%Y-%m-%d %H:%M')} - Pet ID {apt.pet_id} ({apt.pet_name or 'Unknown'}) with {vet_name}\n"
-            
-            return response
+        if not appointments:
+            return "No appointments scheduled for today. All clear! ✅"
         
-        elif 'past' in message or 'completed' in message:
-            appointments = Appointment.query.filter(
-                Appointment.appointment_date < datetime.now()
-            ).order_by(Appointment.appointment_date.desc()).limit(5).all()
-            
-            if not appointments:
-                return "No past appointments found."
-            
-            response = "📋 **Recent Completed Appointments:**\n\n"
-            for apt in appointments:
-                response += f"• {apt.appointment_date.strftime('%Y-%m-%d')} - Pet ID {apt.pet_id} ({apt.pet_name or 'Unknown'}): {apt.reason}\n"
-            
-            return response
+        response = f"📅 **Today's Appointments ({len(appointments)}):**\n\n"
+        for apt in appointments:
+            vet_name = f"Dr. {apt['vet_name']}" if apt['vet_name'] else "Unknown"
+            response += f"• {apt['date'].strftime('%H:%M')} - Pet ID {apt['pet_id']} ({apt['pet_name'] or 'Unknown'}) with {vet_name}\n  Reason: {apt['reason']}\n"
         
-        else:
-            total = Appointment.query.count()
-            upcoming = Appointment.query.filter(Appointment.appointment_date >= datetime.now()).count()
-            
-            return f"📅 **{total} total appointments** ({upcoming} upcoming, {total-upcoming} completed)."
+        return response
     
-    # Veterinarians
-    if 'vet' in message and 'veterinarian' not in message.lower():
-        if 'available' in message or 'list' in message or 'show' in message:
-            vets = Vet.query.all()
-            
-            if not vets:
-                return "No veterinarians found in the system."
-            
-            response = "👨‍⚕️ **Our Veterinarians:**\n\n"
-            for vet in vets:
-                response += f"• **Dr. {vet.name}** ({vet.specialization or 'General Practice'})\n  📧 {vet.email} | 📞 {vet.phone}\n"
-            
-            return response
+    elif when == 'upcoming':
+        appointments = data['upcoming']
         
-        else:
-            count = Vet.query.count()
-            specializations = db.session.query(Vet.specialization).distinct().all()
-            spec_list = ", ".join([s[0] for s in specializations if s[0]])
-            
-            if spec_list:
-                return f"👨‍⚕️ We have **{count} veterinarians** specializing in: {spec_list}"
-            else:
-                return f"👨‍⚕️ We have **{count} veterinarians** on staff."
-    
-    # Search by pet ID
-    if 'pet' in message and any(char.isdigit() for char in message):
-        import re
-        pet_id_match = re.search(r'\d+', message)
-        
-        if pet_id_match:
-            pet_id = int(pet_id_match.group())
-            record = VetRecord.query.filter_by(pet_id=pet_id).first()
-            
-            if record:
-                appointments = Appointment.query.filter_by(pet_id=pet_id).count()
-                vaccinations = record.get_vaccinations() if hasattr(record, 'get_vaccinations') else []
-                
-                checkup_date = record.last_checkup.strftime('%Y-%m-%d') if record.last_checkup else 'No checkup recorded'
-                
-                return f"""🏥 **Health Record for Pet ID {pet_id}:**
+        if not appointments:
+            return "No upcoming appointments scheduled."
+        
+        response = "📅 **Upcoming Appointments:**\n\n"
+        for apt in appointments:
+            vet_name = f"Dr. {apt['vet_name']}" if apt['vet_name'] else "Unknown"
+            response += f"• {apt['date'].strftime('%Y-%m-%d %H:%M')} - Pet ID {apt['pet_id']} ({apt['pet_name'] or 'Unknown'}) with {vet_name}\n"
+        
+        return response
+    
+    elif when == 'past':
+        appointments = data['past']
+        
+        if not appointments:
+            return "No past appointments found."
+        
+        response = "📋 **Recent Completed Appointments:**\n\n"
+        for apt in appointments:
+            response += f"• {apt['date'].strftime('%Y-%m-%d')} - Pet ID {apt['pet_id']} ({apt['pet_name'] or 'Unknown'}): {apt['reason']}\n"
+        
+        return response
+    
+    total = data['counts']['appointments']
+    upcoming = data['counts']['upcoming']
+    
+    return f"📅 **{total} total appointments** ({upcoming} upcoming, {total-upcoming} completed)."
+
+
+def answer_vets(message, match):
+    """Veterinarians"""
+    data = snapshot.get()
+    
+    if match.get('listing'):
+        vets = data['vets']
+        
+        if not vets:
+            return "No veterinarians found in the system."
+        
+        response = "👨‍⚕️ **Our Veterinarians:**\n\n"
+        for vet in vets:
+            response += f"• **Dr. {vet['name']}** ({vet['specialization'] or 'General Practice'})\n  📧 {vet['email']} | 📞 {vet['phone']}\n"
+        
+        return response
+    
+    count = data['counts']['vets']
+    spec_list = ", ".join(data['specializations'])
+    
+    if spec_list:
+        return f"👨‍⚕️ We have **{count} veterinarians** specializing in: {spec_list}"
+    else:
+        return f"👨‍⚕️ We have **{count} veterinarians** on staff."
+
+
+def answer_pet_record(message, match):
+    """Search by pet ID"""
+    pet_id = match.get('pet_id')
+    record = VetRecord.query.filter_by(pet_id=pet_id).first()
+    
+    if not record:
+        return f"No health record found for Pet ID {pet_id}. The pet may not have been examined yet."
+    
+    appointments = Appointment.query.filter_by(pet_id=pet_id).count()
+    vaccinations = record.get_vaccinations() if hasattr(record, 'get_vaccinations') else []
+    
+    checkup_date = record.last_checkup.strftime('%Y-%m-%d') if record.last_checkup else 'No checkup recorded'
+    
+    return f"""🏥 **Health Record for Pet ID {pet_id}:**
                 
 📋 Pet Name: **{record.pet_name or 'Unknown'}**
 🐾 Species: {record.species or 'Unknown'}
@@ -202,10 +267,9 @@ Just ask naturally!"""
 💉 Vaccination Records: {len(vaccinations)} on file
 📅 Appointments: {appointments}
 📝 Notes: {record.notes[:150] if record.notes else 'No notes available'}"""
-            else:
-                return f"No health record found for Pet ID {pet_id}. The pet may not have been examined yet."
-    
-    # Default response
+
+
+def answer_default(message, match):
     return """I'm not sure how to answer that. Here are some things you can ask me:
 
 💬 "How many health records?"
@@ -215,3 +279,14 @@ Just ask naturally!"""
 💬 "Today's appointments"
 
 Or just type 'help' to see all my features!"""
+
+
+HANDLERS = {
+    'greeting': answer_greeting,
+    'help': answer_help,
+    'stats': answer_stats,
+    'records': answer_records,
+    'appointments': answer_appointments,
+    'vets': answer_vets,
+    'pet_record': answer_pet_record,
+}
@@ -0,0 +1,410 @@
+"""
+Two-way sync of appointments with Google Calendar
+Committed appointment creates, updates, cancellations and deletes are queued
+per appointment and pushed by a worker thread, up to CALENDAR_SYNC_BATCH_SIZE
+events per batch HTTP request. Event IDs returned by the API are stored in
+Appointment.google_calendar_event_id.
+
+In the other direction, pull_changes() lists only the events changed since
+the stored sync token and applies reschedules and cancellations made in the
+calendar to the linked appointments, one bulk update per page. With several
+workers only the one holding the lease on the calendar's sync state pulls,
+and an appointment changed locally after its event was last updated is left
+alone, whichever worker queued the change.
+"""
+import os
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from veterinary_system.models import Appointment, CalendarSyncState, db
+from veterinary_system.utils import google_calendar
+
+MAX_BATCH_SIZE = 50  # limit of the Calendar batch endpoint
+MAX_ATTEMPTS = 5
+PULL_PAGE_SIZE = 250  # default page size of events.list
+PULL_LEASE_INTERVALS = 3  # pull intervals a dead puller holds the lease for
+
+
+def appointment_event(appointment):
+    """Calendar event body for an appointment"""
+    vet = appointment.vet.name if appointment.vet else 'Unassigned'
+    lines = [
+        f"Owner: {appointment.owner_name}",
+        f"Vet: {vet}",
+        f"Reason: {appointment.reason or '-'}",
+    ]
+    if appointment.owner_phone:
+        lines.append(f"Phone: {appointment.owner_phone}")
+    if appointment.notes:
+        lines.append(f"Notes: {appointment.notes}")
+    return google_calendar.build_event(
+        f"Vet appointment: {appointment.pet_name}",
+        '\n'.join(lines),
+        appointment.date,
+        appointment.duration,
+        [appointment.owner_email] if appointment.owner_email else None
+    )
+
+
+class CalendarSyncQueue:
+    """Pending calendar changes, coalesced per appointment"""
+
+    def __init__(self):
+        self.app = None
+        # appointment id -> {'event_id': id of a deleted row's event, 'attempts': n, 'due': t}
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._watching = False
+
+    def enqueue(self, appointment_id, deleted_event_id=None):
+        """
+        Queue an appointment for sync
+
+        The appointment is read when the batch is sent, so several changes
+        between batches become one call. For a deleted row pass the event
+        ID it had, since the row will be gone by then.
+        """
+        with self._lock:
+            previous = self._pending.pop(appointment_id, None)
+            if deleted_event_id is None and previous:
+                deleted_event_id = previous['event_id']
+            self._pending[appointment_id] = {'event_id': deleted_event_id, 'attempts': 0, 'due': 0}
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def is_pending(self, appointment_id):
+        with self._lock:
+            return appointment_id in self._pending
+
+    def watch(self):
+        """Queue committed inserts, updates and deletes of appointments"""
+        if self._watching:
+            return self
+        self._watching = True
+        key = (type(self).__name__, id(self))
+
+        def after_flush(session, flush_context):
+            pending = session.info.setdefault(key, {})
+            for obj in session.new | session.dirty:
+                if isinstance(obj, Appointment) and session.is_modified(obj):
+                    pending.setdefault(obj.id, None)
+            for obj in session.deleted:
+                if isinstance(obj, Appointment):
+                    pending[obj.id] = obj.google_calendar_event_id
+
+        def after_commit(session):
+            changes = session.info.pop(key, {})
+            for appointment_id, deleted_event_id in changes.items():
+                self.enqueue(appointment_id, deleted_event_id)
+            if changes:
+                self._wake.set()
+
+        def after_rollback(session, previous_transaction):
+            session.info.pop(key, None)
+
+        event.listen(Session, 'after_flush', after_flush)
+        event.listen(Session, 'after_commit', after_commit)
+        event.listen(Session, 'after_soft_rollback', after_rollback)
+        return self
+
+    def start(self, app):
+        """Watch appointments and push them from a daemon thread"""
+        self.app = app
+        self.watch()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='calendar-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        last_pull = 0
+        owner = f'{socket.gethostname()}:{os.getpid()}'
+        while True:
+            self._wake.wait(Config.CALENDAR_SYNC_INTERVAL)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    # Local changes go out before calendar changes come in
+                    self.flush()
+                    if Config.CALENDAR_PULL_INTERVAL and \
+                            time.monotonic() - last_pull >= Config.CALENDAR_PULL_INTERVAL:
+                        last_pull = time.monotonic()
+                        if claim_pull(owner, Config.CALENDAR_PULL_INTERVAL * PULL_LEASE_INTERVALS):
+                            pull_changes()
+            except Exception as e:
+                print(f"Error syncing calendar: {e}")
+
+    def _take(self, limit):
+        now = time.monotonic()
+        with self._lock:
+            ids = [appointment_id for appointment_id, op in self._pending.items() if op['due'] <= now][:limit]
+            return {appointment_id: self._pending.pop(appointment_id) for appointment_id in ids}
+
+    def _retry(self, appointment_id, op, error):
+        if op['attempts'] + 1 >= MAX_ATTEMPTS:
+            print(f"Error syncing appointment {appointment_id} to calendar, giving up: {error}")
+            return
+        op = {**op, 'attempts': op['attempts'] + 1, 'due': time.monotonic() + 2 ** op['attempts']}
+        with self._lock:
+            # A newer change queued meanwhile wins
+            self._pending.setdefault(appointment_id, op)
+
+    def flush(self):
+        """Send due changes in batches; needs an app context. Returns the number of calls made"""
+        service = google_calendar.get_calendar_service()
+        if not service:
+            return 0
+        batch_size = min(Config.CALENDAR_SYNC_BATCH_SIZE, MAX_BATCH_SIZE)
+        sent = 0
+        while True:
+            ops = self._take(batch_size)
+            if not ops:
+                return sent
+            sent += self._send_batch(service, ops)
+
+    def _send_batch(self, service, ops):
+        calendar_id = Config.GOOGLE_CALENDAR_ID
+        appointments = {
+            appointment.id: appointment
+            for appointment in Appointment.query.filter(Appointment.id.in_(list(ops))).all()
+        }
+        events = service.events()
+        calls = {}  # request id -> (appointment id, action)
+        results = {}  # appointment id -> event id to store ('' clears it)
+
+        def handle(request_id, response, exception):
+            appointment_id, action = calls[request_id]
+            if exception is not None:
+                if action == 'delete' and google_calendar.is_gone(exception):
+                    results[appointment_id] = ''
+                elif action == 'update' and google_calendar.is_gone(exception):
+                    # Removed from the calendar by hand; create it again
+                    results[appointment_id] = ''
+                    self.enqueue(appointment_id)
+                else:
+                    self._retry(appointment_id, ops[appointment_id], exception)
+                return
+            results[appointment_id] = response.get('id', '') if action != 'delete' else ''
+
+        batch = google_calendar.new_batch(handle)
+        for appointment_id, op in ops.items():
+            appointment = appointments.get(appointment_id)
+            if appointment is None or appointment.status == 'cancelled':
+                event_id = appointment.google_calendar_event_id if appointment else op['event_id']
+                if not event_id:
+                    continue
+                request, action = events.delete(calendarId=calendar_id, eventId=event_id), 'delete'
+            elif appointment.google_calendar_event_id:
+                # The full body replaces the event, so no read is needed first
+                request, action = events.update(
+                    calendarId=calendar_id,
+                    eventId=appointment.google_calendar_event_id,
+                    body=appointment_event(appointment)
+                ), 'update'
+            else:
+                request, action = events.insert(calendarId=calendar_id, body=appointment_event(appointment)), 'insert'
+            request_id = str(len(calls))
+            calls[request_id] = (appointment_id, action)
+            batch.add(request, request_id=request_id)
+
+        if not calls:
+            return 0
+        try:
+            with google_calendar.api_lock:
+                batch.execute()
+        except Exception as e:
+            for appointment_id, _ in calls.values():
+                if appointment_id not in results:
+                    self._retry(appointment_id, ops[appointment_id], e)
+            return len(calls)
+
+        self._store(results, appointments)
+        return len(calls)
+
+    def _store(self, results, appointments):
+        """Write event IDs back without touching updated_at or re-queueing the rows"""
+        for appointment_id, event_id in results.items():
+            appointment = appointments.get(appointment_id)
+            if appointment is None or (appointment.google_calendar_event_id or '') == event_id:
+                continue
+            db.session.execute(
+                update(Appointment)
+                .where(Appointment.id == appointment_id)
+                .values(google_calendar_event_id=event_id or None, updated_at=Appointment.updated_at)
+            )
+        db.session.commit()
+
+
+class SyncTokenExpired(Exception):
+    """The calendar no longer accepts the stored sync token (HTTP 410)"""
+
+
+def event_time(value):
+    """Naive UTC datetime of an event start or end; None for all-day events"""
+    if not value or not value.get('dateTime'):
+        return None
+    moment = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def reconcile_events(events, stats):
+    """Apply reschedules and cancellations from changed events to their appointments in bulk"""
+    by_event = {item['id']: item for item in events if item.get('id')}
+    if not by_event:
+        return
+    rows = db.session.query(
+        Appointment.id, Appointment.google_calendar_event_id, Appointment.date,
+        Appointment.duration, Appointment.status, Appointment.updated_at
+    ).filter(Appointment.google_calendar_event_id.in_(list(by_event))).all()
+    stats['unlinked'] += len(by_event) - len(rows)
+    
+    now = datetime.utcnow()
+    changes = []
+    for appointment_id, event_id, date, duration, status, updated_at in rows:
+        item = by_event[event_id]
+        # A local change still waiting to be pushed wins over the calendar.
+        # Other workers' queues are not visible here, but their changes are
+        # newer than the event until pushed.
+        updated = event_time({'dateTime': item.get('updated')})
+        if calendar_sync.is_pending(appointment_id) or (updated and updated_at and updated_at > updated):
+            stats['skipped'] += 1
+            continue
+        if item.get('status') == 'cancelled':
+            change = {'id': appointment_id, 'google_calendar_event_id': None, 'updated_at': now}
+            if status == 'scheduled':
+                change['status'] = 'cancelled'
+                stats['cancelled'] += 1
+            changes.append(change)
+            continue
+        start, end = event_time(item.get('start')), event_time(item.get('end'))
+        if start is None:
+            continue
+        minutes = int((end - start).total_seconds() // 60) if end else duration
+        if start != date or minutes != duration:
+            changes.append({'id': appointment_id, 'date': start, 'duration': minutes, 'updated_at': now})
+            stats['rescheduled'] += 1
+    
+    if changes:
+        # Bulk UPDATE by primary key; it skips the unit of work, so these
+        # rows are not queued to be pushed back to the calendar
+        db.session.execute(update(Appointment), changes)
+
+
+def _pull(service, calendar_id, sync_token, stats):
+    """List changed events page by page, reconciling each page; returns the next sync token"""
+    page_token = None
+    while True:
+        params = {'calendarId': calendar_id, 'maxResults': PULL_PAGE_SIZE, 'showDeleted': True}
+        if sync_token:
+            params['syncToken'] = sync_token
+        if page_token:
+            params['pageToken'] = page_token
+        try:
+            with google_calendar.api_lock:
+                result = service.events().list(**params).execute()
+        except Exception as e:
+            if sync_token and google_calendar.error_status(e) == 410:
+                raise SyncTokenExpired() from e
+            raise
+        items = result.get('items', [])
+        stats['events'] += len(items)
+        reconcile_events(items, stats)
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return result.get('nextSyncToken')
+
+
+def sync_state(calendar_id):
+    """The calendar's sync state, created once even when workers race to insert it"""
+    state = db.session.get(CalendarSyncState, calendar_id)
+    if state is None:
+        db.session.add(CalendarSyncState(calendar_id=calendar_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker inserted it first
+            db.session.rollback()
+        state = db.session.get(CalendarSyncState, calendar_id)
+    return state
+
+
+def claim_pull(owner, lease):
+    """
+    Take or renew the lease on pulling the configured calendar; needs an app context
+    
+    Returns True while owner holds it. A lease left by a stopped worker
+    expires after lease seconds and the next worker to ask takes it over.
+    """
+    calendar_id = Config.GOOGLE_CALENDAR_ID
+    sync_state(calendar_id)
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(CalendarSyncState)
+        .where(
+            CalendarSyncState.calendar_id == calendar_id,
+            or_(
+                CalendarSyncState.pull_owner.is_(None),
+                CalendarSyncState.pull_owner == owner,
+                CalendarSyncState.pull_lease_until < now
+            )
+        )
+        .values(pull_owner=owner, pull_lease_until=now + timedelta(seconds=lease))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def pull_changes(full=False):
+    """
+    Pull calendar changes into the appointments; needs an app context
+    
+    Only events changed since the last pull are listed. Without a stored
+    token, with full=True or when the token has expired, every event is
+    listed once to get a new one. Returns counts, or None without a client.
+    """
+    service = google_calendar.get_calendar_service()
+    if not service:
+        return None
+    calendar_id = Config.GOOGLE_CALENDAR_ID
+    state = sync_state(calendar_id)
+    
+    sync_token = None if full else state.sync_token
+    stats = {'events': 0, 'rescheduled': 0, 'cancelled': 0, 'skipped': 0, 'unlinked': 0, 'full': not sync_token}
+    try:
+        next_token = _pull(service, calendar_id, sync_token, stats)
+    except SyncTokenExpired:
+        print("Calendar sync token expired, running a full sync")
+        db.session.rollback()
+        state = db.session.get(CalendarSyncState, calendar_id)
+        stats = {key: 0 for key in stats}
+        stats['full'] = True
+        next_token = _pull(service, calendar_id, None, stats)
+    
+    now = datetime.utcnow()
+    state.sync_token = next_token
+    state.last_synced_at = now
+    if stats['full']:
+        state.last_full_sync = now
+    db.session.commit()
+    return stats
+
+
+calendar_sync = CalendarSyncQueue()
@@ -2,17 +2,22 @@
 Google Calendar API integration
 """
 from datetime import datetime, timedelta
+from urllib.parse import urljoin
 import os
 import sys
+import threading
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Google Calendar API will be initialized when credentials are available
 try:
     from google.oauth2.credentials import Credentials
+    from google.auth.credentials import AnonymousCredentials
     from google_auth_oauthlib.flow import InstalledAppFlow
     from google.auth.transport.requests import Request
     from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import BatchHttpRequest
     import pickle
     GOOGLE_AVAILABLE = True
 except ImportError:
@@ -20,23 +25,28 @@ except ImportError:
     print("Google Calendar API not available. Install required packages.")
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
+DEFAULT_ENDPOINT = 'https://www.googleapis.com/'
 
-def get_calendar_service():
-    """Get Google Calendar service"""
-    if not GOOGLE_AVAILABLE:
-        return None
-    
-    from config import Config
-    
+# One discovery client per process. httplib2 is not thread-safe, so calls
+# made through it are serialized with api_lock.
+_service = None
+_service_lock = threading.Lock()
+api_lock = threading.RLock()
+
+
+def _load_credentials(token_file, credentials_file, endpoint):
+    """Credentials from the token file, refreshed or obtained as needed"""
     creds = None
-    token_file = Config.GOOGLE_CALENDAR_TOKEN_FILE
-    credentials_file = Config.GOOGLE_CALENDAR_CREDENTIALS_FILE
     
     # Check if token file exists
     if os.path.exists(token_file):
         with open(token_file, 'rb') as token:
             creds = pickle.load(token)
     
+    # A stand-in server does not check credentials
+    if not creds and endpoint:
+        return AnonymousCredentials()
+    
     # If no valid credentials, let user log in
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
@@ -55,8 +65,91 @@ def get_calendar_service():
         with open(token_file, 'wb') as token:
             pickle.dump(creds, token)
     
-    service = build('calendar', 'v3', credentials=creds)
-    return service
+    return creds
+
+
+def get_calendar_service():
+    """Get the Google Calendar service, built once per process"""
+    global _service
+    if not GOOGLE_AVAILABLE:
+        return None
+    
+    from config import Config
+    
+    with _service_lock:
+        # The authorized client refreshes an expired access token by itself
+        if _service is not None:
+            return _service
+        
+        endpoint = Config.GOOGLE_CALENDAR_API_ENDPOINT
+        creds = _load_credentials(Config.GOOGLE_CALENDAR_TOKEN_FILE,
+                                  Config.GOOGLE_CALENDAR_CREDENTIALS_FILE, endpoint)
+        if not creds:
+            return None
+        
+        # api_endpoint replaces the whole base URL, service path included
+        options = {'api_endpoint': urljoin(endpoint, 'calendar/v3/')} if endpoint else None
+        _service = build('calendar', 'v3', credentials=creds,
+                         client_options=options, cache_discovery=False)
+        return _service
+
+
+def reset_calendar_service():
+    """Drop the cached service, e.g. after the token file was replaced"""
+    global _service
+    with _service_lock:
+        _service = None
+
+
+def new_batch(callback):
+    """
+    Batch request against the configured endpoint
+    
+    The discovery client's own new_batch_http_request() always targets
+    googleapis.com, so the batch URI is built here to honour a stand-in.
+    """
+    from config import Config
+    endpoint = Config.GOOGLE_CALENDAR_API_ENDPOINT or DEFAULT_ENDPOINT
+    return BatchHttpRequest(callback=callback, batch_uri=urljoin(endpoint, 'batch/calendar/v3'))
+
+
+def build_event(title, description, start_time, duration=30, attendees=None):
+    """Event body for the Calendar API"""
+    end_time = start_time + timedelta(minutes=duration or 30)
+    
+    event = {
+        'summary': title,
+        'description': description,
+        'start': {
+            'dateTime': start_time.isoformat(),
+            'timeZone': 'UTC',
+        },
+        'end': {
+            'dateTime': end_time.isoformat(),
+            'timeZone': 'UTC',
+        },
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'email', 'minutes': 24 * 60},
+                {'method': 'popup', 'minutes': 60},
+            ],
+        },
+    }
+    
+    if attendees:
+        event['attendees'] = [{'email': email} for email in attendees]
+    return event
+
+
+def error_status(error):
+    """HTTP status of an API error, or None"""
+    return getattr(getattr(error, 'resp', None), 'status', None)
+
+
+def is_gone(error):
+    """Whether an API error means the event no longer exists"""
+    return error_status(error) in (404, 410)
 
 
 def create_calendar_event(title, description, start_time, duration=30, attendees=None):
@@ -78,32 +171,10 @@ def create_calendar_event(title, description, start_time, duration=30, attendees
         if not service:
             return None
         
-        end_time = start_time + timedelta(minutes=duration)
-        
-        event = {
-            'summary': title,
-            'description': description,
-            'start': {
-                'dateTime': start_time.isoformat(),
-                'timeZone': 'UTC',
-            },
-            'end': {
-                'dateTime': end_time.isoformat(),
-                'timeZone': 'UTC',
-            },
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'email', 'minutes': 24 * 60},
-                    {'method': 'popup', 'minutes': 60},
-                ],
-            },
-        }
-        
-        if attendees:
-            event['attendees'] = [{'email': email} for email in attendees]
-        
-        event = service.events().insert(calendarId='primary', body=event).execute()
+        from config import Config
+        event = build_event(title, description, start_time, duration, attendees)
+        with api_lock:
+            event = service.events().insert(calendarId=Config.GOOGLE_CALENDAR_ID, body=event).execute()
         return event.get('id')
     
     except Exception as e:
@@ -118,7 +189,9 @@ def update_calendar_event(event_id, title=None, description=None, start_time=Non
         if not service:
             return False
         
-        event = service.events().get(calendarId='primary', eventId=event_id).execute()
+        from config import Config
+        with api_lock:
+            event = service.events().get(calendarId=Config.GOOGLE_CALENDAR_ID, eventId=event_id).execute()
         
         if title:
             event['summary'] = title
@@ -135,11 +208,12 @@ def update_calendar_event(event_id, title=None, description=None, start_time=Non
                 'timeZone': 'UTC',
             }
         
-        updated_event = service.events().update(
-            calendarId='primary',
-            eventId=event_id,
-            body=event
-        ).execute()
+        with api_lock:
+            service.events().update(
+                calendarId=Config.GOOGLE_CALENDAR_ID,
+                eventId=event_id,
+                body=event
+            ).execute()
         
         return True
     
@@ -155,7 +229,9 @@ def delete_calendar_event(event_id):
         if not service:
             return False
         
-        service.events().delete(calendarId='primary', eventId=event_id).execute()
+        from config import Config
+        with api_lock:
+            service.events().delete(calendarId=Config.GOOGLE_CALENDAR_ID, eventId=event_id).execute()
         return True
     
     except Exception as e:
@@ -170,15 +246,17 @@ def get_upcoming_events(max_results=10):
         if not service:
             return []
         
+        from config import Config
         now = datetime.utcnow().isoformat() + 'Z'
         
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=now,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        with api_lock:
+            events_result = service.events().list(
+                calendarId=Config.GOOGLE_CALENDAR_ID,
+                timeMin=now,
+                maxResults=max_results,
+                singleEvents=True,
+                orderBy='startTime'
+            ).execute()
         
         events = events_result.get('items', [])
         return events